@@ -0,0 +1,3 @@
+# conftest.py
+# Lives at the project root so pytest puts the root on sys.path and the
+# `dirty_birds` package is importable from the pytests/ suite.
@@ -0,0 +1,23 @@
+# dirty_birds/__init__.py
+
+"""Dirty Birds: synthetic penguin tagging and monitoring data generator."""
+
+__version__ = "0.4.0"
+
+from .api import Dataset, generate, iter_batches, save, write_batches
+from .compact import generate_penguins_compact, to_text_frame
+from .config import COLUMNS, N_PENGUINS, SEED
+from .formats import FORMATS, read_frame, write_frame
+from .generation import (
+    ENGINES,
+    generate_penguins_columnar,
+    generate_penguins_rowwise,
+    generate_tag,
+    random_capture_date,
+)
+from .mess import (
+    duplicate_penguin_rows_for_resight,
+    inject_mess,
+    inject_mislabeled_duplicates,
+    inject_species_missingness,
+)
@@ -0,0 +1,243 @@
+# dirty_birds/api.py
+
+"""
+In-memory library API.
+
+``generate`` runs the full pipeline in memory and returns the clean and messy
+frames without touching disk; ``save`` writes them in any output format as a
+separate step. The CLI's in-memory and ``--rows`` modes are thin wrappers
+around these two calls, so the same arguments give the same data.
+
+    from dirty_birds import generate, save
+
+    data = generate(10_000, seed=7, mess_level='heavy')
+    data.messy.groupby('species').size()
+    save(data, 'clean.csv', 'messy.csv.gz')
+
+``iter_batches`` instead yields the records lazily, batch by batch, for
+consumers that start work on the first rows or read an unbounded feed;
+``write_batches`` writes such a feed as NDJSON or CSV (the CLI's ``--stream``).
+
+    for batch in iter_batches(None, batch_size=5_000):  # Never ends
+        consume(batch)
+"""
+
+import itertools
+import random
+from collections import namedtuple
+
+import pandas as pd
+
+import numpy as np
+
+from .cache import cached_base
+from .compact import to_text_frame
+from .config import N_PENGUINS, SEED
+from .dates import parse_capture_dates
+from .formats import output_path, write_frame
+from .generation import ENGINES, generate_penguins_columnar, generate_penguins_rowwise, new_tag_counters
+from .instrument import null_recorder, path_size
+from .mess import (
+    duplicate_penguin_rows_for_resight,
+    inject_mess,
+    inject_mislabeled_duplicates,
+    inject_species_missingness,
+)
+from .seekable import generate_rows
+from .streaming import as_messy_dtypes, iter_chunk_sizes, mess_chunk, mess_plan_for_level
+
+Dataset = namedtuple('Dataset', ['clean', 'messy'])
+
+BATCH_KINDS = ['messy', 'clean', 'both', 'events']
+# Event type of the base rows, resights and mislabeled duplicates of a batch
+EVENT_TYPES = ['capture', 'resight', 'capture']
+STREAM_FORMATS = ['ndjson', 'csv']
+DEFAULT_BATCH_SIZE = 10_000
+MESS_STREAM = 1  # spawn_key of the random stream iter_batches messes with
+
+def generate(num_penguins=N_PENGUINS, seed=SEED, mess_level='moderate', duplicate_rate=0.45,
+             species_missing_rate=0.03, mislabel_rate=0.0, engine='columnar', rows=None, compact=False,
+             recorder=None, cache=None, truth=None):
+    """
+    Generates the clean and messy datasets in memory.
+
+    Returns a ``Dataset(clean, messy)`` namedtuple of DataFrames. With
+    ``compact`` the clean frame of the columnar engine uses the compact dtypes
+    of ``dirty_birds.compact``. ``rows`` (a ``(start, end)`` pair) or
+    ``engine='counter'`` selects the seekable engine.
+
+    Seeds NumPy's and Python's global generators from ``seed`` exactly like
+    the CLI, because the row-wise engine and species missingness draw from them.
+    Each stage is timed by ``recorder`` (a ``dirty_birds.instrument.StageRecorder``)
+    when one is given. With a ``cache`` (a ``dirty_birds.cache.BaseCache``) the
+    columnar engine loads its clean base from the cache when present.
+    A ``dirty_birds.truth.GroundTruth`` passed as ``truth`` is filled with the
+    messy rows' sources, origins and corrupted cells (not for ``rows``).
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Choose from {ENGINES}.")
+    mess_plan_for_level(mess_level)  # Validate before generating anything
+    np.random.seed(seed)
+    random.seed(seed)
+
+    recorder = recorder or null_recorder()
+
+    if rows is not None or engine == 'counter':
+        if truth is not None:
+            raise ValueError("Ground truth is not tracked by the counter-based engine.")
+        start, end = rows if rows is not None else (0, num_penguins)
+        with recorder.stage('counter_generation', rows_in=end - start) as stage:
+            clean, messy = generate_rows(
+                start, end,
+                seed=seed,
+                mess_level=mess_level,
+                duplicate_rate=duplicate_rate,
+                species_missing_rate=species_missing_rate,
+                mislabel_rate=mislabel_rate,
+            )
+            stage['rows_out'] = len(messy)
+        return Dataset(clean, messy)
+
+    with recorder.stage('generation', rows_in=num_penguins) as stage:
+        if engine == 'rowwise':
+            clean = generate_penguins_rowwise(num_penguins)
+            messy = clean.copy()
+        else:
+            clean, stage['cache_hit'] = cached_base(num_penguins, seed, cache)
+            messy = to_text_frame(clean)
+            if not compact:
+                clean = messy.copy()
+        stage['rows_out'] = len(clean)
+
+    if truth is not None:
+        truth.reset(len(messy))
+    for name, step in [
+        ('inject_mess', lambda df: inject_mess(df, mess_level=mess_level, inplace=True, truth=truth)),
+        ('resight', lambda df: duplicate_penguin_rows_for_resight(df, duplicate_rate=duplicate_rate, truth=truth)),
+        ('species_missingness', lambda df: inject_species_missingness(df, missing_rate=species_missing_rate, truth=truth)),
+        ('mislabels', lambda df: inject_mislabeled_duplicates(df, mislabel_rate=mislabel_rate, truth=truth)),
+    ]:
+        with recorder.stage(name, rows_in=len(messy)) as stage:
+            messy = step(messy)
+            stage['rows_out'] = len(messy)
+    return Dataset(clean, messy)
+
+def save(dataset, clean_output=None, messy_output=None, fmt='csv', workers=1, compression='infer',
+         recorder=None):
+    """
+    Writes a ``Dataset`` to disk; either output may be None to skip it.
+
+    A ``.csv`` suffix is swapped for the extension of ``fmt`` (see
+    ``dirty_birds.formats``). Returns the ``(clean_path, messy_path)`` written.
+    Writes are recorded as 'write_clean' and 'write_messy' stages on ``recorder``.
+    """
+    recorder = recorder or null_recorder()
+    paths = []
+    for kind, frame, path in [('clean', dataset.clean, clean_output), ('messy', dataset.messy, messy_output)]:
+        if path is None:
+            paths.append(None)
+            continue
+        path = output_path(path, fmt)
+        with recorder.stage(f'write_{kind}', rows_in=len(frame)) as stage:
+            write_frame(frame, path, fmt, invalid_columns=kind == 'messy', workers=workers, compression=compression)
+            stage['rows_out'] = len(frame)
+            stage['bytes_written'] = path_size(path)
+        paths.append(path)
+    return tuple(paths)
+
+
+# === Lazy batches ===
+def iter_batches(num_penguins=N_PENGUINS, batch_size=DEFAULT_BATCH_SIZE, kind='messy', seed=SEED,
+                 mess_level='moderate', duplicate_rate=0.45, species_missing_rate=0.03, mislabel_rate=0.0,
+                 engine='columnar', recorder=None):
+    """
+    Lazily yields the dataset in batches of ``batch_size`` clean penguins.
+
+    ``kind`` selects what each batch holds: the 'messy' records, the 'clean'
+    records, or 'both' as a ``Dataset(clean, messy)``. 'events' gives the
+    messy records plus an ``event`` column ('capture' or 'resight') and a
+    datetime64 ``event_date``: the parsed capture date, or the source bird's
+    clean capture date where the messy one is unparseable. ``num_penguins=None``
+    yields batches forever. Nothing is generated until the next batch is asked
+    for, so memory is bounded by one batch.
+
+    The mess stages run on each batch as in ``--chunk-size`` mode (see
+    ``dirty_birds.streaming``), except that a batch's resights and mislabeled
+    duplicates follow its own rows instead of the end of the whole dataset.
+    Generation and mess use separate random streams derived from ``seed``, so
+    the clean records do not depend on ``kind`` or the mess settings, and
+    with the columnar engine they equal ``generate(num_penguins, seed).clean``
+    when ``batch_size`` covers every penguin.
+    """
+    if engine not in ('columnar', 'rowwise'):
+        raise ValueError(f"iter_batches supports the 'columnar' and 'rowwise' engines, not '{engine}'.")
+    if kind not in BATCH_KINDS:
+        raise ValueError(f"Unknown batch kind '{kind}'. Choose from {BATCH_KINDS}.")
+    if batch_size <= 0:
+        raise ValueError("batch_size must be a positive integer.")
+    plan = mess_plan_for_level(mess_level)
+    sizes = iter_chunk_sizes(num_penguins, batch_size) if num_penguins is not None else itertools.repeat(batch_size)
+    return _iter_batches(sizes, kind, seed, plan, duplicate_rate, species_missing_rate, mislabel_rate,
+                         engine, recorder or null_recorder())
+
+def _iter_batches(sizes, kind, seed, plan, duplicate_rate, species_missing_rate, mislabel_rate, engine, recorder):
+    # Seeded on the first batch, like generate(), for the row-wise engine
+    np.random.seed(seed)
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    mess_rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(MESS_STREAM,)))
+    tag_counters = new_tag_counters()
+
+    for n in sizes:
+        with recorder.stage('generation', rows_in=n) as stage:
+            if engine == 'rowwise':
+                clean = generate_penguins_rowwise(n, tag_counters=tag_counters)
+            else:
+                clean = generate_penguins_columnar(n, rng, tag_counters=tag_counters)
+            stage['rows_out'] = len(clean)
+        if kind == 'clean':
+            yield clean
+            continue
+
+        chunk = clean.copy() if kind == 'both' else clean
+        source_dates = clean['capture_date'].to_numpy().astype('datetime64[D]')
+        frames = mess_chunk(chunk, plan, duplicate_rate, species_missing_rate, mislabel_rate, mess_rng,
+                            recorder=recorder)
+        if kind == 'events':
+            yield _label_events(frames, source_dates)
+            continue
+        messy = pd.concat([f for f in frames if f is not None], ignore_index=True)
+        messy = as_messy_dtypes(messy)
+        yield Dataset(clean, messy) if kind == 'both' else messy
+
+def _label_events(frames, source_dates):
+    parts = []
+    for frame, event in zip(frames, EVENT_TYPES):
+        if frame is not None and len(frame):
+            parts.append(frame.assign(event=event))
+    events = as_messy_dtypes(pd.concat(parts))
+    # Every part's index labels point at its source row of the clean batch
+    dates = parse_capture_dates(events['capture_date'], iso_first=True)
+    fallback = source_dates[events.index.to_numpy()]
+    events['event_date'] = np.where(np.isnat(dates), fallback, dates)
+    return events.reset_index(drop=True)
+
+def write_batches(batches, out, fmt='ndjson'):
+    """
+    Writes each DataFrame from ``batches`` to the text stream ``out`` and flushes it.
+
+    ``fmt`` is 'ndjson' (one JSON object per record, missing values as null)
+    or 'csv' (one header, then every batch's rows). Returns the number of
+    records written.
+    """
+    if fmt not in STREAM_FORMATS:
+        raise ValueError(f"Unknown stream format '{fmt}'. Choose from {STREAM_FORMATS}.")
+    rows = 0
+    for i, batch in enumerate(batches):
+        if fmt == 'csv':
+            batch.to_csv(out, header=i == 0, index=False)
+        elif len(batch):
+            out.write(batch.to_json(orient='records', lines=True, force_ascii=False))
+        out.flush()
+        rows += len(batch)
+    return rows
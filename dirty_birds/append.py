@@ -0,0 +1,265 @@
+# dirty_birds/append.py
+
+"""
+Incremental append mode: extend an existing dataset with new field seasons.
+
+A run saved with ``save_state`` leaves a state directory next to its clean
+output (``<clean_output>.state``) holding:
+
+- ``state.json``: the per-species tag counters, the append random stream's
+  bit-generator state, the seasons generated so far and the row counts;
+- ``tagged.bin``: one fixed-width record per tagged bird (``INDEX_DTYPE``)
+  with its species, colony, sex, current age group, last capture date and
+  latest morphometrics.
+
+``append_season`` then generates one new season window:
+
+- new captures, drawn like the columnar engine within the season window and
+  tagged from the persisted counters, so tag IDs continue where they stopped;
+- resights of already-tagged birds, each seen at most once per season with
+  probability ``duplicate_rate`` times the resight survival rate. A resight
+  keeps the bird's identity, promotes its age group, drifts its latest
+  morphometrics and re-draws health and clutch.
+
+The season's clean captures are appended to the clean CSV, and the captures
+plus resights, messed as one batch, to the messy CSV. The index file is
+memory-mapped: new birds are appended to it and resighted birds are updated
+in place, so the cost of a season follows the new data, not the history.
+"""
+
+import json
+import os
+import random
+
+import numpy as np
+import pandas as pd
+
+from .config import AGE_GROUPS, COLONY_CODES, COLUMNS, HEALTH_LABELS, SPECIES_CODES
+from .csvio import open_csv_output
+from .dates import EGG_LAG_DAYS, draw_capture_dates, egg_dates, next_season, study_window
+from .generation import (
+    assign_tag_numbers, columns_to_frame, draw_columns, new_tag_counters, parameter_tables,
+)
+from .mess import (
+    MORPHOMETRIC_COLUMNS,
+    RESIGHT_SURVIVAL_RATE,
+    inject_mess,
+    inject_mislabeled_duplicates,
+    inject_species_missingness,
+)
+from .streaming import mess_plan_for_level
+
+STATE_SUFFIX = '.state'
+STATE_FILE = 'state.json'
+INDEX_FILE = 'tagged.bin'
+STATE_VERSION = 2
+APPEND_STREAM = 1  # spawn_key of the random stream used for appended seasons
+
+INDEX_DTYPE = np.dtype([
+    ('tag_number', '<i4'),
+    ('species', '<i2'),
+    ('colony', '<i2'),
+    ('age', 'i1'),
+    ('sex', 'i1'),
+    ('last_capture', '<i4'),  # Days since 1970-01-01
+    ('bill_length_mm', '<f4'),
+    ('bill_depth_mm', '<f4'),
+    ('flipper_length_mm', '<f4'),
+    ('body_mass_g', '<f4'),
+])
+
+def state_path(clean_output):
+    """The state directory kept next to ``clean_output``."""
+    return str(clean_output) + STATE_SUFFIX
+
+
+# === State ===
+def _index_path(directory):
+    return os.path.join(directory, INDEX_FILE)
+
+def _write_state(directory, state):
+    # Replace atomically, so an interrupted run leaves the previous state intact
+    tmp_path = os.path.join(directory, STATE_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, STATE_FILE))
+
+def index_records(compact):
+    """Builds ``INDEX_DTYPE`` records for the tagged birds of a compact clean frame, in row order."""
+    tag_number = compact['tag_number'].to_numpy()
+    tagged = compact.loc[tag_number > 0]
+    records = np.empty(len(tagged), dtype=INDEX_DTYPE)
+    records['tag_number'] = tagged['tag_number'].to_numpy()
+    records['species'] = tagged['species'].cat.codes.to_numpy()
+    records['colony'] = tagged['colony_id'].cat.codes.to_numpy()
+    records['age'] = tagged['age_group'].cat.codes.to_numpy()
+    # Compact sex codes are -1 (not sexed), 0 and 1; the index uses SEX_CODES
+    records['sex'] = tagged['sex'].cat.codes.to_numpy() + 1
+    records['last_capture'] = tagged['capture_date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    for column in MORPHOMETRIC_COLUMNS:
+        records[column] = tagged[column].to_numpy()
+    return records
+
+def save_state(directory, compact, seed, messy_rows=0, window=None):
+    """
+    Persists the generator state of a finished run to ``directory``.
+
+    ``compact`` is the run's compact clean frame (see ``dirty_birds.compact``)
+    and ``window`` the capture window it was drawn from, by default the study
+    window. Returns the state dict.
+    """
+    os.makedirs(directory, exist_ok=True)
+    records = index_records(compact)
+    counters = new_tag_counters()
+    for code, name in enumerate(counters):
+        numbers = records['tag_number'][records['species'] == code]
+        counters[name] = int(numbers.max()) + 1 if len(numbers) else 1
+    start, end = window or study_window()
+
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(APPEND_STREAM,)))
+    with open(_index_path(directory), 'wb') as f:
+        f.write(records.tobytes())
+    state = {
+        'version': STATE_VERSION,
+        'seed': seed,
+        'tag_counters': counters,
+        'rng': rng.bit_generator.state,
+        'seasons': [[str(start), str(end)]],
+        'tagged': len(records),
+        'rows': {'clean': len(compact), 'messy': messy_rows},
+        # The index stores codes, so appends need the same species and colonies
+        'species': list(SPECIES_CODES),
+        'colonies': list(COLONY_CODES),
+    }
+    _write_state(directory, state)
+    return state
+
+def load_state(directory):
+    """Reads the state dict saved in ``directory``."""
+    path = os.path.join(directory, STATE_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No generator state at {directory}. Create it with a --save-state run first.")
+    with open(path) as f:
+        state = json.load(f)
+    if state.get('version') != STATE_VERSION:
+        raise ValueError(f"Unsupported state version {state.get('version')} in {directory}.")
+    return state
+
+def load_index(directory, state, mode='r'):
+    """Memory-maps the tagged-bird index; records beyond ``state['tagged']`` are ignored."""
+    if state['tagged'] == 0:
+        return np.empty(0, dtype=INDEX_DTYPE)
+    return np.memmap(_index_path(directory), dtype=INDEX_DTYPE, mode=mode, shape=(state['tagged'],))
+
+
+# === Season generation ===
+def build_resight_columns(records, window, rng):
+    """Draws one season's resight records for the index ``records`` as ``draw_columns``-style arrays."""
+    t = parameter_tables()
+    n = len(records)
+    start, end = window
+    capture_date = draw_capture_dates(n, rng, window=window)
+    species = records['species']
+
+    columns = {
+        'species': species,
+        'colony': records['colony'],
+        'age': np.minimum(records['age'] + 1, len(AGE_GROUPS) - 1).astype(np.int8),
+        'sex': records['sex'],
+        'capture_date': capture_date,
+        'health': rng.integers(0, len(HEALTH_LABELS), size=n).astype(np.int8),
+        'tagged': np.ones(n, dtype=bool),
+        'clutch': rng.random(n) < t['clutch_prob'][species],
+    }
+    for column in MORPHOMETRIC_COLUMNS:
+        columns[column] = records[column].astype(np.float64) * rng.uniform(0.98, 1.05, size=n)
+    columns['egg_date'] = egg_dates(capture_date, rng.integers(0, EGG_LAG_DAYS + 1, size=n), start)
+    return columns
+
+def _append_csv(frame, path, compression):
+    with open_csv_output(path, compression, append=True) as out:
+        frame.to_csv(out, header=False, index=False)
+
+def append_season(clean_output, messy_output, num_penguins, season=None, mess_level='moderate',
+                  duplicate_rate=0.45, species_missing_rate=0.03, mislabel_rate=0.0, compression='infer'):
+    """
+    Generates one new field season and appends it to existing clean and messy CSVs.
+
+    ``num_penguins`` new birds are captured within ``season`` (an inclusive
+    datetime64[D] pair, by default the next austral summer after the last
+    season). Reads and updates the state saved next to ``clean_output``.
+    Returns ``{'clean': rows_appended, 'messy': rows_appended, 'season': (start, end)}``.
+    """
+    mess_plan_for_level(mess_level)  # Validate before touching any file
+    directory = state_path(clean_output)
+    state = load_state(directory)
+    if state['species'] != SPECIES_CODES or state['colonies'] != COLONY_CODES:
+        raise ValueError(f"The state at {directory} was saved with different species or colony parameters.")
+    last_end = np.datetime64(state['seasons'][-1][1], 'D')
+    start, end = season if season is not None else next_season(last_end)
+    if start <= last_end:
+        raise ValueError(f"Season {start}:{end} must start after the last season, which ended {last_end}.")
+
+    bit_generator = np.random.PCG64()
+    bit_generator.state = state['rng']
+    rng = np.random.Generator(bit_generator)
+    counters = state['tag_counters']
+
+    # === New captures ===
+    columns = draw_columns(num_penguins, rng, window=(start, end))
+    tag_numbers = assign_tag_numbers(columns['species'], columns['tagged'], counters)
+    captures = columns_to_frame(columns, tag_numbers)
+
+    # === Resights of birds tagged in earlier seasons ===
+    index = load_index(directory, state, mode='r+')
+    rate = min(duplicate_rate, 1.0) * RESIGHT_SURVIVAL_RATE
+    picks = np.sort(rng.choice(len(index), size=rng.binomial(len(index), rate), replace=False)) if len(index) else np.empty(0, dtype=np.int64)
+    resight_columns = build_resight_columns(index[picks], (start, end), rng)
+    resights = columns_to_frame(resight_columns, index['tag_number'][picks])
+
+    # === Mess the season as one batch ===
+    # Species missingness draws from NumPy's global generator
+    mess_seed = int(rng.integers(0, 2**32))
+    np.random.seed(mess_seed)
+    random.seed(mess_seed)
+    messy = pd.concat([captures, resights], ignore_index=True)
+    messy = inject_mess(messy, mess_level=mess_level, rng=rng, inplace=True)
+    messy = inject_species_missingness(messy, missing_rate=species_missing_rate)
+    messy = inject_mislabeled_duplicates(messy, mislabel_rate=mislabel_rate, rng=rng)
+
+    print(f"Appending {len(captures)} new captures and {len(resights)} resights for season {start}:{end}...")
+    _append_csv(captures[COLUMNS], clean_output, compression)
+    _append_csv(messy[COLUMNS], messy_output, compression)
+
+    # === Update the index and state ===
+    if len(picks):
+        updated = index[picks]
+        updated['age'] = resight_columns['age']
+        updated['last_capture'] = resight_columns['capture_date'].astype(np.int64)
+        for column in MORPHOMETRIC_COLUMNS:
+            updated[column] = resights[column].to_numpy()
+        index[picks] = updated
+        index.flush()
+    del index
+
+    tagged = tag_numbers > 0
+    new_records = np.empty(int(tagged.sum()), dtype=INDEX_DTYPE)
+    new_records['tag_number'] = tag_numbers[tagged]
+    for field in ['species', 'colony', 'age', 'sex']:
+        new_records[field] = columns[field][tagged]
+    new_records['last_capture'] = columns['capture_date'][tagged].astype(np.int64)
+    for column in MORPHOMETRIC_COLUMNS:
+        new_records[column] = captures.loc[tagged, column].to_numpy()
+    with open(_index_path(directory), 'r+b' if state['tagged'] else 'wb') as f:
+        f.seek(state['tagged'] * INDEX_DTYPE.itemsize)
+        f.write(new_records.tobytes())
+        f.truncate()
+
+    state['tag_counters'] = counters
+    state['rng'] = rng.bit_generator.state
+    state['seasons'].append([str(start), str(end)])
+    state['tagged'] += len(new_records)
+    state['rows']['clean'] += len(captures)
+    state['rows']['messy'] += len(messy)
+    _write_state(directory, state)
+    return {'clean': len(captures), 'messy': len(messy), 'season': (start, end)}
@@ -0,0 +1,268 @@
+# dirty_birds/benchmark.py
+
+"""
+Stage-by-stage benchmark suite.
+
+Times each pipeline stage on its own at several dataset sizes. The stages are
+clean generation, ``inject_mess`` at every mess level, resight duplication,
+species missingness, mislabeled duplicates, and the clean and messy CSV
+writes. For each stage it records:
+
+- the best wall time over ``repeat`` runs;
+- rows in, rows out and rows per second;
+- the peak traced memory, from ``tracemalloc`` in a separate run so tracing
+  does not slow the timed runs.
+
+Results are written as JSON. The comparison mode checks a run against a stored
+baseline and exits non-zero when any stage slowed down by more than a
+threshold::
+
+    python -m dirty_birds.benchmark --sizes 1000 100000 --output baseline.json
+    python -m dirty_birds.benchmark --sizes 1000 100000 --baseline baseline.json --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from . import __version__
+from .config import ERROR_RATES, SEED
+from .csvio import write_csv
+from .generation import generate_penguins_columnar
+from .mess import (
+    duplicate_penguin_rows_for_resight,
+    inject_mess,
+    inject_mislabeled_duplicates,
+    inject_species_missingness,
+)
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000, 10_000_000]
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25  # Allowed slowdown as a fraction of the baseline time
+BENCHMARK_MISLABEL_RATE = 0.01
+
+# A stage builds a fresh input from the shared context (untimed), then runs
+# on it (timed). ``keep`` names the context slot its output is stored under,
+# for later stages to start from.
+Stage = namedtuple('Stage', ['name', 'prepare', 'run', 'keep'])
+
+def _write(frame, ctx, name):
+    path = os.path.join(ctx['tmpdir'], name)
+    write_csv(frame, path)
+    return frame
+
+def _stages():
+    """The benchmarked stages in pipeline order."""
+    stages = [Stage(
+        'generation',
+        lambda ctx: ctx['size'],
+        lambda size, ctx: generate_penguins_columnar(size, np.random.default_rng(ctx['seed'])),
+        'clean',
+    )]
+    for level in ERROR_RATES:
+        stages.append(Stage(
+            f'inject_mess[{level}]',
+            lambda ctx: ctx['clean'].copy(),
+            lambda df, ctx, level=level: inject_mess(df, mess_level=level, rng=np.random.default_rng(ctx['seed']), inplace=True),
+            'messy' if level == 'moderate' else None,
+        ))
+    stages += [
+        Stage(
+            'resight',
+            lambda ctx: ctx['messy'],
+            lambda df, ctx: duplicate_penguin_rows_for_resight(df, rng=np.random.default_rng(ctx['seed'])),
+            'resighted',
+        ),
+        Stage(
+            'species_missingness',
+            lambda ctx: ctx['resighted'].copy(),
+            lambda df, ctx: inject_species_missingness(df),
+            None,
+        ),
+        Stage(
+            'mislabels',
+            lambda ctx: ctx['resighted'],
+            lambda df, ctx: inject_mislabeled_duplicates(df, mislabel_rate=BENCHMARK_MISLABEL_RATE, rng=np.random.default_rng(ctx['seed'])),
+            None,
+        ),
+        Stage('write_clean_csv', lambda ctx: ctx['clean'], lambda df, ctx: _write(df, ctx, 'clean.csv'), None),
+        Stage('write_messy_csv', lambda ctx: ctx['resighted'], lambda df, ctx: _write(df, ctx, 'messy.csv'), None),
+    ]
+    return stages
+
+STAGE_NAMES = [stage.name for stage in _stages()]
+
+def _rows(value):
+    return value if isinstance(value, int) else len(value)
+
+def _time_stage(stage, ctx, repeat):
+    """Returns ``(best_seconds, rows_in, output)`` over ``repeat`` runs."""
+    best = None
+    for _ in range(repeat):
+        data = stage.prepare(ctx)
+        rows_in = _rows(data)
+        start = time.perf_counter()
+        output = stage.run(data, ctx)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows_in, output
+
+def _peak_memory(stage, ctx):
+    """Peak bytes traced by ``tracemalloc`` while the stage runs once."""
+    data = stage.prepare(ctx)
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        stage.run(data, ctx)
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, seed=SEED, stages=None,
+                   measure_memory=True, progress=None):
+    """
+    Benchmarks every stage (or the named ``stages``) at each size.
+
+    Returns a JSON-serialisable dict with run metadata and one result entry
+    per (stage, size). ``progress``, if given, is called with each entry as it
+    completes.
+    """
+    selected = set(STAGE_NAMES if stages is None else stages)
+    results = []
+    for size in sizes:
+        np.random.seed(seed)
+        random.seed(seed)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ctx = {'size': size, 'seed': seed, 'tmpdir': tmpdir}
+            for stage in _stages():
+                # Stage progress messages are not part of the measurement
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if stage.name not in selected:
+                        # Still produce the inputs later stages start from
+                        if stage.keep:
+                            ctx[stage.keep] = stage.run(stage.prepare(ctx), ctx)
+                        continue
+                    seconds, rows_in, output = _time_stage(stage, ctx, repeat)
+                    peak = _peak_memory(stage, ctx) if measure_memory else None
+                if stage.keep:
+                    ctx[stage.keep] = output
+                entry = {
+                    'stage': stage.name,
+                    'size': size,
+                    'rows_in': rows_in,
+                    'rows_out': len(output),
+                    'seconds': seconds,
+                    'rows_per_second': rows_in / seconds if seconds > 0 else None,
+                    'peak_bytes': peak,
+                }
+                results.append(entry)
+                if progress is not None:
+                    progress(entry)
+    return {'meta': _metadata(repeat, seed), 'results': results}
+
+def _metadata(repeat, seed):
+    return {
+        'dirty_birds_version': __version__,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeat': repeat,
+        'seed': seed,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+# === Comparison ===
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD, check_memory=False):
+    """
+    Compares two benchmark results and returns the regressions found.
+
+    A stage regresses when its time (or, with ``check_memory``, its peak
+    memory) exceeds the baseline by more than ``threshold`` (0.25 = 25%).
+    Entries missing from either side are ignored. Each regression is a dict
+    with the stage, size, metric, both values and the ratio.
+    """
+    previous = {(r['stage'], r['size']): r for r in baseline['results']}
+    metrics = ['seconds'] + (['peak_bytes'] if check_memory else [])
+    regressions = []
+    for entry in current['results']:
+        old = previous.get((entry['stage'], entry['size']))
+        if old is None:
+            continue
+        for metric in metrics:
+            if not old.get(metric) or entry.get(metric) is None:
+                continue
+            ratio = entry[metric] / old[metric]
+            if ratio > 1 + threshold:
+                regressions.append({
+                    'stage': entry['stage'],
+                    'size': entry['size'],
+                    'metric': metric,
+                    'baseline': old[metric],
+                    'current': entry[metric],
+                    'ratio': ratio,
+                })
+    return regressions
+
+def _print_entry(entry):
+    rate = entry['rows_per_second']
+    peak = entry['peak_bytes']
+    print(f"{entry['stage']:<26} {entry['size']:>11,} rows  {entry['seconds']:9.4f} s  "
+          f"{rate or 0:>14,.0f} rows/s  {'-' if peak is None else f'{peak / 2**20:,.1f} MiB':>12}")
+
+def main(argv=None):
+    """Command-line entry point; returns the process exit code."""
+    parser = argparse.ArgumentParser(description="Dirty Birds: per-stage pipeline benchmarks.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help=f"Dataset sizes to benchmark. Default: {' '.join(map(str, DEFAULT_SIZES))}.")
+    parser.add_argument('--stages', nargs='+', choices=STAGE_NAMES, default=None,
+                        help="Only benchmark these stages. Default: all.")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f"Timed runs per stage; the fastest is kept. Default: {DEFAULT_REPEAT}.")
+    parser.add_argument('--seed', type=int, default=SEED, help=f"Random seed. Default: {SEED}.")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Skip the extra tracemalloc run that measures peak memory.")
+    parser.add_argument('--output', type=str, default=None, help="Write the JSON results to this file.")
+    parser.add_argument('--baseline', type=str, default=None,
+                        help="Compare against this JSON result file and exit with status 1 on regressions.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Allowed slowdown relative to the baseline. Default: {DEFAULT_THRESHOLD}.")
+    parser.add_argument('--check-memory', action='store_true',
+                        help="Also fail when peak memory regresses past the threshold.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, repeat=args.repeat, seed=args.seed, stages=args.stages,
+                             measure_memory=not args.no_memory, progress=_print_entry)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved benchmark results to {args.output}.")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, threshold=args.threshold, check_memory=args.check_memory)
+        for r in regressions:
+            print(f"❌ {r['stage']} at {r['size']:,} rows: {r['metric']} {r['baseline']:.4g} -> {r['current']:.4g} ({r['ratio']:.2f}x)")
+        if regressions:
+            return 1
+        print(f"✅ No regressions beyond {args.threshold:.0%} against {args.baseline}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+# dirty_birds/cache.py
+
+"""
+Content-addressed on-disk cache of compact clean bases.
+
+A clean base is fully determined by the seed, the population size, the
+package version, the species/colony configuration and the generator code. The
+cache key is a SHA-256 hash of all of them, so changing any one gives a new
+key and stale entries are simply never read again.
+
+Entries are uncompressed ``.npz`` archives holding each compact column as a
+raw array (categorical codes with their labels, int64 dates), which load
+without any parsing. Every hit refreshes the entry's modification time, and
+storing evicts the least recently used entries once the directory exceeds
+``max_bytes``.
+
+Only the columnar engine's whole-population base is cached; it draws from
+its own ``rng`` alone, so a cached base leaves every later stage unchanged.
+"""
+
+import hashlib
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from . import __version__, config
+from .compact import COMPACT_COLUMNS, generate_penguins_compact
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'DIRTY_BIRDS_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'dirty_birds')
+)
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+ENTRY_SUFFIX = '.npz'
+
+# Modules whose source decides what a clean base contains: the columnar base
+# path and every package module it imports, plus the parameter loader
+CODE_MODULES = ['config', 'rng', 'dates', 'morphometrics', 'generation', 'compact', 'params']
+
+def code_digest():
+    """SHA-256 of the source of every module in ``CODE_MODULES``."""
+    digest = hashlib.sha256()
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in CODE_MODULES:
+        with open(os.path.join(package_dir, name + '.py'), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def config_snapshot():
+    """The generation settings of ``dirty_birds.config`` as sorted ``(name, value)`` pairs."""
+    return [(name, getattr(config, name)) for name in sorted(dir(config)) if name.isupper()]
+
+def cache_key(num_penguins, seed):
+    """The cache key of the clean base for ``num_penguins`` and ``seed``."""
+    inputs = [
+        ('num_penguins', int(num_penguins)),
+        ('seed', int(seed)),
+        ('version', __version__),
+        ('config', config_snapshot()),
+        ('code', code_digest()),
+    ]
+    # Config values are plain literals, so their repr is stable across runs
+    return hashlib.sha256(repr(inputs).encode('utf-8')).hexdigest()
+
+
+# === Entry encoding ===
+def _frame_to_arrays(frame):
+    arrays = {}
+    for column in COMPACT_COLUMNS:
+        series = frame[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            arrays[column] = series.cat.codes.to_numpy()
+            arrays[column + '.categories'] = np.array(series.cat.categories, dtype=str)
+        elif column in ('capture_date', 'date_egg'):
+            arrays[column] = series.to_numpy().view(np.int64)
+        else:
+            arrays[column] = series.to_numpy()
+    return arrays
+
+def _arrays_to_frame(arrays):
+    frame = {}
+    for column in COMPACT_COLUMNS:
+        values = arrays[column]
+        if column + '.categories' in arrays:
+            frame[column] = pd.Categorical.from_codes(values, categories=list(arrays[column + '.categories']))
+        elif column in ('capture_date', 'date_egg'):
+            frame[column] = values.view('datetime64[s]')
+        else:
+            frame[column] = values
+    return pd.DataFrame(frame, columns=COMPACT_COLUMNS)
+
+
+class BaseCache:
+    """
+    LRU-bounded directory of cached clean bases.
+
+    ``directory`` is created on first store. ``max_bytes`` caps the total size
+    of all entries; the least recently used are evicted beyond it.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive.")
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        """Path of the entry for ``key``."""
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def load(self, key):
+        """Returns the cached compact frame for ``key``, or None on a miss."""
+        path = self.path(key)
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                frame = _arrays_to_frame({name: archive[name] for name in archive.files})
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+            # Missing, partially evicted or unreadable entries are misses
+            return None
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        return frame
+
+    def store(self, key, frame):
+        """Saves a compact ``frame`` under ``key`` and evicts old entries; returns the path."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        # Write to a temporary name first so concurrent readers never see half an entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **_frame_to_arrays(frame))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.evict(keep=path)
+        return path
+
+    def entries(self):
+        """``(mtime, size, path)`` of every entry, least recently used first."""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self, keep=None):
+        """Deletes least recently used entries until the cache fits ``max_bytes``; returns their paths."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed.append(path)
+        return removed
+
+    def clear(self):
+        """Deletes every entry."""
+        for _, _, path in self.entries():
+            os.remove(path)
+
+def cached_base(num_penguins, seed, cache=None):
+    """
+    Returns ``(compact_frame, hit)`` for the clean base of ``num_penguins`` and ``seed``.
+
+    The base equals ``generate_penguins_compact(num_penguins, np.random.default_rng(seed))``.
+    With no ``cache`` it is always generated; otherwise it is loaded when
+    present and stored after generating when not.
+    """
+    if cache is not None:
+        key = cache_key(num_penguins, seed)
+        frame = cache.load(key)
+        if frame is not None:
+            return frame, True
+    frame = generate_penguins_compact(num_penguins, rng=np.random.default_rng(seed))
+    if cache is not None:
+        cache.store(key, frame)
+    return frame, False
@@ -0,0 +1,125 @@
+# dirty_birds/compact.py
+
+"""
+Compact in-memory representation of the clean population.
+
+The text schema stores every cell as a Python object: tag IDs, species names,
+ISO date strings and so on. The compact frame keeps the same 15 columns as
+typed arrays instead:
+
+- enum columns (species, colony, island, age, sex, health, study, clutch) are
+  pandas Categoricals backed by int8 codes (int16 past 127 categories);
+- ``capture_date`` and ``date_egg`` are datetime64 (NaT where no egg date);
+- bill and flipper measurements are float32 and body mass is int16 (int32
+  when the ``body_mass_g`` clip bounds need it);
+- ``tag_id`` is replaced by an int32 ``tag_number`` (0 means untagged) whose
+  prefix follows from the species code.
+
+``to_text_frame`` turns a compact frame into the text schema;
+``dirty_birds.csvio.write_csv`` calls it one chunk at a time while writing, so
+text only exists at the output boundary.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .config import (
+    AGE_GROUPS, CLIP_BOUNDS, COLONY_CODES, COLUMNS, HEALTH_LABELS, SEXES,
+    SPECIES_CODES, STUDY_END, STUDY_START,
+)
+from .dates import format_dates, years_of
+from .generation import (
+    assign_tag_numbers, draw_columns, format_tag_ids, new_tag_counters, parameter_tables,
+)
+
+COMPACT_COLUMNS = ['tag_number'] + COLUMNS[1:]
+
+STUDY_YEARS = list(range(STUDY_START.year, STUDY_END.year + 1))
+STUDY_NAMES = [f"PAPRI{year}" for year in STUDY_YEARS]
+CLUTCH_LABELS = ['Yes', 'No']
+
+# Decimal places each float column is rounded to in the text schema
+FLOAT_DECIMALS = {'bill_length_mm': 2, 'bill_depth_mm': 2, 'flipper_length_mm': 1}
+
+def _categorical(codes, categories):
+    """Wraps integer ``codes`` (-1 for missing) as a Categorical without copying labels."""
+    return pd.Categorical.from_codes(np.asarray(codes), categories=categories)
+
+def mass_dtype():
+    """The integer dtype of ``body_mass_g``: int16 while its clip bounds fit, else int32."""
+    low, high = np.rint(CLIP_BOUNDS['body_mass_g'])
+    limits = np.iinfo(np.int16)
+    return np.int16 if limits.min <= low and high <= limits.max else np.int32
+
+def columns_to_compact_frame(columns, tag_numbers):
+    """Builds the compact clean DataFrame from ``draw_columns`` output."""
+    capture_date = columns['capture_date']
+    years = years_of(capture_date)
+    clutch = columns['clutch']
+    t = parameter_tables()
+
+    frame = {
+        'tag_number': np.asarray(tag_numbers, dtype=np.int32),
+        'species': _categorical(columns['species'], SPECIES_CODES),
+        'bill_length_mm': np.round(columns['bill_length_mm'], 2).astype(np.float32),
+        'bill_depth_mm': np.round(columns['bill_depth_mm'], 2).astype(np.float32),
+        'flipper_length_mm': np.round(columns['flipper_length_mm'], 1).astype(np.float32),
+        'body_mass_g': np.rint(columns['body_mass_g']).astype(mass_dtype()),
+        'age_group': _categorical(columns['age'], AGE_GROUPS),
+        # Sex code 0 ("not sexed") becomes a missing category
+        'sex': _categorical(columns['sex'] - 1, SEXES),
+        'colony_id': _categorical(columns['colony'], COLONY_CODES),
+        'island': _categorical(t['island_code'][columns['colony']], t['islands']),
+        'capture_date': capture_date.astype('datetime64[s]'),
+        'health_status': _categorical(columns['health'], HEALTH_LABELS),
+        'study_name': _categorical(years - STUDY_YEARS[0], STUDY_NAMES),
+        'clutch_completion': _categorical(np.where(clutch, 0, 1), CLUTCH_LABELS),
+        'date_egg': np.where(clutch, columns['egg_date'], np.datetime64('NaT')).astype('datetime64[s]'),
+    }
+    return pd.DataFrame(frame, columns=COMPACT_COLUMNS)
+
+def generate_penguins_compact(num_penguins, rng, tag_counters=None, layout_rng=None):
+    """
+    Generates the clean population as a compact frame.
+
+    Takes the same draws as ``generate_penguins_columnar``, so
+    ``to_text_frame(generate_penguins_compact(n, rng))`` equals
+    ``generate_penguins_columnar(n, rng)`` for an identically seeded ``rng``.
+    """
+    if tag_counters is None:
+        tag_counters = new_tag_counters()
+    columns = draw_columns(num_penguins, rng, layout_rng=layout_rng)
+    tag_numbers = assign_tag_numbers(columns['species'], columns['tagged'], tag_counters)
+    return columns_to_compact_frame(columns, tag_numbers)
+
+def is_compact(df):
+    """True if ``df`` is a compact frame rather than the text schema."""
+    return 'tag_number' in df.columns
+
+def _labels(series):
+    """Returns a Categorical's labels as an object array, with None for missing codes."""
+    lookup = np.array(list(series.cat.categories) + [None], dtype=object)
+    # Missing values have code -1, which picks the trailing None
+    return lookup[series.cat.codes.to_numpy()]
+
+def to_text_frame(compact):
+    """Converts a compact frame to the text schema written to CSV."""
+    species = compact['species'].cat.codes.to_numpy()
+    date_egg = compact['date_egg'].to_numpy().astype('datetime64[D]')
+    has_egg = ~np.isnat(date_egg)
+    egg_text = np.full(len(compact), np.nan, dtype=object)
+    egg_text[has_egg] = format_dates(date_egg[has_egg])
+
+    frame = {
+        'tag_id': format_tag_ids(species, compact['tag_number'].to_numpy()),
+        'capture_date': format_dates(compact['capture_date'].to_numpy().astype('datetime64[D]')),
+        'body_mass_g': compact['body_mass_g'].to_numpy().astype(np.int64),
+        'date_egg': egg_text,
+    }
+    for column, decimals in FLOAT_DECIMALS.items():
+        # Rounding again recovers the exact float64 the text schema holds
+        frame[column] = np.round(compact[column].to_numpy().astype(np.float64), decimals)
+    for column in COLUMNS:
+        if column not in frame:
+            frame[column] = _labels(compact[column])
+    return pd.DataFrame(frame, columns=COLUMNS, index=compact.index)
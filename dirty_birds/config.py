@@ -0,0 +1,104 @@
+# dirty_birds/config.py
+
+"""
+Static configuration for the Dirty Birds penguin generator.
+
+The per-row lookup tables that used to be rebuilt inside the generation loop
+(colony weights, colony stress, species fragility bands, clutch probabilities,
+tag prefixes and mass factors) live here so every engine shares one copy.
+"""
+
+from datetime import datetime
+
+# === Configuration ===
+SEED = 42
+N_PENGUINS = 4500
+TAGGED_PERCENTAGE = 0.65
+COLONIES = {
+    'Biscoe West': 'Biscoe',
+    'Dream South': 'Dream',
+    'Torgersen North': 'Torgersen',
+    'Cormorant East': 'Cormorant',
+    'Shortcut Point': 'Shortcut'
+}
+SPECIES_INFO = {
+    'Adelie': {'bill_mean': 38.8, 'bill_sd': 2.7, 'bill_depth_mean': 18.4, 'bill_depth_sd': 1.5, 'flipper_mean': 190, 'flipper_sd': 6.5, 'mass_mean': 3700, 'mass_sd': 300},
+    'Chinstrap': {'bill_mean': 48.8, 'bill_sd': 3.3, 'bill_depth_mean': 18.5, 'bill_depth_sd': 1.6, 'flipper_mean': 196, 'flipper_sd': 7, 'mass_mean': 3700, 'mass_sd': 320},
+    'Gentoo': {'bill_mean': 47.5, 'bill_sd': 3.0, 'bill_depth_mean': 14.8, 'bill_depth_sd': 1.2, 'flipper_mean': 217, 'flipper_sd': 6, 'mass_mean': 5000, 'mass_sd': 400}
+}
+# Within-species correlations of bill length, bill depth, flipper length and
+# body mass, in that order, after the Palmer Station measurements. Used only
+# by the 'correlated' morphometrics sampler (see dirty_birds.morphometrics).
+MORPHOMETRIC_CORRELATION = {
+    'Adelie': [[1.0, 0.39, 0.33, 0.55], [0.39, 1.0, 0.31, 0.58], [0.33, 0.31, 1.0, 0.47], [0.55, 0.58, 0.47, 1.0]],
+    'Chinstrap': [[1.0, 0.65, 0.47, 0.51], [0.65, 1.0, 0.58, 0.60], [0.47, 0.58, 1.0, 0.64], [0.51, 0.60, 0.64, 1.0]],
+    'Gentoo': [[1.0, 0.64, 0.66, 0.67], [0.64, 1.0, 0.71, 0.72], [0.66, 0.71, 1.0, 0.70], [0.67, 0.72, 0.70, 1.0]],
+}
+# 'independent' draws each measurement on its own, as earlier releases did
+MORPHOMETRICS = 'independent'
+AGE_GROUPS = ['Chick', 'Juvenile', 'Adult']
+AGE_GROUP_WEIGHTS = [0.1, 0.2, 0.7]
+SEXES = ['Male', 'Female']
+
+# Weighted colony sampling to reflect ecological weights
+COLONY_WEIGHTS = {
+    'Torgersen North': 30,
+    'Dream South': 25,
+    'Biscoe West': 20,
+    'Cormorant East': 15,
+    'Shortcut Point': 10
+}
+# Field stress adjustments by colony
+COLONY_STRESS = {
+    'Torgersen North': 0.0,
+    'Dream South': 0.05,
+    'Biscoe West': 0.1,
+    'Cormorant East': 0.15,
+    'Shortcut Point': 0.2
+}
+# Species fragility modifiers
+SPECIES_BAND = {
+    'Adelie': 0.20,
+    'Chinstrap': 0.15,
+    'Gentoo': 0.25
+}
+CLUTCH_PROBS = {"Adelie": 0.9, "Chinstrap": 0.85, "Gentoo": 0.8}
+TAG_PREFIXES = {'Adelie': 'ADE', 'Chinstrap': 'CHN', 'Gentoo': 'GEN'}
+
+AGE_MASS_FACTOR = {'Chick': 0.6, 'Juvenile': 0.8, 'Adult': 1.0}
+SEX_MASS_FACTOR = {"Male": 1.05, "Female": 0.95, None: 1.0}
+
+# Health labels, in the order used for field mislabeling noise
+HEALTH_LABELS = ['Unwell', 'Critically Ill', 'Healthy', 'Underweight', 'Overweight']
+HEALTH_NOISE_RATE = 0.07
+
+# Morphometric clipping bounds
+CLIP_BOUNDS = {
+    'bill_length_mm': (32, 60),
+    'bill_depth_mm': (13, 21),
+    'flipper_length_mm': (170, 230),
+    'body_mass_g': (2500, 6500),
+}
+
+# Field season window
+STUDY_START = datetime(2019, 10, 1)
+STUDY_END = datetime(2024, 12, 31)
+# Months in which birds are captured (see dirty_birds.dates.set_field_months)
+FIELD_MONTHS = list(range(1, 13))
+
+# Integer codes used by the columnar engines. Each enum column is stored as an
+# index into one of these lists until it is converted to text.
+SPECIES_CODES = list(SPECIES_INFO.keys())
+COLONY_CODES = list(COLONIES.keys())
+SEX_CODES = [None] + SEXES  # code 0 means "not sexed"
+
+# Cell-level error rate for each mess level
+ERROR_RATES = {'light': 0.03, 'moderate': 0.08, 'heavy': 0.15}
+
+# Output schema, in column order
+COLUMNS = [
+    'tag_id', 'species', 'bill_length_mm', 'bill_depth_mm',
+    'flipper_length_mm', 'body_mass_g', 'age_group', 'sex',
+    'colony_id', 'island', 'capture_date', 'health_status',
+    'study_name', 'clutch_completion', 'date_egg'
+]
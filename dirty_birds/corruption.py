@@ -0,0 +1,241 @@
+# dirty_birds/corruption.py
+
+"""
+Declarative corruption plans for the messy dataset.
+
+A plan maps column -> corruption type -> rate, for example::
+
+    {'sex': {'replace': 0.08}, 'body_mass_g': {'missing': 0.08, 'outlier': 0.06}}
+
+Affected rows are chosen sparsely with geometric skip sampling, so each
+(column, corruption) pair costs time and memory proportional to the number of
+cells it corrupts instead of allocating a full-length mask. All edits for a
+column are merged and written back in one bulk assignment.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .rng import as_generator
+
+# === Vocabularies ===
+NAN_COLUMNS = [
+    'bill_length_mm', 'bill_depth_mm', 'flipper_length_mm', 'body_mass_g',
+    'study_name', 'clutch_completion', 'health_status', 'capture_date',
+    'colony_id', 'island'
+]
+REPLACEMENT_VOCABULARIES = {
+    'sex': ['M', 'F', '', None, 'Unknown', '?', 'N/A'],
+    'colony_id': ['Torgersen', 'Dream Island', 'Biscoe', 'Cormorant', 'Unknown', 'dream', 'biscoe 2', 'torgersen SE', 'cormorant NW', '/Shortcut', 'invalid_colony', 'TORGERSEN 4', ' short point', 'dream island'],
+    'island': ['bisco', 'dreamland', 'torg', 'cormor', 'short cut', 'unknown', '', None],
+    'health_status': ['Healthy', 'Unwell', 'Critically Ill', 'critcal ill', 'under weight', 'Overwight', 'ok', 'N/A', '', None],
+    'age_group': ['Chick', 'Juvenile', 'Adult', 'chik', 'juvenille', 'ADLT', 'unk', '', None],
+    'study_name': ['PAPRI20X9', 'PAPR12021', 'PAPR2023', 'papri2024', '', None, 'N/A', 'STUDY_2022', 'PP2020'],
+}
+TYPO_MAPS = {
+    'species': {'Adelie': 'adeleie', 'Chisntrap': 'chisntrap', 'Gentoo': 'Gentto'},
+}
+OUTLIER_CONFIG = {
+    'bill_length_mm':    {'spread': 0.12, 'clip': (32, 60)},
+    'bill_depth_mm':     {'spread': 0.10, 'clip': (13, 21)},
+    'flipper_length_mm': {'spread': 0.08, 'clip': (170, 230)},
+    'body_mass_g':       {'spread': 0.12, 'clip': (2500, 6500)},
+}
+OUTLIER_RATE_FACTOR = 0.75  # Outliers apply to a fraction of the error rate
+
+# Bit position of every (column, corruption type) pair in a ground-truth
+# corruption mask (see ``dirty_birds.truth``); 24 of the 32 bits are used.
+CORRUPTION_BITS = (
+    [(col, 'missing') for col in NAN_COLUMNS]
+    + [('tag_id', 'missing'), ('species', 'missing'), ('species', 'typo')]
+    + [(col, 'replace') for col in REPLACEMENT_VOCABULARIES]
+    + [('capture_date', 'bad_date')]
+    + [(col, 'outlier') for col in OUTLIER_CONFIG]
+)
+_BIT_INDEX = {pair: i for i, pair in enumerate(CORRUPTION_BITS)}
+
+def corruption_bit(column, kind):
+    """The uint32 mask bit recording a ``kind`` corruption of ``column``."""
+    try:
+        return np.uint32(1 << _BIT_INDEX[(column, kind)])
+    except KeyError:
+        raise KeyError(f"No ground-truth bit for '{kind}' corruption of '{column}'.") from None
+
+def _bad_date_vocabularies():
+    """
+    Enumerates every bad date the field-entry error model can produce, per error type.
+
+    Each type draws its parts uniformly, so sampling a type and then a uniform
+    entry from its vocabulary matches the original one-at-a-time f-string draws.
+    """
+    days = [f"{d:02d}" for d in range(1, 29)]
+    months = [f"{m:02d}" for m in range(1, 13)]
+    years = [str(y) for y in range(2019, 2025)]
+    return {
+        'swap': np.array([f"{d}-{m}-{y}" for d in days for m in months for y in years], dtype=object),
+        'missing_digit': np.array([f"{y}-{m}-{d}" for y in ['202', '2024'] for m in months for d in days], dtype=object),
+        'typo': np.array([f"2024-{m}-{d}" for m in ['00', '13', '99'] for d in days], dtype=object),
+        'nonsense': np.array(['not-a-date', '9999-99-99', 'error'], dtype=object),
+    }
+
+BAD_DATES = _bad_date_vocabularies()
+
+
+# === Plans ===
+def default_corruption_plan(error_rate):
+    """Returns the corruption plan ``inject_mess`` applies at ``error_rate``."""
+    plan = {col: {'missing': error_rate} for col in NAN_COLUMNS}
+    for col in ['sex', 'species', 'colony_id', 'island', 'health_status', 'age_group', 'study_name']:
+        kind = 'typo' if col in TYPO_MAPS else 'replace'
+        plan.setdefault(col, {})[kind] = error_rate
+    # Half of the selected tags are lost
+    plan['tag_id'] = {'missing': error_rate * 0.5}
+    plan['capture_date']['bad_date'] = error_rate
+    for col in OUTLIER_CONFIG:
+        plan[col]['outlier'] = error_rate * OUTLIER_RATE_FACTOR
+    return plan
+
+def sample_rows(n, rate, rng):
+    """
+    Selects each of ``n`` rows independently with probability ``rate``.
+
+    Uses geometric skip sampling: the gaps between selected rows are drawn
+    directly, so only the selected indices are ever materialised. Returns a
+    sorted int64 array.
+    """
+    if n == 0 or rate <= 0:
+        return np.empty(0, dtype=np.int64)
+    if rate >= 1:
+        return np.arange(n, dtype=np.int64)
+
+    chunks = []
+    position = -1
+    remaining = n * rate
+    while True:
+        batch = int(remaining + 4 * np.sqrt(remaining) + 16)
+        indices = position + np.cumsum(rng.geometric(rate, size=batch))
+        if indices[-1] >= n:
+            chunks.append(indices[indices < n])
+            break
+        chunks.append(indices)
+        position = indices[-1]
+        remaining = (n - position) * rate
+    return np.concatenate(chunks).astype(np.int64)
+
+
+# === Corruption types ===
+# Each takes the current values at the selected rows and returns their replacements.
+def _missing(column, current, rng):
+    return np.full(len(current), np.nan, dtype=current.dtype)
+
+def _replace(column, current, rng):
+    vocabulary = np.array(REPLACEMENT_VOCABULARIES[column], dtype=object)
+    return vocabulary[rng.integers(0, len(vocabulary), size=len(current))]
+
+def _typo(column, current, rng):
+    return pd.Series(current, dtype=object).replace(TYPO_MAPS[column]).to_numpy(dtype=object)
+
+def _bad_date(column, current, rng):
+    kinds = list(BAD_DATES.values())
+    # Full-length draws (type, then entry within the type) keep each cell's
+    # value a function of its own draws only.
+    choice = rng.integers(0, len(kinds), size=len(current))
+    entry = rng.random(len(current))
+    values = np.empty(len(current), dtype=object)
+    for code, vocabulary in enumerate(kinds):
+        mask = choice == code
+        values[mask] = vocabulary[(entry[mask] * len(vocabulary)).astype(np.int64)]
+    return values
+
+def _outlier(column, current, rng):
+    config = OUTLIER_CONFIG[column]
+    factors = rng.normal(1, config['spread'], size=len(current))
+    # Missing values stay missing
+    return np.clip(current.astype(float) * factors, *config['clip'])
+
+CORRUPTIONS = {
+    'missing': _missing,
+    'replace': _replace,
+    'typo': _typo,
+    'bad_date': _bad_date,
+    'outlier': _outlier,
+}
+
+def changed_cells(before, after):
+    """True where ``after`` differs from ``before``; two missing values count as equal."""
+    missing = pd.isna(before)
+    both_missing = missing & pd.isna(after)
+    equal = np.zeros(len(before), dtype=bool)
+    present = ~missing
+    equal[present] = before[present] == after[present]
+    return ~(equal | both_missing)
+
+def _merge_edits(positions, values, new_positions, new_values):
+    """Merges a step's edits into the pending edits for a column; later steps win."""
+    positions = np.concatenate([positions, new_positions])
+    values = np.concatenate([values, new_values])
+    # np.unique keeps the first occurrence, so search the reversed arrays
+    unique, first = np.unique(positions[::-1], return_index=True)
+    return unique, values[::-1][first]
+
+class SparseSelector:
+    """Chooses corrupted rows by geometric skip sampling from one sequential Generator."""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def rows(self, column, kind, rate, n):
+        return sample_rows(n, rate, self.rng)
+
+    def draws(self, column, kind, rows):
+        return self.rng
+
+def apply_corruption_plan(df, plan, rng=None, inplace=False, selector=None, truth=None):
+    """
+    Applies a column -> corruption type -> rate plan to ``df``.
+
+    Steps for a column run in plan order and see the edits of earlier steps.
+    Returns the corrupted frame (``df`` itself when ``inplace`` is True).
+    ``selector`` decides which rows each step hits and supplies the random
+    draws for their new values; it defaults to a ``SparseSelector`` over ``rng``.
+    ``truth``, a uint32 array with one entry per row, gets the
+    ``corruption_bit`` of every step that changes a cell of that row.
+    """
+    if selector is None:
+        selector = SparseSelector(as_generator(rng))
+    df_messy = df if inplace else df.copy()
+    n = len(df_messy)
+
+    for column, steps in plan.items():
+        if column not in df_messy.columns:
+            raise KeyError(f"Corruption plan references unknown column '{column}'.")
+        base = df_messy[column].to_numpy()
+        numeric = base.dtype.kind in 'fiu'
+        edit_dtype = float if numeric else object
+        positions = np.empty(0, dtype=np.int64)
+        values = np.empty(0, dtype=edit_dtype)
+
+        for kind, rate in steps.items():
+            if kind not in CORRUPTIONS:
+                raise ValueError(f"Unknown corruption type '{kind}'. Choose from {sorted(CORRUPTIONS)}.")
+            rows = selector.rows(column, kind, rate, n)
+            if len(rows) == 0:
+                continue
+            # Current values at the selected rows, including earlier edits
+            current = base[rows].astype(edit_dtype)
+            hit = np.searchsorted(positions, rows)
+            found = hit < len(positions)
+            found[found] = positions[hit[found]] == rows[found]
+            current[found] = values[hit[found]]
+            draws = selector.draws(column, kind, rows)
+            new_values = np.asarray(CORRUPTIONS[kind](column, current, draws), dtype=edit_dtype)
+            if truth is not None:
+                truth[rows[changed_cells(current, new_values)]] |= corruption_bit(column, kind)
+            positions, values = _merge_edits(positions, values, rows, new_values)
+
+        if len(positions):
+            if base.dtype.kind in 'iu':
+                df_messy[column] = df_messy[column].astype(float)
+            df_messy.iloc[positions, df_messy.columns.get_loc(column)] = values
+
+    return df_messy
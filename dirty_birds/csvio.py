@@ -0,0 +1,158 @@
+# dirty_birds/csvio.py
+
+"""
+Parallel chunked CSV writing with optional stdlib compression.
+
+``write_csv`` cuts a frame into row chunks and formats them in worker
+processes. Formatting is the slow part of writing. The chunks come back in
+order and are appended to the output, so the file is identical to a single
+``DataFrame.to_csv(index=False)``.
+
+With gzip, bz2 or xz compression each chunk is compressed on its own as an
+independent member (gzip/bz2) or stream (xz). Concatenated members form a
+valid file for the standard tools, and a file can be decompressed in parallel
+by splitting at member boundaries. ``MemberWriter`` applies the same
+block-wise compression to writers that produce text incrementally, such as
+the streaming and sharded modes.
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .compact import is_compact, to_text_frame
+from .params import generation_settings, use_generation_settings
+
+COMPRESSIONS = ['infer', 'none', 'gzip', 'bz2', 'xz']
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}
+
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_BLOCK_BYTES = 16 * 1024 * 1024  # Uncompressed bytes per MemberWriter member
+
+def resolve_compression(path, compression='infer'):
+    """Returns the compression to use for ``path``: 'none', 'gzip', 'bz2' or 'xz'."""
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}'. Choose from {COMPRESSIONS}.")
+    if compression != 'infer':
+        return compression
+    ext = os.path.splitext(str(path))[1].lower()
+    return COMPRESSION_EXTENSIONS.get(ext, 'none')
+
+def compress_member(data, compression):
+    """Compresses ``data`` (bytes) as one self-contained member."""
+    if compression == 'none':
+        return data
+    if compression == 'gzip':
+        # A fixed mtime keeps output byte-reproducible
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if compression == 'bz2':
+        return bz2.compress(data)
+    if compression == 'xz':
+        return lzma.compress(data)
+    raise ValueError(f"Unknown compression '{compression}'.")
+
+def ordered_map(executor, fn, tasks, window):
+    """Like ``executor.map`` but keeps at most ``window`` tasks in flight."""
+    pending = deque()
+    tasks = iter(tasks)
+    for task in tasks:
+        pending.append(executor.submit(fn, task))
+        if len(pending) >= window:
+            break
+    while pending:
+        yield pending.popleft().result()
+        for task in tasks:
+            pending.append(executor.submit(fn, task))
+            break
+
+
+# === Incremental writer ===
+class MemberWriter:
+    """
+    Text file object that compresses every ``block_bytes`` of output as its own member.
+
+    Accepts ``write(str)`` calls of any size, so it can be handed to
+    ``DataFrame.to_csv`` or ``shutil.copyfileobj``. With ``append`` the
+    members are added after an existing file's.
+    """
+
+    def __init__(self, path, compression, block_bytes=DEFAULT_BLOCK_BYTES, append=False):
+        self.compression = compression
+        self.block_bytes = block_bytes
+        self._file = open(path, 'ab' if append else 'wb')
+        self._pending = []
+        self._size = 0
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self._pending.append(data)
+        self._size += len(data)
+        if self._size >= self.block_bytes:
+            self._flush_block()
+        return len(text)
+
+    def _flush_block(self):
+        if self._pending:
+            self._file.write(compress_member(b''.join(self._pending), self.compression))
+            self._pending = []
+            self._size = 0
+
+    def close(self):
+        if not self._file.closed:
+            self._flush_block()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def open_csv_output(path, compression='infer', append=False):
+    """Opens ``path`` for CSV text, compressing block-wise when a compression applies."""
+    compression = resolve_compression(path, compression)
+    if compression == 'none':
+        return open(path, 'a' if append else 'w', newline='')
+    return MemberWriter(path, compression, append=append)
+
+
+# === Parallel writer ===
+def format_csv_chunk(task):
+    """Formats (and compresses) one chunk; compact frames are converted to text first."""
+    frame, header, compression = task
+    if is_compact(frame):
+        frame = to_text_frame(frame)
+    return compress_member(frame.to_csv(header=header, index=False).encode('utf-8'), compression)
+
+def write_csv(df, path, workers=1, chunk_rows=DEFAULT_CHUNK_ROWS, compression='infer'):
+    """
+    Writes ``df`` as CSV, formatting ``chunk_rows`` rows per task across ``workers`` processes.
+
+    ``df`` may be a text-schema or compact frame. ``compression`` is 'infer'
+    (from the extension of ``path``), 'none', 'gzip', 'bz2' or 'xz'. The
+    decompressed content equals ``to_csv(index=False)`` of the text frame.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1.")
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be a positive integer.")
+    compression = resolve_compression(path, compression)
+    starts = range(0, max(len(df), 1), chunk_rows)
+    tasks = ((df.iloc[start:start + chunk_rows], start == 0, compression) for start in starts)
+
+    # Tag prefixes come from the parameters, which workers must share
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=use_generation_settings, initargs=(generation_settings(),),
+    ) if workers > 1 else None
+    try:
+        chunks = ordered_map(executor, format_csv_chunk, tasks, 2 * workers) if executor else map(format_csv_chunk, tasks)
+        with open(path, 'wb') as out:
+            for chunk in chunks:
+                out.write(chunk)
+    finally:
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,240 @@
+# dirty_birds/dates.py
+
+"""
+Vectorized date handling for capture, egg and resight dates.
+
+Dates are datetime64[D] arrays from the first draw to the writer:
+
+- capture dates are day offsets into the field days of a window: the days
+  between its start and end (inclusive) whose month is in ``FIELD_MONTHS``;
+- egg dates are capture dates minus a lag, kept on or after the window start;
+- resight dates are capture dates shifted 1-3 years and capped at the study
+  end, then moved onto a field day (see ``snap_to_field_days``);
+- ISO strings are produced in bulk with ``format_dates`` only when a text
+  frame is built, and parsed back in bulk with ``parse_capture_dates``.
+
+``FIELD_MONTHS`` in ``dirty_birds.config`` lists the months in which birds are
+captured; every month by default. ``set_field_months`` restricts it, for
+example to the austral summer, ``parse_months('10-3')``. The field days of a
+window are computed once and every draw is a gather into them, so a
+restricted season costs nothing per row. With every month allowed the draws
+are the same as plain offsets from the window start.
+
+Appended seasons (see ``dirty_birds.append``) default to the austral summer
+between ``SEASON_START`` and ``SEASON_END``.
+"""
+
+import functools
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from . import config
+
+# Appended field seasons run through the austral summer, October to March
+SEASON_START = (10, 1)
+SEASON_END = (3, 31)
+
+EGG_LAG_DAYS = 14  # Eggs are laid up to two weeks before capture
+RESIGHT_SHIFT_DAYS = (365, 365 * 3)  # Resights come 1-3 years after the capture
+RESIGHT_CAP_DAYS = (1, 60)  # Shifts past the study end land in its last two months
+
+# === Windows ===
+def study_window():
+    """The default capture window as a ``(start, end)`` pair of inclusive datetime64[D] dates."""
+    return np.datetime64(config.STUDY_START.date(), 'D'), np.datetime64(config.STUDY_END.date(), 'D')
+
+def parse_months(text):
+    """
+    Parses a month list such as ``'10-3'`` (October to March, wrapping the year) or ``'1,2,12'``.
+
+    Returns the month numbers in calendar order.
+    """
+    months = set()
+    try:
+        for part in str(text).split(','):
+            first, _, last = part.strip().partition('-')
+            first, last = int(first), int(last or first)
+            if not (1 <= first <= 12 and 1 <= last <= 12):
+                raise ValueError
+            span = (last - first) % 12 + 1
+            months.update((first - 1 + i) % 12 + 1 for i in range(span))
+    except ValueError:
+        raise ValueError(f"Invalid months '{text}'. Use month numbers 1-12, e.g. '10-3' or '11,12,1'.") from None
+    return sorted(months)
+
+def set_field_months(months):
+    """Restricts capture dates to ``months`` (month numbers, or text for ``parse_months``)."""
+    if isinstance(months, str):
+        months = parse_months(months)
+    months = sorted(set(int(m) for m in months))
+    if not months or not all(1 <= m <= 12 for m in months):
+        raise ValueError("Field months must be a non-empty set of month numbers 1-12.")
+    config.FIELD_MONTHS[:] = months
+
+def months_of(dates):
+    """Month numbers (1-12) of a datetime64 array."""
+    return dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+
+def years_of(dates):
+    """Calendar years of a datetime64 array."""
+    return dates.astype('datetime64[Y]').astype(np.int64) + 1970
+
+@functools.lru_cache(maxsize=64)
+def _field_days(start, end, months):
+    days = np.arange(start, end + np.timedelta64(1, 'D'), dtype='datetime64[D]')
+    if len(months) < 12:
+        days = days[np.isin(months_of(days), months)]
+    if not len(days):
+        raise ValueError(f"The window {start}:{end} has no days in the field months {list(months)}.")
+    days.flags.writeable = False
+    return days
+
+def field_days(window=None):
+    """The sorted field days of ``window`` (by default the study window), as a read-only array."""
+    start, end = study_window() if window is None else window
+    return _field_days(np.datetime64(start, 'D'), np.datetime64(end, 'D'), tuple(config.FIELD_MONTHS))
+
+def snap_to_field_days(dates, window=None):
+    """
+    Moves each date inside ``window`` that is not a field day onto one.
+
+    A date in the gap after a run of field days (the off-season) is folded
+    back into that run at the same relative position, so off-season dates
+    spread over the season before instead of piling up on its last day.
+    Dates before the first field day move to it. Dates outside the window,
+    such as corrupted ones, and NaT are left as they are. With every month
+    allowed this returns the dates unchanged.
+    """
+    start, end = study_window() if window is None else window
+    days = field_days((start, end))
+    one_day = np.timedelta64(1, 'D')
+    inside = np.flatnonzero((dates >= start) & (dates <= end))
+    values = dates[inside]
+    i = np.searchsorted(days, values, side='right') - 1
+    off = (i < 0) | (days[np.maximum(i, 0)] != values)
+    if not off.any():
+        return dates
+
+    # First index of the run of consecutive field days each day belongs to
+    run_start = np.zeros(len(days), dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(days) > one_day) + 1
+    run_start[breaks] = breaks
+    run_start = np.maximum.accumulate(run_start)
+
+    snapped = dates.copy()
+    before = off & (i < 0)
+    snapped[inside[before]] = days[0]
+    gap = off & (i >= 0)
+    last = i[gap]
+    next_day = np.where(last + 1 < len(days), days[np.minimum(last + 1, len(days) - 1)], end + one_day)
+    position = (values[gap] - days[last]) / (next_day - days[last])
+    first = run_start[last]
+    run_length = last - first + 1
+    snapped[inside[gap]] = days[first + np.floor(position * run_length).astype(np.int64)]
+    return snapped
+
+
+# === Draws ===
+def draw_capture_dates(n, rng, window=None):
+    """Draws ``n`` capture dates uniformly over the field days of ``window``."""
+    days = field_days(window)
+    return days[rng.integers(0, len(days), size=n)]
+
+def egg_dates(capture_date, lag_days, start):
+    """Egg dates ``lag_days`` before each capture, falling back to the capture date before ``start``."""
+    egg_date = capture_date - lag_days.astype('timedelta64[D]')
+    return np.where(egg_date < start, capture_date, egg_date)
+
+def cap_dates(dates, end, back_days):
+    """Replaces dates after ``end`` with ``end`` minus the matching ``back_days``."""
+    return np.where(dates > end, end - back_days.astype('timedelta64[D]'), dates)
+
+def shift_resight_dates(original, rng, window=None):
+    """
+    Shifts capture dates forward 1-3 years for their resight, capping at the window end.
+
+    Draws the shifts for every row, then the cap offsets only for the rows
+    past the end. NaT dates stay NaT. Results are moved onto field days.
+    """
+    window = study_window() if window is None else window
+    end = window[1]
+    shifted = original + rng.integers(RESIGHT_SHIFT_DAYS[0], RESIGHT_SHIFT_DAYS[1] + 1,
+                                      size=len(original)).astype('timedelta64[D]')
+    over = shifted > end
+    shifted[over] = end - rng.integers(RESIGHT_CAP_DAYS[0], RESIGHT_CAP_DAYS[1] + 1,
+                                       size=int(over.sum())).astype('timedelta64[D]')
+    return snap_to_field_days(shifted, window)
+
+
+# === Text ===
+def format_dates(dates):
+    """Formats a datetime64[D] array as ISO ``YYYY-MM-DD`` strings."""
+    return np.datetime_as_string(dates, unit='D').astype(object)
+
+@functools.lru_cache(maxsize=65536)
+def _parse_one_date(value):
+    """
+    Parses a single capture_date the way the field resight logic always has.
+
+    Memoised: corrupted dates come from a small vocabulary, so repeated chunks
+    and resight batches mostly hit the cache.
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return pd.to_datetime(value, errors='coerce', dayfirst=True)
+    except Exception:
+        return pd.NaT
+
+def parse_capture_dates(values, iso_first=False):
+    """
+    Parses a column of capture_date strings to datetime64[D], NaT where unparseable.
+
+    Values are read the way the field resight logic always has, day-first,
+    so an ISO date whose day could be a month (``2023-11-05``) is read as
+    2023-05-11. Zero-padded ISO dates that read the same either way (a day
+    above 12, or equal to the month) are parsed in one vectorized pass;
+    everything else, including non-padded dates such as ``2024-05-3``, goes
+    through the day-first parser once per distinct value, so cost scales
+    with the number of unique such strings rather than rows.
+
+    With ``iso_first`` every zero-padded ISO date is read year-month-day
+    instead, and only the remaining values are read day-first.
+    """
+    values = pd.Series(values, dtype=object).reset_index(drop=True)
+    parsed = pd.to_datetime(values, format='%Y-%m-%d', errors='coerce')
+    # A format match of ten characters is zero-padded YYYY-MM-DD
+    parsed[values.astype(str).str.len().ne(10)] = pd.NaT
+    if not iso_first:
+        day = parsed.dt.day
+        parsed[(day <= 12) & (day != parsed.dt.month)] = pd.NaT
+    leftover = parsed.isna() & values.notna()
+    if leftover.any():
+        lookup = {value: _parse_one_date(value) for value in pd.unique(values[leftover])}
+        parsed = parsed.astype(object)
+        parsed[leftover] = values[leftover].map(lookup)
+        parsed = pd.to_datetime(parsed, errors='coerce')
+    return parsed.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+
+
+# === Seasons ===
+def parse_season(text):
+    """Parses ``'YYYY-MM-DD:YYYY-MM-DD'`` into an inclusive datetime64[D] pair."""
+    try:
+        start, end = (np.datetime64(part.strip(), 'D') for part in text.split(':'))
+    except ValueError:
+        raise ValueError(f"Invalid season '{text}'. Expected START:END as YYYY-MM-DD:YYYY-MM-DD.") from None
+    if end < start:
+        raise ValueError(f"Invalid season '{text}': the end is before the start.")
+    return start, end
+
+def next_season(after):
+    """The first austral-summer field season starting after the datetime64[D] date ``after``."""
+    year = int(str(after)[:4])
+    start = np.datetime64(f"{year}-{SEASON_START[0]:02d}-{SEASON_START[1]:02d}", 'D')
+    if start <= after:
+        year += 1
+        start = np.datetime64(f"{year}-{SEASON_START[0]:02d}-{SEASON_START[1]:02d}", 'D')
+    return start, np.datetime64(f"{year + 1}-{SEASON_END[0]:02d}-{SEASON_END[1]:02d}", 'D')
@@ -0,0 +1,218 @@
+# dirty_birds/feed.py
+
+"""
+Rate-controlled replay of the dataset as a live event feed.
+
+``run_feed`` replays the messy records as a time-ordered stream of capture
+and resight events (see ``iter_batches(kind='events')``) for load-testing
+intake services. Events go out in ``event_date`` order, and each carries its
+record plus ``event``, ``event_date`` and a ``sequence`` number.
+
+Pacing:
+
+- ``rate`` caps the feed at that many events per second;
+- ``compression`` spaces events by their dates instead, with ``compression``
+  simulated seconds passing per real second (86400 replays a day a second);
+- ``jitter`` delays each event by a uniform random 0 to ``jitter`` seconds.
+
+With both ``rate`` and ``compression`` an event waits for whichever is later.
+Events that are due are sent together, so high rates are not limited by
+timer resolution.
+
+Sinks are an async callback, a TCP or Unix socket, or stdout; see
+``open_sink``. Generation, date sorting and serialisation run in worker
+threads ahead of the emitter and hand over ready-to-send slices through a
+bounded queue, so the emitter only waits on the clock and the sink.
+
+The events of the whole run must be known before the first one can be sent
+in date order, so the feed replays a finite ``num_penguins`` run.
+"""
+
+import asyncio
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .api import DEFAULT_BATCH_SIZE, iter_batches
+from .config import N_PENGUINS, SEED
+from .dates import format_dates
+
+DEFAULT_RATE = 1000.0
+DEFAULT_SLICE_EVENTS = 2_000
+DEFAULT_QUEUE_SLICES = 8
+SECONDS_PER_DAY = 86400
+
+# === Sinks ===
+class CallbackSink:
+    """Awaits ``callback(event)`` with each event as a dict."""
+
+    payload = 'records'
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    async def send(self, events):
+        for event in events:
+            await self.callback(event)
+
+    async def close(self):
+        pass
+
+class StreamSink:
+    """Writes NDJSON lines to an asyncio ``StreamWriter``, waiting for the socket to drain."""
+
+    payload = 'ndjson'
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    async def send(self, lines):
+        self.writer.write(''.join(lines).encode('utf-8'))
+        await self.writer.drain()
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+class StdoutSink:
+    """Writes NDJSON lines to a text stream (stdout by default) and flushes."""
+
+    payload = 'ndjson'
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+
+    async def send(self, lines):
+        self.out.write(''.join(lines))
+        self.out.flush()
+
+    async def close(self):
+        pass
+
+async def open_sink(target):
+    """
+    Opens the sink for ``target``.
+
+    ``target`` is '-' for stdout, ``tcp://HOST:PORT``, ``unix:///PATH``, a
+    text stream, or an async callable, which receives every event as a dict.
+    """
+    if callable(target):
+        return CallbackSink(target)
+    if hasattr(target, 'write'):
+        return StdoutSink(target)
+    if target == '-':
+        return StdoutSink()
+    if target.startswith('tcp://'):
+        host, _, port = target[len('tcp://'):].rpartition(':')
+        if not host or not port.isdigit():
+            raise ValueError(f"Invalid TCP target '{target}'. Expected tcp://HOST:PORT.")
+        _, writer = await asyncio.open_connection(host, int(port))
+        return StreamSink(writer)
+    if target.startswith('unix://'):
+        _, writer = await asyncio.open_unix_connection(target[len('unix://'):])
+        return StreamSink(writer)
+    raise ValueError(f"Unknown feed target '{target}'. Use '-', tcp://HOST:PORT or unix:///PATH.")
+
+
+# === Schedule ===
+def schedule(event_dates, rate=DEFAULT_RATE, compression=None, jitter=0.0, rng=None):
+    """
+    Returns each event's send time in seconds from the start of the feed.
+
+    ``event_dates`` must be sorted. The times never decrease, so events keep
+    their date order.
+    """
+    n = len(event_dates)
+    offsets = np.zeros(n)
+    if compression:
+        days = (event_dates - event_dates[0]) / np.timedelta64(1, 'D') if n else offsets
+        offsets = days * SECONDS_PER_DAY / compression
+    if rate:
+        # Each event waits for its date and for 1/rate after the previous one
+        spacing = np.arange(n) / rate
+        offsets = spacing + np.maximum.accumulate(offsets - spacing) if n else offsets
+    if jitter:
+        offsets = np.maximum.accumulate(offsets + np.random.default_rng(rng).uniform(0, jitter, n))
+    return offsets
+
+def _payloads(events, payload):
+    events = events.assign(event_date=format_dates(events['event_date'].to_numpy().astype('datetime64[D]')))
+    if payload == 'records':
+        return events.astype(object).where(events.notna(), None).to_dict('records')
+    return events.to_json(orient='records', lines=True, force_ascii=False).splitlines(keepends=True)
+
+def build_events(num_penguins=N_PENGUINS, seed=SEED, batch_size=DEFAULT_BATCH_SIZE, **mess_options):
+    """Generates every event of the run, sorted by ``event_date``, with a ``sequence`` column."""
+    batches = list(iter_batches(num_penguins, batch_size=batch_size, kind='events', seed=seed, **mess_options))
+    events = pd.concat(batches, ignore_index=True)
+    order = np.argsort(events['event_date'].to_numpy(), kind='stable')
+    events = events.iloc[order].reset_index(drop=True)
+    events.insert(0, 'sequence', np.arange(len(events)))
+    return events
+
+
+# === Feed ===
+async def _produce(queue, events, offsets, payload, slice_events):
+    loop = asyncio.get_running_loop()
+    for start in range(0, len(events), slice_events):
+        chunk = events.iloc[start:start + slice_events]
+        payloads = await loop.run_in_executor(None, _payloads, chunk, payload)
+        await queue.put((offsets[start:start + slice_events], payloads))
+    await queue.put(None)
+
+async def run_feed(target, num_penguins=N_PENGUINS, seed=SEED, rate=DEFAULT_RATE, compression=None,
+                   jitter=0.0, batch_size=DEFAULT_BATCH_SIZE, slice_events=DEFAULT_SLICE_EVENTS,
+                   queue_slices=DEFAULT_QUEUE_SLICES, **mess_options):
+    """
+    Replays the events of a ``num_penguins`` run to ``target`` (see ``open_sink``).
+
+    ``mess_options`` are passed to ``iter_batches`` (mess level and rates).
+    Returns a dict with the number of events sent, the elapsed seconds and
+    the largest delay of any event behind its schedule.
+    """
+    if not num_penguins or num_penguins < 0:
+        raise ValueError("The feed replays a finite run; num_penguins must be a positive integer.")
+    if rate is not None and rate <= 0:
+        raise ValueError("rate must be positive, or None for no limit.")
+    if compression is not None and compression <= 0:
+        raise ValueError("compression must be positive.")
+    if jitter < 0:
+        raise ValueError("jitter must not be negative.")
+    loop = asyncio.get_running_loop()
+    sink = await open_sink(target)
+    try:
+        events = await loop.run_in_executor(
+            None, lambda: build_events(num_penguins, seed=seed, batch_size=batch_size, **mess_options))
+        offsets = schedule(events['event_date'].to_numpy(), rate=rate, compression=compression,
+                           jitter=jitter, rng=seed)
+        queue = asyncio.Queue(maxsize=queue_slices)
+        producer = asyncio.create_task(_produce(queue, events, offsets, sink.payload, slice_events))
+
+        sent = 0
+        max_lag = 0.0
+        try:
+            # The clock starts once the first slice is ready to send
+            item = await queue.get()
+            start = loop.time()
+            started = time.perf_counter()
+            while item is not None:
+                times, payloads = item
+                i = 0
+                while i < len(payloads):
+                    now = loop.time() - start
+                    due = int(np.searchsorted(times, now, side='right'))
+                    if due <= i:
+                        await asyncio.sleep(times[i] - now)
+                        continue
+                    max_lag = max(max_lag, now - times[i])
+                    await sink.send(payloads[i:due])
+                    sent += due - i
+                    i = due
+                item = await queue.get()
+        finally:
+            producer.cancel()
+    finally:
+        await sink.close()
+    return {'events': sent, 'seconds': time.perf_counter() - started, 'max_lag': max_lag}
@@ -0,0 +1,240 @@
+# dirty_birds/formats.py
+
+"""
+Output formats for the clean and messy datasets.
+
+``csv`` writes the text schema as before. The binary formats store typed
+columns so consumers can skip re-parsing:
+
+- ``parquet`` and ``feather`` (Arrow IPC) need pyarrow;
+- ``npy`` is a zero-dependency column directory with one ``.npy`` file per
+  array plus a ``schema.json``, readable with ``np.load(..., mmap_mode='r')``.
+
+Every format is written from the same encoded frame (see ``encode_frame``):
+
+- text columns are dictionary encoded, with every distinct spelling kept as
+  its own category (typos and empty strings included) and missing values as
+  code -1;
+- dates are datetime64 and measurements are numbers.
+
+The messy data also carries values that are invalid on purpose. These are not
+coerced to NaT/NaN. Each date and measurement column gets a companion
+``<column>_invalid`` category column that holds the raw text of any value
+that is not a strict ISO date or a number, while the typed column is missing
+at that row. ``decode_frame`` reverses the encoding back to the text schema,
+so every format round-trips to the same CSV.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .compact import is_compact, to_text_frame
+from .config import COLUMNS
+from .csvio import resolve_compression, write_csv
+
+FORMATS = ['csv', 'parquet', 'feather', 'npy']
+FORMAT_EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather', 'npy': ''}
+
+DATE_COLUMNS = ['capture_date', 'date_egg']
+NUMBER_COLUMNS = ['bill_length_mm', 'bill_depth_mm', 'flipper_length_mm', 'body_mass_g']
+INVALID_SUFFIX = '_invalid'
+
+SCHEMA_FILE = 'schema.json'
+SCHEMA_VERSION = 1
+
+def output_path(path, fmt):
+    """Swaps a ``.csv`` suffix on ``path`` for the extension of ``fmt``."""
+    root, ext = os.path.splitext(path)
+    return root + FORMAT_EXTENSIONS[fmt] if ext.lower() == '.csv' else path
+
+def _require_pyarrow(fmt):
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(f"The '{fmt}' format requires pyarrow. Install it with 'pip install pyarrow'.") from None
+    return pyarrow
+
+
+# === Encoding ===
+def _parse_strict_dates(values):
+    """Parses ISO ``YYYY-MM-DD`` strings; anything that does not round-trip exactly is NaT."""
+    uniques = pd.unique(values[values.notna()])
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format='%Y-%m-%d', errors='coerce')
+    formatted = parsed.dt.strftime('%Y-%m-%d')
+    # Reject lenient matches such as '2024-1-5' that would not be written back verbatim
+    exact = formatted.to_numpy(dtype=object) == np.array([str(u) for u in uniques], dtype=object)
+    lookup = dict(zip(uniques, parsed.where(exact).to_numpy()))
+    return pd.to_datetime(values.map(lookup)).to_numpy(dtype='datetime64[s]')
+
+def _as_categorical(values):
+    """Dictionary-encodes text values, keeping every distinct spelling as a category."""
+    categorical = pd.Categorical(values)
+    if not all(isinstance(c, str) for c in categorical.categories):
+        categorical = categorical.rename_categories([str(c) for c in categorical.categories])
+    return categorical
+
+def _split_typed(series, kind):
+    """Returns ``(typed, invalid)``: typed values and the raw text of anything that failed to parse."""
+    if kind == 'number' and series.dtype.kind in 'fiu':
+        return series.to_numpy(), pd.Categorical([None] * len(series), categories=[])
+    if kind == 'number':
+        typed = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float)
+    else:
+        typed = _parse_strict_dates(series.astype(object))
+    invalid = series.notna().to_numpy() & pd.isna(typed)
+    return typed, _as_categorical(series.astype(object).where(invalid, None))
+
+def encode_frame(df, invalid_columns=True):
+    """
+    Encodes a text-schema frame into typed columns for the binary formats.
+
+    Dates and measurements get ``<column>_invalid`` companions when
+    ``invalid_columns`` is True (for messy data). Without them, a value that
+    fails to parse raises ValueError instead of being dropped.
+    """
+    encoded = {}
+    for column in COLUMNS:
+        series = df[column].reset_index(drop=True)
+        if column in DATE_COLUMNS or column in NUMBER_COLUMNS:
+            kind = 'date' if column in DATE_COLUMNS else 'number'
+            typed, invalid = _split_typed(series, kind)
+            encoded[column] = typed
+            if invalid_columns:
+                encoded[column + INVALID_SUFFIX] = invalid
+            elif invalid.notna().any():
+                raise ValueError(f"Column '{column}' has values that are not valid {kind}s; encode with invalid_columns=True.")
+        else:
+            encoded[column] = _as_categorical(series)
+    return pd.DataFrame(encoded)
+
+def _labels(values):
+    """Category labels as an object array, with NaN for missing codes."""
+    lookup = np.array(list(values.categories) + [np.nan], dtype=object)
+    return lookup[np.asarray(values.codes)]
+
+def decode_frame(encoded):
+    """Turns an encoded frame back into the text schema."""
+    frame = {}
+    for column in COLUMNS:
+        values = encoded[column]
+        invalid = encoded.get(column + INVALID_SUFFIX)
+        if column in DATE_COLUMNS:
+            dates = values.to_numpy().astype('datetime64[D]')
+            text = np.full(len(dates), np.nan, dtype=object)
+            valid = ~np.isnat(dates)
+            text[valid] = np.datetime_as_string(dates[valid], unit='D')
+        elif column in NUMBER_COLUMNS:
+            text = values.to_numpy()
+        else:
+            text = _labels(values.cat)
+        if invalid is not None and invalid.notna().any():
+            raw = _labels(invalid.cat)
+            text = text.astype(object)
+            text[invalid.notna().to_numpy()] = raw[invalid.notna().to_numpy()]
+        frame[column] = text
+    return pd.DataFrame(frame, columns=COLUMNS)
+
+
+# === Column directory ===
+def _write_column_directory(encoded, path):
+    os.makedirs(path, exist_ok=True)
+    schema = {'format': 'dirty_birds.columns', 'version': SCHEMA_VERSION, 'rows': len(encoded), 'columns': []}
+    for name in encoded.columns:
+        values = encoded[name]
+        entry = {'name': name, 'file': f"{name}.npy"}
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories = np.array([str(c) for c in values.cat.categories], dtype=str)
+            entry.update(kind='category', categories=f"{name}.categories.npy")
+            np.save(os.path.join(path, entry['categories']), categories)
+            array = values.cat.codes.to_numpy()
+        elif values.dtype.kind == 'M':
+            entry['kind'] = 'date'
+            array = values.to_numpy().astype('datetime64[D]')
+        else:
+            entry['kind'] = 'number'
+            array = values.to_numpy()
+        entry['dtype'] = array.dtype.str
+        np.save(os.path.join(path, entry['file']), array)
+        schema['columns'].append(entry)
+    with open(os.path.join(path, SCHEMA_FILE), 'w') as f:
+        json.dump(schema, f, indent=2)
+
+def load_columns(path, mmap_mode='r'):
+    """
+    Loads a column directory as ``(schema, arrays)`` without copying.
+
+    ``arrays`` maps each column name to its memory-mapped array; category
+    columns hold int codes (-1 for missing) and their labels are in
+    ``arrays[name + '.categories']``.
+    """
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        schema = json.load(f)
+    arrays = {}
+    for entry in schema['columns']:
+        arrays[entry['name']] = np.load(os.path.join(path, entry['file']), mmap_mode=mmap_mode)
+        if entry['kind'] == 'category':
+            arrays[entry['name'] + '.categories'] = np.load(os.path.join(path, entry['categories']))
+    return schema, arrays
+
+def _read_column_directory(path):
+    schema, arrays = load_columns(path, mmap_mode=None)
+    encoded = {}
+    for entry in schema['columns']:
+        name = entry['name']
+        if entry['kind'] == 'category':
+            encoded[name] = pd.Categorical.from_codes(arrays[name], categories=arrays[name + '.categories'].astype(object))
+        elif entry['kind'] == 'date':
+            encoded[name] = arrays[name].astype('datetime64[s]')
+        else:
+            encoded[name] = arrays[name]
+    return pd.DataFrame(encoded)
+
+
+# === Read / write ===
+def write_frame(df, path, fmt='csv', invalid_columns=True, workers=1, compression='infer'):
+    """
+    Writes a text-schema (or compact) frame to ``path`` in ``fmt``.
+
+    For binary formats the frame is encoded first; pass ``invalid_columns``
+    False for clean data, which has no invalid values to preserve. CSV is
+    written by ``dirty_birds.csvio.write_csv`` with ``workers`` processes and
+    ``compression``, which does not apply to the binary formats.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Choose from {FORMATS}.")
+    if fmt == 'csv':
+        write_csv(df, path, workers=workers, compression=compression)
+        return
+    if compression not in ('infer', 'none'):
+        raise ValueError(f"Compression '{compression}' only applies to the csv format.")
+    if fmt in ('parquet', 'feather'):
+        _require_pyarrow(fmt)
+    if is_compact(df):
+        df = to_text_frame(df)
+    encoded = encode_frame(df, invalid_columns=invalid_columns)
+    if fmt == 'npy':
+        _write_column_directory(encoded, path)
+    elif fmt == 'parquet':
+        encoded.to_parquet(path, index=False)
+    else:
+        encoded.to_feather(path)
+
+def read_frame(path, fmt='csv'):
+    """Reads a dataset written by ``write_frame`` back into the text schema."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Choose from {FORMATS}.")
+    if fmt == 'csv':
+        compression = resolve_compression(path)
+        return pd.read_csv(path, compression=None if compression == 'none' else compression)
+    if fmt in ('parquet', 'feather'):
+        _require_pyarrow(fmt)
+    if fmt == 'npy':
+        encoded = _read_column_directory(path)
+    elif fmt == 'parquet':
+        encoded = pd.read_parquet(path)
+    else:
+        encoded = pd.read_feather(path)
+    return decode_frame(encoded)
@@ -0,0 +1,362 @@
+# dirty_birds/generation.py
+
+"""
+Clean penguin population generation.
+
+Two engines produce the same output schema and the same distributions:
+
+- ``generate_penguins_rowwise`` is the original per-row loop driven by the
+  global ``random`` / ``np.random`` state. It is kept so clean outputs from
+  earlier releases can be reproduced exactly; messy outputs differ, because
+  the mess stages draw from their own generator.
+- ``generate_penguins_columnar`` draws every column as a whole NumPy array in
+  one batch and builds the DataFrame straight from those arrays.
+
+Both honour the morphometrics sampler of ``dirty_birds.morphometrics``.
+"""
+
+import functools
+import random
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .config import (
+    AGE_GROUPS, AGE_GROUP_WEIGHTS, AGE_MASS_FACTOR, CLIP_BOUNDS, CLUTCH_PROBS,
+    COLONIES, COLONY_CODES, COLONY_STRESS, COLONY_WEIGHTS, COLUMNS, HEALTH_LABELS,
+    HEALTH_NOISE_RATE, SEX_CODES, SEX_MASS_FACTOR, SEXES, SPECIES_BAND, SPECIES_CODES,
+    SPECIES_INFO, STUDY_START, TAG_PREFIXES, TAGGED_PERCENTAGE,
+)
+from .dates import (
+    EGG_LAG_DAYS, draw_capture_dates, egg_dates, field_days, format_dates, study_window, years_of,
+)
+from .morphometrics import draw_morphometrics, morphometric_tables
+
+# 'counter' is the seekable engine in seekable.py
+ENGINES = ['columnar', 'rowwise', 'counter']
+
+# === Helper Functions ===
+def generate_tag(species, tag_counters):
+    """Generates a unique tag ID for a penguin and increments the species counter."""
+    species_prefix = TAG_PREFIXES[species]
+    number = tag_counters[species]
+    tag_counters[species] += 1
+    return f"{species_prefix}-{number:04d}"
+
+def new_tag_counters():
+    """Returns a fresh set of per-species tag counters, all starting at 1."""
+    return {species: 1 for species in SPECIES_INFO}
+
+def random_capture_date():
+    """
+    Generates a biologically plausible capture date between October 2019 and December 2024,
+    on a field day of ``dirty_birds.dates`` (any day unless the field months are restricted).
+    """
+    days = field_days()
+    day = days[random.randint(0, len(days) - 1)]
+    return pd.Timestamp(day).to_pydatetime()
+
+
+# === Row-wise engine ===
+def generate_penguins_rowwise(num_penguins, tag_counters=None):
+    """
+    Generates the clean population one penguin at a time.
+
+    Draws from the global ``random`` and ``np.random`` state in the same order as
+    releases up to v0.4.0, so seeding both with 42 reproduces their output.
+    """
+    if tag_counters is None:
+        tag_counters = new_tag_counters()
+
+    species_names = list(SPECIES_INFO.keys())
+    colonies, weights = zip(*COLONY_WEIGHTS.items())
+    t = parameter_tables()
+    penguins = []
+
+    for _ in range(num_penguins):
+        species = random.choice(species_names)
+        colony = random.choices(colonies, weights=weights, k=1)[0]
+        island = COLONIES[colony]
+        age_group = random.choices(AGE_GROUPS, weights=AGE_GROUP_WEIGHTS)[0]
+        sex = random.choice(SEXES) if random.random() < 0.5 else None
+        capture_date = random_capture_date()
+
+        info = SPECIES_INFO[species]
+        if config.MORPHOMETRICS == 'correlated':
+            code = SPECIES_CODES.index(species)
+            draws = t['morph_mean'][:, code] + t['morph_chol'][code] @ np.random.standard_normal(len(t['morph_mean']))
+            bill_length, bill_depth, flipper_length = np.clip(draws[:3], t['morph_low'][:3, 0], t['morph_high'][:3, 0])
+            base_mass = draws[3]
+        else:
+            bill_length = np.clip(np.random.normal(info['bill_mean'], info['bill_sd']), *CLIP_BOUNDS['bill_length_mm'])
+            bill_depth = np.clip(np.random.normal(info['bill_depth_mean'], info['bill_depth_sd']), *CLIP_BOUNDS['bill_depth_mm'])
+            flipper_length = np.clip(np.random.normal(info['flipper_mean'], info['flipper_sd']), *CLIP_BOUNDS['flipper_length_mm'])
+            base_mass = np.random.normal(info['mass_mean'], info['mass_sd'])
+
+        # Generate mass with age and sex adjustments
+        body_mass = base_mass * AGE_MASS_FACTOR[age_group] * SEX_MASS_FACTOR[sex]
+        body_mass = np.clip(body_mass, *CLIP_BOUNDS['body_mass_g'])
+
+        stress_factor = COLONY_STRESS.get(colony, 0.0)
+
+        # Health classification with adjusted bounds and stress impact
+        if pd.isnull(body_mass):
+            health_status = 'UNKNOWN'
+        else:
+            mean_mass = info['mass_mean']
+            band = SPECIES_BAND.get(species, 0.20)
+            low_thresh = mean_mass * (1 - band) * (1 + stress_factor)
+            high_thresh = mean_mass * (1 + band) * (1 - stress_factor)
+
+            if body_mass < low_thresh:
+                health_status = 'Underweight'
+            elif body_mass > high_thresh:
+                health_status = 'Overweight'
+            else:
+                health_status = 'Healthy'
+
+            # Add random error (simulate field mislabeling)
+            if random.random() < HEALTH_NOISE_RATE:
+                health_noise = list(HEALTH_LABELS)
+                health_noise.remove(health_status)
+                health_status = random.choice(health_noise)
+
+        if random.random() < TAGGED_PERCENTAGE:
+            tag_id = generate_tag(species, tag_counters)
+        else:
+            tag_id = None
+
+        # Determine clutch completion
+        clutch_prob = CLUTCH_PROBS.get(species, 0.8)
+        clutch_completion = np.random.choice(["Yes", "No"], p=[clutch_prob, 1 - clutch_prob])
+
+        # Generate egg date only if clutch was completed
+        egg_date = capture_date - timedelta(days=random.randint(0, 14))
+        if egg_date < STUDY_START:
+            egg_date = capture_date
+        date_egg = egg_date.strftime('%Y-%m-%d') if clutch_completion == "Yes" else np.nan
+
+        # Add study_name based on year and study convention
+        study_name = f"PAPRI{capture_date.year}"
+
+        penguins.append({
+            'tag_id': tag_id,
+            'species': species,
+            'bill_length_mm': round(bill_length, 2),
+            'bill_depth_mm': round(bill_depth, 2),
+            'flipper_length_mm': round(flipper_length, 1),
+            'body_mass_g': round(body_mass),
+            'age_group': age_group,
+            'sex': sex,
+            'colony_id': colony,
+            'island': island,
+            'capture_date': capture_date.strftime('%Y-%m-%d'),
+            'health_status': health_status,
+            'study_name': study_name,
+            'clutch_completion': clutch_completion,
+            'date_egg': date_egg
+        })
+
+    return pd.DataFrame(penguins, columns=COLUMNS)
+
+
+# === Columnar engine ===
+
+def code_dtype(num_codes):
+    """The smallest signed integer dtype that holds codes ``0 .. num_codes - 1`` (and -1)."""
+    return np.int8 if num_codes <= np.iinfo(np.int8).max else np.int16
+
+def draw_tag_layout(num_penguins, rng):
+    """
+    Draws the species codes and tagged flags for ``num_penguins`` rows.
+
+    These two columns alone decide how many tag numbers each species uses, so
+    sharded generation can size its tag ranges before drawing anything else.
+    """
+    species = rng.integers(0, len(SPECIES_CODES), size=num_penguins).astype(code_dtype(len(SPECIES_CODES)))
+    tagged = rng.random(num_penguins) < TAGGED_PERCENTAGE
+    return species, tagged
+
+def count_tags(species, tagged):
+    """Counts tagged rows per species name."""
+    counts = np.bincount(species[tagged], minlength=len(SPECIES_CODES))
+    return {name: int(counts[code]) for code, name in enumerate(SPECIES_CODES)}
+
+@functools.lru_cache(maxsize=None)
+def parameter_tables():
+    """
+    Compiles the species, colony, age and sex parameters into arrays indexed by code.
+
+    Built once per parameter set (see ``dirty_birds.params``); per-row
+    parameter lookup is then a gather, however many species and colonies there are.
+    """
+    info = [SPECIES_INFO[s] for s in SPECIES_CODES]
+    colony_weights = np.array([COLONY_WEIGHTS[c] for c in COLONY_CODES], dtype=float)
+    colony_islands = [COLONIES[c] for c in COLONY_CODES]
+    islands = sorted(set(colony_islands))
+    return {
+        'tag_prefix': np.array([TAG_PREFIXES[s] for s in SPECIES_CODES], dtype=object),
+        'mass_mean': np.array([i['mass_mean'] for i in info], dtype=float),
+        'band': np.array([SPECIES_BAND.get(s, 0.20) for s in SPECIES_CODES]),
+        'clutch_prob': np.array([CLUTCH_PROBS.get(s, 0.8) for s in SPECIES_CODES]),
+        'colony_p': colony_weights / colony_weights.sum(),
+        'stress': np.array([COLONY_STRESS.get(c, 0.0) for c in COLONY_CODES]),
+        'island': np.array(colony_islands, dtype=object),
+        'islands': islands,
+        'island_code': np.array([islands.index(i) for i in colony_islands], dtype=code_dtype(len(islands))),
+        'age_p': np.array(AGE_GROUP_WEIGHTS, dtype=float),
+        'age_factor': np.array([AGE_MASS_FACTOR[a] for a in AGE_GROUPS]),
+        'sex_factor': np.array([SEX_MASS_FACTOR[s] for s in SEX_CODES]),
+        **morphometric_tables(SPECIES_CODES),
+    }
+
+def classify_health(body_mass, species, colony):
+    """
+    Classifies body mass against species/colony thresholds, returning HEALTH_LABELS codes.
+
+    Colony stress can raise the low threshold above the high one; a mass
+    below both is Underweight, as in the row-wise ``if/elif``.
+    """
+    t = parameter_tables()
+    low_thresh = t['mass_mean'][species] * (1 - t['band'][species]) * (1 + t['stress'][colony])
+    high_thresh = t['mass_mean'][species] * (1 + t['band'][species]) * (1 - t['stress'][colony])
+    health = np.full(len(body_mass), HEALTH_LABELS.index('Healthy'), dtype=np.int8)
+    health[body_mass > high_thresh] = HEALTH_LABELS.index('Overweight')
+    health[body_mass < low_thresh] = HEALTH_LABELS.index('Underweight')
+    return health
+
+def draw_columns(num_penguins, rng, layout_rng=None, window=None):
+    """
+    Draws every clean column for ``num_penguins`` rows as whole arrays.
+
+    Returns a dict of NumPy arrays holding integer codes for the categorical
+    fields, float64 morphometrics, datetime64[D] dates and boolean flags. Tag
+    numbers are not assigned here; see ``assign_tag_numbers``. If
+    ``layout_rng`` is given, species and tagged flags come from it (via
+    ``draw_tag_layout``) instead of ``rng``. Capture dates fall in ``window``,
+    an inclusive ``(start, end)`` datetime64[D] pair, or in ``study_window()``,
+    on the field days of ``dirty_birds.dates``.
+    """
+    n = num_penguins
+    t = parameter_tables()
+    start, end = study_window() if window is None else window
+
+    if layout_rng is None:
+        species = rng.integers(0, len(SPECIES_CODES), size=n).astype(code_dtype(len(SPECIES_CODES)))
+    else:
+        species, tagged = draw_tag_layout(n, layout_rng)
+    colony = rng.choice(len(COLONY_CODES), size=n, p=t['colony_p']).astype(code_dtype(len(COLONY_CODES)))
+    age = rng.choice(len(AGE_GROUPS), size=n, p=t['age_p']).astype(np.int8)
+    sexed = rng.random(n) < 0.5
+    sex = np.where(sexed, rng.integers(1, len(SEX_CODES), size=n), 0).astype(np.int8)
+
+    capture_date = draw_capture_dates(n, rng, window=(start, end))
+
+    morphometrics = draw_morphometrics(rng, species, age, sex, t)
+
+    # Health classification against species/colony thresholds
+    health = classify_health(morphometrics['body_mass_g'], species, colony)
+
+    # Field mislabeling: swap to one of the other labels uniformly
+    noisy = rng.random(n) < HEALTH_NOISE_RATE
+    other = rng.integers(0, len(HEALTH_LABELS) - 1, size=noisy.sum()).astype(np.int8)
+    current = health[noisy]
+    health[noisy] = other + (other >= current)
+
+    if layout_rng is None:
+        tagged = rng.random(n) < TAGGED_PERCENTAGE
+    clutch = rng.random(n) < t['clutch_prob'][species]
+
+    egg_date = egg_dates(capture_date, rng.integers(0, EGG_LAG_DAYS + 1, size=n), start)
+
+    return {
+        'species': species,
+        'colony': colony,
+        'age': age,
+        'sex': sex,
+        'capture_date': capture_date,
+        **morphometrics,
+        'health': health,
+        'tagged': tagged,
+        'clutch': clutch,
+        'egg_date': egg_date,
+    }
+
+def assign_tag_numbers(species, tagged, tag_counters):
+    """
+    Assigns sequential per-species tag numbers to the tagged rows, in row order.
+
+    Returns an int64 array holding 0 for untagged rows, and advances
+    ``tag_counters`` the same way repeated ``generate_tag`` calls would.
+    One stable sort groups the tagged rows by species, keeping row order
+    within each species; a row's number is its species' counter plus its
+    rank in that group.
+    """
+    numbers = np.zeros(len(species), dtype=np.int64)
+    rows = np.flatnonzero(tagged)
+    codes = species[rows]
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes, minlength=len(SPECIES_CODES))
+    offsets = np.array([tag_counters[name] for name in SPECIES_CODES], dtype=np.int64)
+    # Rank within the group = position in sorted order - where the group starts
+    sorted_codes = codes[order]
+    first = np.cumsum(counts) - counts
+    numbers[rows[order]] = offsets[sorted_codes] + np.arange(len(rows)) - first[sorted_codes]
+    for name, count in zip(SPECIES_CODES, counts):
+        tag_counters[name] += int(count)
+    return numbers
+
+def format_tag_ids(species, tag_numbers):
+    """Formats ``PREFIX-0001`` style tag IDs, with None where ``tag_numbers`` is 0."""
+    tag_ids = np.full(len(species), None, dtype=object)
+    mask = tag_numbers > 0
+    if mask.any():
+        prefixes = pd.Series(parameter_tables()['tag_prefix'][species[mask]])
+        digits = pd.Series(tag_numbers[mask]).astype(str).str.zfill(4)
+        tag_ids[mask] = (prefixes + '-' + digits).to_numpy()
+    return tag_ids
+
+def columns_to_frame(columns, tag_numbers):
+    """Builds the text-schema clean DataFrame from ``draw_columns`` output."""
+    n = len(columns['species'])
+    t = parameter_tables()
+    capture_date = columns['capture_date']
+    years = years_of(capture_date)
+
+    date_egg = np.full(n, np.nan, dtype=object)
+    clutch = columns['clutch']
+    date_egg[clutch] = format_dates(columns['egg_date'][clutch])
+
+    frame = {
+        'tag_id': format_tag_ids(columns['species'], tag_numbers),
+        'species': np.array(SPECIES_CODES, dtype=object)[columns['species']],
+        'bill_length_mm': np.round(columns['bill_length_mm'], 2),
+        'bill_depth_mm': np.round(columns['bill_depth_mm'], 2),
+        'flipper_length_mm': np.round(columns['flipper_length_mm'], 1),
+        'body_mass_g': np.rint(columns['body_mass_g']).astype(np.int64),
+        'age_group': np.array(AGE_GROUPS, dtype=object)[columns['age']],
+        'sex': np.array(SEX_CODES, dtype=object)[columns['sex']],
+        'colony_id': np.array(COLONY_CODES, dtype=object)[columns['colony']],
+        'island': t['island'][columns['colony']],
+        'capture_date': format_dates(capture_date),
+        'health_status': np.array(HEALTH_LABELS, dtype=object)[columns['health']],
+        'study_name': 'PAPRI' + years.astype(str).astype(object),
+        'clutch_completion': np.where(clutch, 'Yes', 'No').astype(object),
+        'date_egg': date_egg,
+    }
+    return pd.DataFrame(frame, columns=COLUMNS)
+
+def generate_penguins_columnar(num_penguins, rng, tag_counters=None, layout_rng=None):
+    """
+    Generates the clean population with every column drawn as a whole array.
+
+    Uses ``rng`` (a ``np.random.Generator``) for all draws and returns a
+    DataFrame with the same schema and distributions as the row-wise engine.
+    """
+    if tag_counters is None:
+        tag_counters = new_tag_counters()
+    columns = draw_columns(num_penguins, rng, layout_rng=layout_rng)
+    tag_numbers = assign_tag_numbers(columns['species'], columns['tagged'], tag_counters)
+    return columns_to_frame(columns, tag_numbers)
@@ -0,0 +1,185 @@
+# dirty_birds/instrument.py
+
+"""
+Stage instrumentation and run reports.
+
+A ``StageRecorder`` times pipeline stages wrapped in ``recorder.stage(name)``.
+For each stage it records duration, rows in and out, bytes written and peak
+memory. It can also:
+
+- pass every finished stage to a ``callback``, for forwarding metrics to
+  external monitoring;
+- profile each stage with cProfile and dump the profile of the hottest stage;
+- write everything as a JSON run report (the CLI's ``--profile``).
+
+Stages that run many times, such as once per chunk in streaming mode, are
+summed under their name in the report.
+
+Peak memory is the process RSS high-water mark by default. That is cheap, but
+it only grows, so it shows which stage first pushed the peak up. With
+``memory='tracemalloc'`` each stage's own peak allocation is traced exactly,
+at some cost in speed.
+"""
+
+import contextlib
+import cProfile
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+
+from . import __version__
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+MEMORY_MODES = ['rss', 'tracemalloc', 'none']
+
+def peak_rss_bytes():
+    """The process's peak resident set size in bytes, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def path_size(path):
+    """Size in bytes of a file, or of all files under a directory."""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path)
+
+class StageRecorder:
+    """
+    Collects per-stage metrics for one run.
+
+    ``callback`` is called with a dict for every finished stage. ``memory`` is
+    one of 'rss', 'tracemalloc' or 'none'. With ``profile`` each stage runs
+    under cProfile so ``dump_hottest_profile`` can write the slowest one.
+    """
+
+    def __init__(self, callback=None, memory='rss', profile=False):
+        if memory not in MEMORY_MODES:
+            raise ValueError(f"Unknown memory mode '{memory}'. Choose from {MEMORY_MODES}.")
+        self.callback = callback
+        self.memory = memory
+        self.profile = profile
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._stages = {}
+        self._profiles = {}
+
+    @contextlib.contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Times the enclosed block as stage ``name``.
+
+        Yields the event dict, so the block can fill in ``rows_out`` and
+        ``bytes_written`` once it knows them.
+        """
+        event = {'stage': name, 'rows_in': rows_in, 'rows_out': None, 'bytes_written': None}
+        tracing = self.memory == 'tracemalloc'
+        if tracing:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        profiler = cProfile.Profile() if self.profile else None
+        if profiler is not None:
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield event
+        finally:
+            event['seconds'] = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+            if tracing:
+                event['peak_bytes'] = tracemalloc.get_traced_memory()[1] - base
+                if started_tracing:
+                    tracemalloc.stop()
+            elif self.memory == 'rss':
+                event['peak_bytes'] = peak_rss_bytes()
+            else:
+                event['peak_bytes'] = None
+            self._record(event, profiler)
+
+    def annotate(self, name, **fields):
+        """Adds numeric ``fields`` (e.g. ``bytes_written``) to a recorded stage; unknown stages are skipped."""
+        totals = self._stages.get(name)
+        if totals is None:
+            return
+        for key, value in fields.items():
+            totals[key] = (totals.get(key) or 0) + value
+
+    def _record(self, event, profiler):
+        totals = self._stages.setdefault(event['stage'], {
+            'stage': event['stage'], 'calls': 0, 'seconds': 0.0,
+            'rows_in': None, 'rows_out': None, 'bytes_written': None, 'peak_bytes': None,
+        })
+        totals['calls'] += 1
+        totals['seconds'] += event['seconds']
+        for key in ['rows_in', 'rows_out', 'bytes_written']:
+            if event[key] is not None:
+                totals[key] = (totals[key] or 0) + event[key]
+        if event['peak_bytes'] is not None:
+            totals['peak_bytes'] = max(totals['peak_bytes'] or 0, event['peak_bytes'])
+        if profiler is not None:
+            if event['stage'] in self._profiles:
+                self._profiles[event['stage']].add(profiler)
+            else:
+                self._profiles[event['stage']] = pstats.Stats(profiler)
+        if self.callback is not None:
+            self.callback(dict(event))
+
+    @property
+    def stages(self):
+        """Per-stage totals in the order stages first ran."""
+        return [dict(s) for s in self._stages.values()]
+
+    def hottest_stage(self):
+        """Name of the stage with the largest total duration, or None."""
+        if not self._stages:
+            return None
+        return max(self._stages.values(), key=lambda s: s['seconds'])['stage']
+
+    def dump_hottest_profile(self, path):
+        """Writes the cProfile stats of the hottest stage to ``path``; returns the stage name."""
+        if not self.profile:
+            raise RuntimeError("Stage profiling is off; create the recorder with profile=True.")
+        name = self.hottest_stage()
+        if name is not None:
+            self._profiles[name].dump_stats(path)
+        return name
+
+    def report(self, **run_info):
+        """Builds the JSON-serialisable run report; ``run_info`` is stored under 'run'."""
+        run = {
+            'dirty_birds_version': __version__,
+            'python': platform.python_version(),
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'total_seconds': time.perf_counter() - self._start,
+            'peak_rss_bytes': peak_rss_bytes(),
+            'memory_mode': self.memory,
+        }
+        run.update(run_info)
+        for stage in self._stages.values():
+            if stage['rows_in'] and stage['seconds'] > 0:
+                stage['rows_per_second'] = stage['rows_in'] / stage['seconds']
+        return {'run': run, 'stages': self.stages, 'hottest_stage': self.hottest_stage()}
+
+    def write_report(self, path, **run_info):
+        """Writes ``report(**run_info)`` to ``path`` as JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.report(**run_info), f, indent=2, default=str)
+
+def null_recorder():
+    """A recorder with memory tracking off, for callers that do not collect metrics."""
+    return StageRecorder(memory='none')
@@ -0,0 +1,183 @@
+# dirty_birds/mess.py
+
+"""
+Messiness and augmentation stages applied to a clean penguin population:
+cell-level corruption, longitudinal resights, mislabeled duplicates and
+species missingness.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .config import ERROR_RATES
+from .corruption import apply_corruption_plan, default_corruption_plan
+from .dates import format_dates, parse_capture_dates, shift_resight_dates
+from .morphometrics import MORPHOMETRIC_COLUMNS
+from .rng import as_generator
+
+# === Mess injection ===
+def inject_mess(df, mess_level='moderate', rng=None, inplace=False, truth=None):
+    """
+    Injects controlled 'messiness' into the dataset to simulate real-world field data issues.
+
+    Missing values, categorical typos, corrupted dates and numeric outliers are
+    described by ``default_corruption_plan`` and applied sparsely by
+    ``apply_corruption_plan``. With ``inplace`` the frame is corrupted without
+    taking a copy first. Corrupted cells are recorded in ``truth`` (a
+    ``dirty_birds.truth.GroundTruth``) when given.
+    """
+    if mess_level == 'none':
+        return df
+
+    error_rate = ERROR_RATES.get(mess_level)
+    if error_rate is None:
+        raise ValueError("Invalid mess_level. Choose from 'none', 'light', 'moderate', 'heavy'.")
+
+    print(f"Injecting {mess_level} level of mess into the dataset... (error rate: {error_rate})")
+    return apply_corruption_plan(df, default_corruption_plan(error_rate), rng=rng, inplace=inplace,
+                                 truth=None if truth is None else truth.corruption)
+
+
+# === Resight duplication block ===
+RESIGHT_HEALTH_LABELS = ['Healthy', 'Unwell', 'Underweight', 'Overweight', 'Critically Ill']
+AGE_PROMOTION = {'Chick': 'Juvenile', 'Juvenile': 'Adult'}
+RESIGHT_SURVIVAL_RATE = 0.95
+
+def sample_sources(n_candidates, rate, rng, per_row=False):
+    """
+    Picks source rows, with replacement, for ``rate`` new events per candidate row.
+
+    By default draws exactly ``int(n_candidates * rate)`` uniform picks. With
+    ``per_row`` each candidate independently gets a Poisson(``rate``) number of
+    events instead, which keeps the same expected rate but only depends on the
+    rows at hand, so batches of a larger dataset can be processed one at a time.
+    """
+    if per_row:
+        return np.repeat(np.arange(n_candidates), rng.poisson(rate, size=n_candidates))
+    return rng.integers(0, n_candidates, size=int(n_candidates * rate))
+
+def build_resight_rows(df, duplicate_rate=0.45, rng=None, per_row=False):
+    """
+    Builds the resight records for ``df`` as one set-based batch.
+
+    Returns a DataFrame of resight rows whose index holds the labels of the
+    source rows in ``df``. Returns None if ``df`` has no tagged penguins.
+    See ``sample_sources`` for ``per_row``.
+    """
+    rng = as_generator(rng)
+
+    # 1. Only consider penguins that have a tag_id for resighting.
+    tagged = np.flatnonzero(df['tag_id'].notna().to_numpy())
+    if len(tagged) == 0:
+        return None
+
+    # 2. Sample resight *events* with replacement, relative to the tagged population,
+    # and apply the survival/resight chance as one mask.
+    picks = sample_sources(len(tagged), duplicate_rate, rng, per_row=per_row)
+    picks = picks[rng.random(len(picks)) < RESIGHT_SURVIVAL_RATE]
+    resights = df.iloc[tagged[picks]].copy()
+    n = len(resights)
+
+    # 3. Advance capture_date 1-3 years, capping at the study end. Unparseable
+    # dates are left untouched on the resight record.
+    original = parse_capture_dates(resights['capture_date'])
+    valid = ~np.isnat(original)
+    shifted = shift_resight_dates(original, rng)
+    capture_date = resights['capture_date'].to_numpy(dtype=object)
+    capture_date[valid] = format_dates(shifted[valid])
+    resights['capture_date'] = capture_date
+
+    # 4. Drift biometrics slightly for the resight record.
+    for col in MORPHOMETRIC_COLUMNS:
+        values = resights[col].to_numpy(dtype=float)
+        resights[col] = np.round(values * rng.uniform(0.98, 1.05, size=n), 2)
+
+    # 5. Promote age_group and re-draw health status for the new record.
+    resights['age_group'] = resights['age_group'].replace(AGE_PROMOTION)
+    has_health = resights['health_status'].notna().to_numpy()
+    health = resights['health_status'].to_numpy(dtype=object)
+    health[has_health] = np.array(RESIGHT_HEALTH_LABELS, dtype=object)[rng.integers(0, len(RESIGHT_HEALTH_LABELS), size=int(has_health.sum()))]
+    resights['health_status'] = health
+
+    return resights
+
+def duplicate_penguin_rows_for_resight(df, duplicate_rate=0.45, rng=None, truth=None):
+    """
+    Simulates longitudinal resighting of tagged penguins.
+
+    This function is designed to be more realistic by:
+    1. Only selecting from penguins that have a valid `tag_id`.
+    2. Making the `duplicate_rate` relative to the tagged population.
+    3. Allowing multiple resights of the same individual (`replace=True`).
+    4. Robustly handling resight dates to prevent dropping data.
+
+    All steps operate on whole columns; see ``build_resight_rows``. The
+    resights are appended to ``truth`` when given.
+    """
+    resights = build_resight_rows(df, duplicate_rate=duplicate_rate, rng=rng)
+    if resights is None:
+        print("No tagged penguins found to resight.")
+        return df
+    if truth is not None:
+        truth.extend(df.index.get_indexer(resights.index), 'resight')
+    return pd.concat([df, resights], ignore_index=True)
+
+def build_mislabel_rows(df, mislabel_rate=0.01, rng=None, per_row=False):
+    """
+    Builds mislabeled duplicate records for ``df`` as one batch.
+
+    Copies sampled records that have a valid tag and date and drifts their
+    biometrics, keeping tag_id and capture_date the same. Returns None when
+    there are no candidate records. See ``sample_sources`` for ``per_row``.
+    """
+    rng = as_generator(rng)
+
+    # Only create mislabels for records that have a valid tag and date.
+    valid = np.flatnonzero((df['tag_id'].notna() & df['capture_date'].notna()).to_numpy())
+    if len(valid) == 0:
+        return None
+
+    picks = sample_sources(len(valid), mislabel_rate, rng, per_row=per_row)
+    mislabels = df.iloc[valid[picks]].copy()
+
+    # Wider drift than resights, to simulate entry error
+    for col in MORPHOMETRIC_COLUMNS:
+        values = mislabels[col].to_numpy(dtype=float)
+        mislabels[col] = np.round(values * rng.uniform(0.90, 1.10, size=len(mislabels)), 2)
+    return mislabels
+
+def inject_mislabeled_duplicates(df, mislabel_rate=0.01, rng=None, truth=None):
+    """
+    Intentionally creates mislabeled duplicates to simulate data entry errors.
+
+    This function selects a portion of records, creates a copy with the same
+    tag_id and capture_date, but with slightly drifted biometric data.
+    This is a controlled way to re-introduce the "same tag, same date, different data" anomaly.
+    The duplicates are appended to ``truth`` when given.
+    """
+    if mislabel_rate == 0:
+        return df
+
+    mislabels = build_mislabel_rows(df, mislabel_rate=mislabel_rate, rng=rng)
+    if mislabels is None or mislabels.empty:
+        return df
+
+    print(f"Injecting {len(mislabels)} mislabeled duplicate records...")
+    if truth is not None:
+        truth.extend(df.index.get_indexer(mislabels.index), 'mislabel')
+    return pd.concat([df, mislabels], ignore_index=True)
+
+# === Helper: Inject missingness into species column ===
+def inject_species_missingness(df, missing_rate=0.03, truth=None):
+    """
+    Randomly inject missing values into the 'species' column to simulate field error.
+    """
+    n_rows = df.shape[0]
+    n_missing = int(missing_rate * n_rows)
+    missing_indices = np.random.choice(df.index, size=n_missing, replace=False)
+    if truth is not None:
+        positions = df.index.get_indexer(missing_indices)
+        before = df['species'].to_numpy()[positions]
+        truth.mark('species', 'missing', positions, before, np.full(n_missing, None, dtype=object))
+    df.loc[missing_indices, 'species'] = np.nan
+    return df
@@ -0,0 +1,133 @@
+# dirty_birds/morphometrics.py
+
+"""
+Morphometric samplers: bill length, bill depth, flipper length and body mass.
+
+Two samplers share the species means and standard deviations of
+``SPECIES_INFO``:
+
+- ``'independent'`` draws each measurement on its own. It is the default and
+  makes the same draws as earlier releases, so their outputs reproduce exactly.
+- ``'correlated'`` draws the four measurements jointly from each species'
+  multivariate normal, with the correlations of ``MORPHOMETRIC_CORRELATION``:
+  large birds have long bills, deep bills and long flippers together.
+
+For the correlated sampler, ``parameter_tables`` holds the Cholesky factor
+``L`` of every species' covariance matrix, computed once per parameter set.
+A draw takes standard normals ``z`` for all rows, then forms ``mean + L @ z``
+with one matrix product per species over all of that species' rows. The
+age/sex mass factors and the clipping bounds are then applied to every row
+at once, the same way for both samplers.
+
+``set_morphometrics`` selects the sampler for every engine, like
+``dirty_birds.dates.set_field_months``; the clean-base cache key changes with it.
+"""
+
+import numpy as np
+
+from . import config
+
+MORPHOMETRIC_COLUMNS = ['bill_length_mm', 'bill_depth_mm', 'flipper_length_mm', 'body_mass_g']
+SAMPLERS = ['independent', 'correlated']
+
+# SPECIES_INFO fields of each morphometric column, in MORPHOMETRIC_COLUMNS order
+MEAN_FIELDS = ['bill_mean', 'bill_depth_mean', 'flipper_mean', 'mass_mean']
+SD_FIELDS = ['bill_sd', 'bill_depth_sd', 'flipper_sd', 'mass_sd']
+
+def set_morphometrics(sampler):
+    """Selects the morphometrics sampler, ``'independent'`` or ``'correlated'``."""
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Invalid morphometrics sampler '{sampler}'. Choose from {SAMPLERS}.")
+    config.MORPHOMETRICS = sampler
+
+def identity_correlation():
+    """The correlation matrix of independent measurements, as nested lists."""
+    return np.eye(len(MORPHOMETRIC_COLUMNS)).tolist()
+
+def correlation_factor(matrix, name='species'):
+    """
+    Checks a correlation matrix and returns its lower Cholesky factor.
+
+    Raises ValueError unless ``matrix`` is a symmetric 4x4 matrix with a unit
+    diagonal that is positive definite.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    size = len(MORPHOMETRIC_COLUMNS)
+    if matrix.shape != (size, size):
+        raise ValueError(f"The correlation matrix of {name} must be {size}x{size}, in {MORPHOMETRIC_COLUMNS} order.")
+    if not np.allclose(matrix, matrix.T) or not np.allclose(np.diag(matrix), 1):
+        raise ValueError(f"The correlation matrix of {name} must be symmetric with ones on the diagonal.")
+    try:
+        return np.linalg.cholesky(matrix)
+    except np.linalg.LinAlgError:
+        raise ValueError(f"The correlation matrix of {name} is not positive definite.") from None
+
+def morphometric_tables(species_codes):
+    """
+    Compiles the morphometric parameters of ``species_codes`` for ``parameter_tables``.
+
+    ``morph_mean`` and ``morph_sd`` are 4 x species arrays; ``morph_chol``
+    holds the lower Cholesky factor of each species' covariance matrix.
+    Species without a ``MORPHOMETRIC_CORRELATION`` entry are uncorrelated.
+    """
+    info = [config.SPECIES_INFO[s] for s in species_codes]
+    mean = np.array([[i[field] for i in info] for field in MEAN_FIELDS], dtype=float)
+    sd = np.array([[i[field] for i in info] for field in SD_FIELDS], dtype=float)
+    # cov = D R D with D = diag(sd), so L = D chol(R); this also holds for a zero sd
+    chol = np.stack([
+        sd[:, code, None] * correlation_factor(config.MORPHOMETRIC_CORRELATION.get(name, identity_correlation()), name)
+        for code, name in enumerate(species_codes)
+    ])
+    bounds = np.array([config.CLIP_BOUNDS[column] for column in MORPHOMETRIC_COLUMNS], dtype=float)
+    return {
+        'morph_mean': mean,
+        'morph_sd': sd,
+        'morph_chol': chol,
+        'morph_low': bounds[:, :1],
+        'morph_high': bounds[:, 1:],
+    }
+
+def correlate(z, species, t):
+    """
+    Turns standard normals ``z`` (4 x rows) into correlated measurements of each row's species.
+
+    Rows are grouped by species with one stable sort, then each species'
+    rows take ``mean + L @ z`` in a single matrix product.
+    """
+    values = np.empty_like(z)
+    order = np.argsort(species, kind='stable')
+    bounds = np.searchsorted(species[order], np.arange(t['morph_chol'].shape[0] + 1))
+    for code in range(len(bounds) - 1):
+        rows = order[bounds[code]:bounds[code + 1]]
+        if len(rows):
+            values[:, rows] = t['morph_mean'][:, code, None] + t['morph_chol'][code] @ z[:, rows]
+    return values
+
+def finish_morphometrics(values, age, sex, t):
+    """
+    Scales body mass by the age and sex factors and clips all four measurements.
+
+    ``values`` is a 4 x rows array of unclipped draws, modified in place.
+    Returns the measurements by column name.
+    """
+    values[3] = values[3] * t['age_factor'][age] * t['sex_factor'][sex]
+    np.clip(values, t['morph_low'], t['morph_high'], out=values)
+    return dict(zip(MORPHOMETRIC_COLUMNS, values))
+
+def draw_morphometrics(rng, species, age, sex, t, sampler=None):
+    """
+    Draws the four measurements for every row with ``rng``.
+
+    ``sampler`` defaults to ``config.MORPHOMETRICS``. Returns float64 arrays
+    by column name.
+    """
+    sampler = sampler or config.MORPHOMETRICS
+    if sampler == 'correlated':
+        values = correlate(rng.standard_normal((len(MORPHOMETRIC_COLUMNS), len(species))), species, t)
+    elif sampler == 'independent':
+        # One draw per measurement, in the order of earlier releases
+        values = np.stack([rng.normal(t['morph_mean'][i][species], t['morph_sd'][i][species])
+                           for i in range(len(MORPHOMETRIC_COLUMNS))])
+    else:
+        raise ValueError(f"Invalid morphometrics sampler '{sampler}'. Choose from {SAMPLERS}.")
+    return finish_morphometrics(values, age, sex, t)
@@ -0,0 +1,165 @@
+# dirty_birds/parallel.py
+
+"""
+Multi-core sharded generation.
+
+``generate_sharded`` splits ``num_penguins`` into fixed-size shards and runs
+them in a process pool. Every shard draws from its own random streams,
+derived from one root seed with ``np.random.SeedSequence(seed, spawn_key=...)``,
+so a shard's output depends only on (seed, shard index, shard size). Since the
+shard size does not depend on the worker count, the output is byte-identical
+for any ``workers`` value, including a single inline worker.
+
+Tag numbering runs in two passes. First each shard draws only its species and
+tagged flags (``draw_tag_layout``) and reports its per-species tag counts. The
+parent turns those into starting tag numbers, and the second pass generates
+full shards with their tag ranges already fixed. Tag IDs stay unique and
+contiguous per species across shards.
+
+Workers format their own CSV text, so formatting scales with cores too. The
+parent only writes shard outputs in order, spilling resights and mislabels to
+temporary files that are appended after the base rows.
+"""
+
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .config import COLUMNS
+from .csvio import compress_member, ordered_map, resolve_compression
+from .generation import count_tags, draw_tag_layout, generate_penguins_columnar, new_tag_counters
+from .instrument import null_recorder, path_size
+from .params import generation_settings, use_generation_settings
+from .streaming import as_messy_dtypes, iter_chunk_sizes, mess_chunk, mess_plan_for_level
+
+DEFAULT_SHARD_SIZE = 100_000
+
+# Spawn-key slots of each shard's random streams
+_LAYOUT_STREAM = 0
+_BODY_STREAM = 1
+
+def shard_rng(seed, shard_index, stream):
+    """Returns the Generator for one stream of one shard, derived from the root ``seed``."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(shard_index, stream)))
+
+def plan_shards(num_penguins, shard_size):
+    """Returns ``(shard_index, size)`` pairs covering ``num_penguins``."""
+    return list(enumerate(iter_chunk_sizes(num_penguins, shard_size)))
+
+def _count_shard_tags(task):
+    """Pass one: per-species tag counts of a shard."""
+    seed, shard_index, size = task
+    species, tagged = draw_tag_layout(size, shard_rng(seed, shard_index, _LAYOUT_STREAM))
+    return count_tags(species, tagged)
+
+def _to_csv_bytes(df, compression):
+    """Formats rows as (compressed) CSV bytes without a header."""
+    if df is None or len(df) == 0:
+        return b''
+    return compress_member(df.to_csv(header=False, index=False).encode('utf-8'), compression)
+
+def _generate_shard(task):
+    """Pass two: generates, corrupts and formats one shard."""
+    seed, shard_index, size, tag_counters, options = task
+    rng = shard_rng(seed, shard_index, _BODY_STREAM)
+    layout_rng = shard_rng(seed, shard_index, _LAYOUT_STREAM)
+    clean = generate_penguins_columnar(size, rng, tag_counters=dict(tag_counters), layout_rng=layout_rng)
+    clean_bytes = _to_csv_bytes(clean, options['clean_compression'])
+
+    messy, resights, mislabels = mess_chunk(
+        clean, mess_plan_for_level(options['mess_level']), options['duplicate_rate'],
+        options['species_missing_rate'], options['mislabel_rate'], rng)
+    frames = [as_messy_dtypes(f) if f is not None else None for f in (messy, resights, mislabels)]
+    compression = options['messy_compression']
+    return {
+        'clean': clean_bytes,
+        'messy': _to_csv_bytes(frames[0], compression),
+        'resights': _to_csv_bytes(frames[1], compression),
+        'mislabels': _to_csv_bytes(frames[2], compression),
+        'counts': {
+            'clean': size,
+            'resights': 0 if resights is None else len(resights),
+            'mislabels': 0 if mislabels is None else len(mislabels),
+        },
+    }
+
+def generate_sharded(num_penguins, clean_output, messy_output, workers=1, seed=42,
+                     shard_size=DEFAULT_SHARD_SIZE, mess_level='moderate', duplicate_rate=0.45,
+                     species_missing_rate=0.03, mislabel_rate=0.0, compression='infer', recorder=None):
+    """
+    Generates the clean and messy CSVs from independently seeded shards.
+
+    With ``workers`` > 1 shards run in a process pool; with 1 they run inline.
+    Workers also compress their own text when ``compression`` applies (see
+    ``dirty_birds.csvio``), one member per shard and file. Returns a dict
+    with the number of clean rows, messy rows, resights and mislabeled
+    duplicates written.
+
+    Shards run in other processes, so ``recorder`` sees the two passes as
+    whole stages: 'tag_layout' and 'sharded_generation'. Pool workers get
+    the parameters, field months and sampler of the calling process.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1.")
+    mess_plan_for_level(mess_level)  # Validate before starting any workers
+    options = {
+        'mess_level': mess_level,
+        'duplicate_rate': duplicate_rate,
+        'species_missing_rate': species_missing_rate,
+        'mislabel_rate': mislabel_rate,
+        'clean_compression': resolve_compression(clean_output, compression),
+        'messy_compression': resolve_compression(messy_output, compression),
+    }
+    shards = plan_shards(num_penguins, shard_size)
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=use_generation_settings, initargs=(generation_settings(),),
+    ) if workers > 1 else None
+    mapper = (lambda fn, tasks: ordered_map(executor, fn, tasks, 2 * workers)) if executor else map
+
+    recorder = recorder or null_recorder()
+
+    try:
+        # Pass one: size each shard's tag range per species.
+        with recorder.stage('tag_layout', rows_in=num_penguins) as stage:
+            tag_starts = []
+            counters = new_tag_counters()
+            for shard_counts in mapper(_count_shard_tags, [(seed, i, n) for i, n in shards]):
+                tag_starts.append(dict(counters))
+                for species, count in shard_counts.items():
+                    counters[species] += count
+            stage['rows_out'] = num_penguins
+
+        # Pass two: generate shards and write them in order.
+        tasks = [(seed, i, n, tag_starts[i], options) for i, n in shards]
+        counts = {'clean': 0, 'messy': 0, 'resights': 0, 'mislabels': 0}
+        header = pd.DataFrame(columns=COLUMNS).to_csv(index=False).encode('utf-8')
+        with recorder.stage('sharded_generation', rows_in=num_penguins) as stage, \
+                open(clean_output, 'wb') as clean_file, \
+                open(messy_output, 'wb') as messy_file, \
+                tempfile.TemporaryFile('w+b') as resight_spill, \
+                tempfile.TemporaryFile('w+b') as mislabel_spill:
+            clean_file.write(compress_member(header, options['clean_compression']))
+            messy_file.write(compress_member(header, options['messy_compression']))
+            for result in mapper(_generate_shard, tasks):
+                clean_file.write(result['clean'])
+                messy_file.write(result['messy'])
+                resight_spill.write(result['resights'])
+                mislabel_spill.write(result['mislabels'])
+                for key, value in result['counts'].items():
+                    counts[key] += value
+
+            # Resights and mislabels follow all base rows, as in the in-memory pipeline.
+            for spill in (resight_spill, mislabel_spill):
+                spill.seek(0)
+                shutil.copyfileobj(spill, messy_file)
+            stage['rows_out'] = counts['clean'] + counts['resights'] + counts['mislabels']
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    recorder.annotate('sharded_generation', bytes_written=path_size(clean_output) + path_size(messy_output))
+    counts['messy'] = counts['clean'] + counts['resights'] + counts['mislabels']
+    return counts
@@ -0,0 +1,226 @@
+# dirty_birds/params.py
+
+"""
+Species and colony parameters loaded from a JSON or TOML file.
+
+The built-in species and colonies live in ``dirty_birds.config``. A parameter
+file replaces them, so studies with more species or hundreds of colonies need
+no code changes. The file has one table per species and one per colony, in
+the order their integer codes are assigned::
+
+    {
+      "species": {
+        "Adelie": {"tag_prefix": "ADE", "bill_mean": 38.8, "bill_sd": 2.7,
+                   "bill_depth_mean": 18.4, "bill_depth_sd": 1.5,
+                   "flipper_mean": 190, "flipper_sd": 6.5,
+                   "mass_mean": 3700, "mass_sd": 300,
+                   "band": 0.20, "clutch_prob": 0.9}
+      },
+      "colonies": {
+        "Torgersen North": {"island": "Torgersen", "weight": 30, "stress": 0.0}
+      },
+      "clip_bounds": {"bill_length_mm": [32, 60], "body_mass_g": [2500, 6500]}
+    }
+
+``band``, ``clutch_prob`` and ``stress`` are optional, as is a species'
+``correlation``: the 4x4 correlation matrix of bill length, bill depth,
+flipper length and body mass used by the 'correlated' morphometrics sampler
+(uncorrelated if left out). The optional ``clip_bounds`` table sets the
+``[low, high]`` range each measurement is clipped to; columns it leaves out
+keep the built-in ``config.CLIP_BOUNDS``. Body mass bounds must fit the int32
+that compact frames widen ``body_mass_g`` to. ``write_params`` saves the current
+parameters in this layout as a starting point.
+
+``use_params`` installs a parameter set into ``dirty_birds.config`` in place
+and clears the compiled ``parameter_tables``, so every engine picks it up and
+the clean-base cache key changes with it. Worker processes started with
+'spawn' or 'forkserver' import a fresh config, so process pools hand them
+``generation_settings()`` (the parameters, field months and morphometrics
+sampler) to install with ``use_generation_settings``. The tables are compiled once per
+parameter set: per-row lookups stay gathers on code-indexed arrays, whatever
+the number of species and colonies.
+"""
+
+import copy
+import json
+import os
+
+import numpy as np
+
+from . import config
+from .dates import set_field_months
+from .generation import parameter_tables
+from .morphometrics import MORPHOMETRIC_COLUMNS, correlation_factor, set_morphometrics
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+SPECIES_FIELDS = [
+    'bill_mean', 'bill_sd', 'bill_depth_mean', 'bill_depth_sd',
+    'flipper_mean', 'flipper_sd', 'mass_mean', 'mass_sd',
+]
+SPECIES_DEFAULTS = {'band': 0.20, 'clutch_prob': 0.8}
+COLONY_DEFAULTS = {'stress': 0.0}
+PARAM_FORMATS = {'.json': 'json', '.toml': 'toml'}
+# Widest integer dtype compact frames store body_mass_g in
+MASS_LIMITS = np.iinfo(np.int32)
+
+# The config objects a parameter set replaces, with their built-in contents
+PARAM_NAMES = [
+    'SPECIES_INFO', 'TAG_PREFIXES', 'SPECIES_BAND', 'CLUTCH_PROBS', 'MORPHOMETRIC_CORRELATION', 'SPECIES_CODES',
+    'COLONIES', 'COLONY_WEIGHTS', 'COLONY_STRESS', 'COLONY_CODES', 'CLIP_BOUNDS',
+]
+_BUILTIN = {name: copy.deepcopy(getattr(config, name)) for name in PARAM_NAMES}
+
+def current_params():
+    """The species and colony parameters currently in ``dirty_birds.config``, in file layout."""
+    species = {}
+    for name in config.SPECIES_CODES:
+        entry = {'tag_prefix': config.TAG_PREFIXES[name]}
+        entry.update({field: config.SPECIES_INFO[name][field] for field in SPECIES_FIELDS})
+        entry['band'] = config.SPECIES_BAND.get(name, SPECIES_DEFAULTS['band'])
+        entry['clutch_prob'] = config.CLUTCH_PROBS.get(name, SPECIES_DEFAULTS['clutch_prob'])
+        if name in config.MORPHOMETRIC_CORRELATION:
+            entry['correlation'] = copy.deepcopy(config.MORPHOMETRIC_CORRELATION[name])
+        species[name] = entry
+    colonies = {
+        name: {
+            'island': config.COLONIES[name],
+            'weight': config.COLONY_WEIGHTS[name],
+            'stress': config.COLONY_STRESS.get(name, COLONY_DEFAULTS['stress']),
+        }
+        for name in config.COLONY_CODES
+    }
+    clip_bounds = {column: list(config.CLIP_BOUNDS[column]) for column in MORPHOMETRIC_COLUMNS}
+    return {'species': species, 'colonies': colonies, 'clip_bounds': clip_bounds}
+
+def validate_params(params):
+    """Checks a parameter set and returns it with optional fields filled in; raises ValueError."""
+    species = params.get('species')
+    colonies = params.get('colonies')
+    if not species or not colonies:
+        raise ValueError("Parameters need at least one entry under both 'species' and 'colonies'.")
+
+    filled = {'species': {}, 'colonies': {}, 'clip_bounds': {}}
+    for name, entry in species.items():
+        entry = dict(SPECIES_DEFAULTS, **entry)
+        missing = [field for field in ['tag_prefix'] + SPECIES_FIELDS if field not in entry]
+        if missing:
+            raise ValueError(f"Species '{name}' is missing {', '.join(missing)}.")
+        if not 0 <= entry['clutch_prob'] <= 1:
+            raise ValueError(f"Species '{name}' has a clutch_prob outside [0, 1].")
+        if min(entry[field] for field in SPECIES_FIELDS if field.endswith('_sd')) < 0:
+            raise ValueError(f"Species '{name}' has a negative standard deviation.")
+        if 'correlation' in entry:
+            correlation_factor(entry['correlation'], f"species '{name}'")
+        filled['species'][name] = entry
+    prefixes = [entry['tag_prefix'] for entry in filled['species'].values()]
+    if len(set(prefixes)) != len(prefixes):
+        raise ValueError("Every species needs its own tag_prefix, or tag IDs would collide.")
+
+    for name, entry in colonies.items():
+        entry = dict(COLONY_DEFAULTS, **entry)
+        if 'island' not in entry or 'weight' not in entry:
+            raise ValueError(f"Colony '{name}' needs an island and a weight.")
+        if entry['weight'] < 0:
+            raise ValueError(f"Colony '{name}' has a negative weight.")
+        filled['colonies'][name] = entry
+    if sum(entry['weight'] for entry in filled['colonies'].values()) <= 0:
+        raise ValueError("At least one colony needs a positive weight.")
+
+    for column, bounds in params.get('clip_bounds', {}).items():
+        if column not in MORPHOMETRIC_COLUMNS:
+            raise ValueError(f"Unknown clip_bounds column '{column}'. Choose from {MORPHOMETRIC_COLUMNS}.")
+        if not isinstance(bounds, (list, tuple)) or len(bounds) != 2 or not bounds[0] <= bounds[1]:
+            raise ValueError(f"The clip_bounds of '{column}' must be [low, high] with low <= high.")
+        if column == 'body_mass_g' and not (MASS_LIMITS.min <= bounds[0] and bounds[1] <= MASS_LIMITS.max):
+            raise ValueError(f"The clip_bounds of 'body_mass_g' must lie within [{MASS_LIMITS.min}, {MASS_LIMITS.max}].")
+        filled['clip_bounds'][column] = tuple(bounds)
+    return filled
+
+def read_params(path):
+    """Reads a JSON or TOML parameter file (by extension) and validates it."""
+    extension = os.path.splitext(str(path))[1].lower()
+    if extension not in PARAM_FORMATS:
+        raise ValueError(f"Unknown parameter file type '{extension}'. Use .json or .toml.")
+    if PARAM_FORMATS[extension] == 'toml':
+        if tomllib is None:
+            raise ImportError("TOML parameter files need Python 3.11 or newer; use JSON instead.")
+        with open(path, 'rb') as f:
+            params = tomllib.load(f)
+    else:
+        with open(path) as f:
+            params = json.load(f)
+    return validate_params(params)
+
+def write_params(path, params=None):
+    """Writes ``params`` (by default the current ones) to ``path`` as JSON."""
+    with open(path, 'w') as f:
+        json.dump(params or current_params(), f, indent=2)
+
+def _replace(target, values):
+    # In place, so modules that imported the object see the new contents
+    if isinstance(target, list):
+        target[:] = values
+    else:
+        target.clear()
+        target.update(values)
+
+def use_params(params):
+    """
+    Installs a parameter set, given as a dict or a file path, for every engine.
+
+    Returns the validated parameters. Call it before generating; data drawn
+    under one parameter set cannot be appended to under another.
+    """
+    if not isinstance(params, dict):
+        params = read_params(params)
+    params = validate_params(params)
+    species, colonies = params['species'], params['colonies']
+
+    _replace(config.SPECIES_INFO, {
+        name: {field: entry[field] for field in SPECIES_FIELDS} for name, entry in species.items()
+    })
+    _replace(config.TAG_PREFIXES, {name: entry['tag_prefix'] for name, entry in species.items()})
+    _replace(config.SPECIES_BAND, {name: entry['band'] for name, entry in species.items()})
+    _replace(config.CLUTCH_PROBS, {name: entry['clutch_prob'] for name, entry in species.items()})
+    _replace(config.MORPHOMETRIC_CORRELATION, {
+        name: [list(map(float, row)) for row in entry['correlation']]
+        for name, entry in species.items() if 'correlation' in entry
+    })
+    _replace(config.SPECIES_CODES, list(species))
+
+    _replace(config.COLONIES, {name: entry['island'] for name, entry in colonies.items()})
+    _replace(config.COLONY_WEIGHTS, {name: entry['weight'] for name, entry in colonies.items()})
+    _replace(config.COLONY_STRESS, {name: entry['stress'] for name, entry in colonies.items()})
+    _replace(config.COLONY_CODES, list(colonies))
+
+    # Columns the file leaves out keep their built-in bounds
+    _replace(config.CLIP_BOUNDS, dict(_BUILTIN['CLIP_BOUNDS'], **params['clip_bounds']))
+
+    parameter_tables.cache_clear()
+    return params
+
+def reset_params():
+    """Restores the built-in species and colonies of ``dirty_birds.config``."""
+    for name in PARAM_NAMES:
+        _replace(getattr(config, name), copy.deepcopy(_BUILTIN[name]))
+    parameter_tables.cache_clear()
+
+
+# === Worker processes ===
+def generation_settings():
+    """The parameter set, field months and morphometrics sampler in effect, as a picklable dict."""
+    return {
+        'params': current_params(),
+        'field_months': list(config.FIELD_MONTHS),
+        'morphometrics': config.MORPHOMETRICS,
+    }
+
+def use_generation_settings(settings):
+    """Installs ``generation_settings()`` output; used as the initializer of pool workers."""
+    use_params(settings['params'])
+    set_field_months(settings['field_months'])
+    set_morphometrics(settings['morphometrics'])
@@ -0,0 +1,19 @@
+# dirty_birds/rng.py
+
+"""Random stream helpers shared by the vectorized stages."""
+
+import numpy as np
+
+def as_generator(rng=None):
+    """
+    Resolves ``rng`` to a ``np.random.Generator``.
+
+    Accepts an existing Generator, an integer seed or ``SeedSequence``, or None.
+    With None the Generator is seeded from the global ``np.random`` state, so
+    callers that rely on ``np.random.seed(...)`` stay reproducible.
+    """
+    if isinstance(rng, np.random.Generator):
+        return rng
+    if rng is None:
+        return np.random.default_rng(np.random.randint(0, 2**32 - 1))
+    return np.random.default_rng(rng)
@@ -0,0 +1,304 @@
+# dirty_birds/seekable.py
+
+"""
+Seekable, counter-based generation.
+
+Every random value in this engine is a pure function of (seed, row index,
+event, field): a splitmix64 hash of the key is turned into a uniform draw, so
+there is no sequential random state. Any row range of the clean dataset, and
+the messy records derived from it, can be computed directly in O(range) time
+with ``generate_rows``.
+
+Layout of a full run over rows ``0:N`` (and of any sub-range):
+
+- clean output: rows in order;
+- messy output: the corrupted base rows, then their resights ordered by
+  source row, then mislabeled duplicates (those of base rows first, then
+  those of resights).
+
+Regenerating rows ``START:END`` returns exactly the clean rows of that range
+and the messy records whose source row falls inside it, with identical values.
+
+Differences from the sequential engines, so that no row depends on rows
+before it:
+
+- tag numbers come from the row index (``ADE-80000001`` is row 80,000,000),
+  so they are unique and increase in row order but are not contiguous per
+  species;
+- resights, mislabels and species missingness are decided per row
+  (Poisson / Bernoulli draws) with the same expected rates.
+"""
+
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .config import (
+    COLUMNS, HEALTH_LABELS, HEALTH_NOISE_RATE, SEED, TAGGED_PERCENTAGE,
+)
+from .corruption import apply_corruption_plan
+from .dates import (
+    EGG_LAG_DAYS, RESIGHT_CAP_DAYS, RESIGHT_SHIFT_DAYS, cap_dates, egg_dates, field_days,
+    format_dates, parse_capture_dates, snap_to_field_days, study_window,
+)
+from .generation import (
+    SEX_CODES, SPECIES_CODES, classify_health, code_dtype, columns_to_frame, parameter_tables,
+)
+from .mess import AGE_PROMOTION, MORPHOMETRIC_COLUMNS, RESIGHT_HEALTH_LABELS, RESIGHT_SURVIVAL_RATE
+from .morphometrics import correlate, finish_morphometrics
+from .streaming import as_messy_dtypes, mess_plan_for_level
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MISLABEL_SALT = np.uint64(0xD1B54A32D192ED03)
+
+# === Counter-based draws ===
+def _mix64(x):
+    """splitmix64 finaliser, applied elementwise to a uint64 array."""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def _field_key(name):
+    """Stable 64-bit key for a field name (independent of PYTHONHASHSEED)."""
+    return _mix64(np.array([zlib.crc32(name.encode())], dtype=np.uint64))[0]
+
+class CounterStream:
+    """
+    Uniform draws keyed by (seed, row, event) for a batch of rows.
+
+    ``events`` distinguishes several records derived from the same row, such
+    as its resights; base rows use event 0.
+    """
+
+    def __init__(self, seed, rows, events=None):
+        rows = np.asarray(rows, dtype=np.uint64)
+        events = np.zeros(len(rows), dtype=np.uint64) if events is None else np.asarray(events, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            seed_key = _mix64(np.array([seed], dtype=np.uint64) + _GOLDEN)[0]
+            self._keys = _mix64(_mix64(seed_key ^ (rows * _GOLDEN)) + events * _GOLDEN)
+        self.rows = rows
+        self.events = events
+
+    def __len__(self):
+        return len(self._keys)
+
+    def subset(self, index):
+        """Returns the stream restricted to ``index`` (mask or positions)."""
+        stream = CounterStream.__new__(CounterStream)
+        stream._keys = self._keys[index]
+        stream.rows = self.rows[index]
+        stream.events = self.events[index]
+        return stream
+
+    def uniform(self, field):
+        """One uniform [0, 1) draw per row for ``field``."""
+        with np.errstate(over='ignore'):
+            x = _mix64(self._keys ^ _field_key(field))
+        return (x >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+    def normal(self, field):
+        """One standard normal draw per row for ``field`` (Box-Muller)."""
+        u1 = 1.0 - self.uniform(field + ':u1')
+        u2 = self.uniform(field + ':u2')
+        return np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2)
+
+    def integers(self, field, low, high):
+        """One integer in [low, high) per row for ``field``."""
+        return low + (self.uniform(field) * (high - low)).astype(np.int64)
+
+    def categorical(self, field, p):
+        """One category code per row, drawn with probabilities ``p``."""
+        cdf = np.cumsum(p)
+        return np.minimum(np.searchsorted(cdf / cdf[-1], self.uniform(field), side='right'), len(p) - 1)
+
+    def poisson(self, field, lam):
+        """One Poisson(``lam``) count per row, by inverse CDF."""
+        ks = np.arange(64)
+        pmf = np.exp(-lam + ks * np.log(lam) - np.cumsum(np.log(np.maximum(ks, 1)))) if lam > 0 else (ks == 0).astype(float)
+        return np.searchsorted(np.cumsum(pmf), self.uniform(field), side='right')
+
+class KeyedDraws:
+    """
+    ``np.random.Generator``-style adapter over a ``CounterStream``.
+
+    Lets the corruption types from ``corruption.py`` run unchanged: each call
+    must ask for one value per row, and is keyed by ``field`` plus its call
+    number.
+    """
+
+    def __init__(self, stream, field):
+        self.stream = stream
+        self.field = field
+        self.calls = 0
+
+    def _next_field(self, size):
+        if size != len(self.stream):
+            raise ValueError("Counter-based draws must produce exactly one value per row.")
+        self.calls += 1
+        return f"{self.field}:{self.calls}"
+
+    def random(self, size):
+        return self.stream.uniform(self._next_field(size))
+
+    def integers(self, low, high, size):
+        return self.stream.integers(self._next_field(size), low, high)
+
+    def uniform(self, low, high, size):
+        return low + (high - low) * self.stream.uniform(self._next_field(size))
+
+    def normal(self, loc, scale, size):
+        return loc + scale * self.stream.normal(self._next_field(size))
+
+class KeyedSelector:
+    """Corruption-plan selector that keys row choice and new values by row and event."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def rows(self, column, kind, rate, n):
+        return np.flatnonzero(self.stream.uniform(f"mess:{column}:{kind}") < rate)
+
+    def draws(self, column, kind, rows):
+        return KeyedDraws(self.stream.subset(rows), f"mess:{column}:{kind}:value")
+
+
+# === Clean rows ===
+def draw_columns_at(seed, start, end):
+    """Draws the clean columns for rows ``start:end``, keyed by row index."""
+    s = CounterStream(seed, np.arange(start, end, dtype=np.uint64))
+    t = parameter_tables()
+
+    species = s.integers('species', 0, len(SPECIES_CODES)).astype(code_dtype(len(SPECIES_CODES)))
+    colony = s.categorical('colony', t['colony_p']).astype(code_dtype(len(t['colony_p'])))
+    age = s.categorical('age', t['age_p']).astype(np.int8)
+    sexed = s.uniform('sexed') < 0.5
+    sex = np.where(sexed, s.integers('sex', 1, len(SEX_CODES)), 0).astype(np.int8)
+
+    days = field_days()
+    capture_date = days[s.integers('capture_date', 0, len(days))]
+
+    # One keyed standard normal per measurement, so either sampler stays seekable
+    z = np.stack([s.normal(column) for column in MORPHOMETRIC_COLUMNS])
+    if config.MORPHOMETRICS == 'correlated':
+        values = correlate(z, species, t)
+    else:
+        values = t['morph_mean'][:, species] + t['morph_sd'][:, species] * z
+    morphometrics = finish_morphometrics(values, age, sex, t)
+
+    health = classify_health(morphometrics['body_mass_g'], species, colony)
+    noisy = s.uniform('health_noise') < HEALTH_NOISE_RATE
+    other = s.integers('health_other', 0, len(HEALTH_LABELS) - 1).astype(np.int8)
+    health = np.where(noisy, other + (other >= health), health).astype(np.int8)
+
+    egg_date = egg_dates(capture_date, s.integers('egg_offset', 0, EGG_LAG_DAYS + 1), study_window()[0])
+    return {
+        'species': species,
+        'colony': colony,
+        'age': age,
+        'sex': sex,
+        'capture_date': capture_date,
+        **morphometrics,
+        'health': health,
+        'tagged': s.uniform('tagged') < TAGGED_PERCENTAGE,
+        'clutch': s.uniform('clutch') < t['clutch_prob'][species],
+        'egg_date': egg_date,
+    }
+
+def clean_rows(start, end, seed=SEED):
+    """Returns the clean rows ``start:end`` as a DataFrame indexed by row number."""
+    if not 0 <= start <= end:
+        raise ValueError("Row range must satisfy 0 <= start <= end.")
+    columns = draw_columns_at(seed, start, end)
+    tag_numbers = np.where(columns['tagged'], np.arange(start, end, dtype=np.int64) + 1, 0)
+    df = columns_to_frame(columns, tag_numbers)
+    df.index = pd.RangeIndex(start, end)
+    return df
+
+
+# === Messy rows ===
+def _keyed_resights(seed, messy, stream, duplicate_rate):
+    """Resight records of ``messy`` (one Poisson count per tagged row), keyed by row and event."""
+    tagged = np.flatnonzero(messy['tag_id'].notna().to_numpy())
+    counts = stream.subset(tagged).poisson('resight:count', duplicate_rate)
+    source = np.repeat(tagged, counts)
+    # Event j + 1 for the j-th resight of a row (event 0 is the row itself)
+    events = np.arange(len(source)) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+    r = CounterStream(seed, stream.rows[source], events)
+    keep = r.uniform('resight:survival') < RESIGHT_SURVIVAL_RATE
+    source, r = source[keep], r.subset(keep)
+    resights = messy.iloc[source].copy()
+
+    original = parse_capture_dates(resights['capture_date'])
+    valid = ~np.isnat(original)
+    shifted = original + r.integers('resight:shift', RESIGHT_SHIFT_DAYS[0], RESIGHT_SHIFT_DAYS[1] + 1).astype('timedelta64[D]')
+    window = study_window()
+    shifted = cap_dates(shifted, window[1], r.integers('resight:cap', RESIGHT_CAP_DAYS[0], RESIGHT_CAP_DAYS[1] + 1))
+    shifted = snap_to_field_days(shifted, window)
+    capture_date = resights['capture_date'].to_numpy(dtype=object)
+    capture_date[valid] = format_dates(shifted[valid])
+    resights['capture_date'] = capture_date
+
+    for col in MORPHOMETRIC_COLUMNS:
+        drift = 0.98 + 0.07 * r.uniform(f'resight:drift:{col}')
+        resights[col] = np.round(resights[col].to_numpy(dtype=float) * drift, 2)
+    resights['age_group'] = resights['age_group'].replace(AGE_PROMOTION)
+    health = resights['health_status'].to_numpy(dtype=object)
+    redraw = np.array(RESIGHT_HEALTH_LABELS, dtype=object)[r.integers('resight:health', 0, len(RESIGHT_HEALTH_LABELS))]
+    resights['health_status'] = np.where(pd.notna(health), redraw, health)
+    return resights, r
+
+def _keyed_mislabels(seed, frame, stream, mislabel_rate):
+    """Mislabeled duplicates of ``frame`` (one Poisson count per valid record), keyed by source."""
+    valid = np.flatnonzero((frame['tag_id'].notna() & frame['capture_date'].notna()).to_numpy())
+    counts = stream.subset(valid).poisson('mislabel:count', mislabel_rate)
+    source = np.repeat(valid, counts)
+    nth = np.arange(len(source)) - np.repeat(np.cumsum(counts) - counts, counts)
+    # Mislabel events live in their own key space, derived from the source record's event
+    with np.errstate(over='ignore'):
+        events = _mix64(stream.events[source] ^ _MISLABEL_SALT) + nth.astype(np.uint64)
+    m = CounterStream(seed, stream.rows[source], events)
+    mislabels = frame.iloc[source].copy()
+    for col in MORPHOMETRIC_COLUMNS:
+        drift = 0.90 + 0.20 * m.uniform(f'mislabel:drift:{col}')
+        mislabels[col] = np.round(mislabels[col].to_numpy(dtype=float) * drift, 2)
+    return mislabels
+
+def generate_rows(start, end, seed=SEED, mess_level='moderate', duplicate_rate=0.45,
+                  species_missing_rate=0.03, mislabel_rate=0.0):
+    """
+    Computes rows ``start:end`` of the counter-based dataset directly.
+
+    Returns ``(clean, messy)``: the clean rows, and the messy records derived
+    from them (corrupted base rows, their resights, then mislabels). Both
+    frames are indexed by source row number.
+    """
+    plan = mess_plan_for_level(mess_level)
+    clean = clean_rows(start, end, seed=seed)
+    stream = CounterStream(seed, np.arange(start, end, dtype=np.uint64))
+
+    messy = apply_corruption_plan(clean, plan, selector=KeyedSelector(stream))
+    resights, resight_stream = _keyed_resights(seed, messy, stream, duplicate_rate)
+    for frame, s in [(messy, stream), (resights, resight_stream)]:
+        missing = s.uniform('species_missing') < species_missing_rate
+        frame.iloc[np.flatnonzero(missing), frame.columns.get_loc('species')] = np.nan
+
+    parts = [messy, resights]
+    if mislabel_rate > 0:
+        parts += [_keyed_mislabels(seed, messy, stream, mislabel_rate),
+                  _keyed_mislabels(seed, resights, resight_stream, mislabel_rate)]
+    messy = as_messy_dtypes(pd.concat(parts))
+    return clean, messy[COLUMNS]
+
+def parse_row_range(text):
+    """Parses a ``START:END`` row range."""
+    try:
+        start, end = (int(part) for part in text.split(':'))
+    except ValueError:
+        raise ValueError(f"Invalid row range '{text}'. Expected START:END.") from None
+    if not 0 <= start <= end:
+        raise ValueError(f"Invalid row range '{text}'. Expected 0 <= START <= END.")
+    return start, end
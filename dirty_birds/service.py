@@ -0,0 +1,318 @@
+# dirty_birds/service.py
+
+"""
+Long-lived generator service that keeps the package warm between runs.
+
+Starting the generator script costs far more than generating a small
+dataset: most of the time goes to the interpreter, the NumPy and pandas
+imports and compiling the parameter tables. The service pays for that once.
+It listens on a Unix socket or a localhost TCP port and hands each request
+to a pool of worker processes started and warmed up before it listens::
+
+    python -m dirty_birds.service --workers 4
+
+Requests read and write files with the permissions of the user running the
+service, so by default only that user can reach it: the socket is created
+with mode 0600 in ``$XDG_RUNTIME_DIR``, or else in a private (0700)
+``dirty_birds-<uid>`` directory under the temporary directory. A TCP port is
+open to every local user; use it only on single-user machines.
+
+``penguin_client.py`` is the thin, standard-library-only client. It takes the
+generator script's options, so existing commands keep working with only the
+script name changed.
+
+Protocol: the client sends one JSON line ``{"cwd": ..., "options": {...}}``
+holding the script options it was given, by their argparse names. The
+service answers with one JSON line ``{"ok": ..., "log": ..., ...}`` carrying
+the run's progress messages (and ``error`` on failure). For ``options['stream']``
+requests the records follow; the worker collects them while it runs, so they
+are sent in one go once the run has finished, not as they are generated. It
+then closes the connection. Relative paths are resolved against ``cwd``.
+
+Requests run exactly like the script's in-memory mode, with the same
+seeding, so outputs are identical to a script run with the same options.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import signal
+import stat
+import sys
+import tempfile
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .api import DEFAULT_BATCH_SIZE, STREAM_FORMATS, generate, iter_batches, save, write_batches
+from .cache import DEFAULT_CACHE_DIR, BaseCache
+from .config import N_PENGUINS, SEED
+from .csvio import COMPRESSIONS
+from .dates import field_days, set_field_months
+from .formats import FORMATS, output_path
+from .generation import ENGINES, parameter_tables
+from .morphometrics import SAMPLERS, set_morphometrics
+from .params import reset_params, use_params
+
+def default_address():
+    """A Unix socket in the user's runtime directory, or in a private directory under the temporary one."""
+    directory = os.environ.get('XDG_RUNTIME_DIR') or _private_socket_dir()
+    return 'unix://' + os.path.join(directory, 'dirty_birds.sock')
+
+def _private_socket_dir():
+    return os.path.join(tempfile.gettempdir(), f"dirty_birds-{os.getuid()}")
+
+DEFAULT_ADDRESS = os.environ.get('DIRTY_BIRDS_SERVICE') or default_address()
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Options a request may set, with the generator script's defaults
+REQUEST_DEFAULTS = {
+    'mess_level': 'moderate',
+    'num_penguins': N_PENGUINS,
+    'clean_output': 'synthetic_penguins_v0.4.0_clean.csv',
+    'messy_output': 'synthetic_penguins_v0.4.0.csv',
+    'duplicate_rate': 0.45,
+    'species_missing_rate': 0.03,
+    'mislabel_rate': 0.0,
+    'engine': 'columnar',
+    'params': None,
+    'field_months': None,
+    'morphometrics': 'independent',
+    'chunk_size': None,
+    'format': 'csv',
+    'compression': 'infer',
+    'stream': None,
+    'stream_kind': 'messy',
+    'no_cache': False,
+    'seed': SEED,
+}
+REQUEST_CHOICES = {
+    'mess_level': ['none', 'light', 'moderate', 'heavy'],
+    'engine': ENGINES,
+    'morphometrics': SAMPLERS,
+    'format': FORMATS,
+    'compression': COMPRESSIONS,
+    'stream': [None] + STREAM_FORMATS,
+    'stream_kind': ['messy', 'clean'],
+}
+
+def parse_address(address):
+    """Splits ``unix:///PATH`` or ``tcp://HOST:PORT`` into ``('unix', path)`` or ``('tcp', (host, port))``."""
+    if address.startswith('unix://'):
+        return 'unix', address[len('unix://'):]
+    if address.startswith('tcp://'):
+        host, _, port = address[len('tcp://'):].rpartition(':')
+        if host and port.isdigit():
+            return 'tcp', (host, int(port))
+    raise ValueError(f"Invalid service address '{address}'. Use unix:///PATH or tcp://HOST:PORT.")
+
+def build_options(request):
+    """Validates a request and returns its options merged over ``REQUEST_DEFAULTS``, plus its ``cwd``."""
+    if not isinstance(request, dict) or not isinstance(request.get('options', {}), dict):
+        raise ValueError("A request must be a JSON object with an 'options' object.")
+    if not isinstance(request.get('cwd', ''), str):
+        raise ValueError("The request's cwd must be a string.")
+    options = request.get('options', {})
+    unknown = sorted(set(options) - set(REQUEST_DEFAULTS))
+    if unknown:
+        raise ValueError(f"Unsupported option(s) for the service: {', '.join(unknown)}.")
+    options = dict(REQUEST_DEFAULTS, **options)
+    for name, choices in REQUEST_CHOICES.items():
+        if options[name] not in choices:
+            raise ValueError(f"Invalid {name} '{options[name]}'. Choose from {choices}.")
+    if not isinstance(options['num_penguins'], int) or options['num_penguins'] <= 0:
+        raise ValueError("num_penguins must be a positive integer; the service does not stream without end.")
+    if options['chunk_size'] is not None and not options['stream']:
+        raise ValueError("chunk_size sets the batch size of stream requests only.")
+    if options['stream'] and options['engine'] == 'counter':
+        raise ValueError("Stream requests cannot use the counter engine.")
+    options['cwd'] = request.get('cwd') or os.getcwd()
+    return options
+
+def _resolve(options, path):
+    # Paths are relative to the client's directory; messages show them as given
+    return os.path.join(options['cwd'], path)
+
+
+# === Workers ===
+def warm_up():
+    """Compiles the parameter tables and runs one tiny generation, so the first request is fast."""
+    parameter_tables()
+    field_days()
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate(10, seed=SEED, compact=True)
+
+def _generate(options, cache):
+    # Same seeding and calls as the script's in-memory mode
+    np.random.seed(options['seed'])
+    random.seed(options['seed'])
+    mess_options = {name: options[name] for name in
+                    ['mess_level', 'duplicate_rate', 'species_missing_rate', 'mislabel_rate', 'engine']}
+    if options['stream']:
+        batches = iter_batches(options['num_penguins'], batch_size=options['chunk_size'] or DEFAULT_BATCH_SIZE,
+                               kind=options['stream_kind'], seed=options['seed'], **mess_options)
+        out = io.StringIO()
+        rows = write_batches(batches, out, fmt=options['stream'])
+        print(f"Streamed {rows} {options['stream_kind']} records as {options['stream']}.")
+        return {'records': rows}, out.getvalue()
+
+    if options['engine'] == 'counter':
+        print(f"Generating rows 0:{options['num_penguins']} with the counter-based engine...")
+        del mess_options['engine']
+        data = generate(seed=options['seed'], rows=(0, options['num_penguins']), **mess_options)
+    else:
+        data = generate(options['num_penguins'], seed=options['seed'], compact=True, cache=cache, **mess_options)
+    write_options = {'fmt': options['format'], 'compression': options['compression']}
+    result = {}
+    for kind, frame, path in [('clean', data.clean, options['clean_output']),
+                              ('messy', data.messy, options['messy_output'])]:
+        path = output_path(path, options['format'])
+        label = 'clean records' if kind == 'clean' else 'messy records (including resights)'
+        print(f"Saving {len(frame)} {label} to {path}...")
+        target = _resolve(options, path)
+        save(data, target if kind == 'clean' else None, target if kind == 'messy' else None, **write_options)
+        result[kind] = {'rows': len(frame), 'path': path}
+    return result, None
+
+def run_request(options, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Runs one validated request in the calling process.
+
+    Returns ``(header, payload)``: the response header dict and the streamed
+    records as text (None unless streaming). Errors are reported in the header.
+    """
+    log = io.StringIO()
+    payload = None
+    try:
+        with contextlib.redirect_stdout(log):
+            if options['params']:
+                params = use_params(_resolve(options, options['params']))
+                print(f"Loaded {len(params['species'])} species and {len(params['colonies'])} colonies from {options['params']}.")
+            if options['field_months']:
+                set_field_months(options['field_months'])
+            set_morphometrics(options['morphometrics'])
+            cache = None if options['no_cache'] else BaseCache(cache_dir)
+            result, payload = _generate(options, cache)
+            print("✅ Generation complete!")
+        header = dict(result, ok=True)
+    except Exception as error:
+        traceback.print_exc()  # To the service's stderr
+        header = {'ok': False, 'error': f"{type(error).__name__}: {error}"}
+    finally:
+        # Workers serve many requests, so per-request parameters must not leak
+        if options['params']:
+            reset_params()
+        if options['field_months']:
+            set_field_months(range(1, 13))
+        set_morphometrics('independent')
+    header['log'] = log.getvalue()
+    return header, payload
+
+
+# === Server ===
+def _worker_context():
+    # Forking this process could copy locks held by its threads, so workers
+    # fork from a clean server process that has imported the package once
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(['dirty_birds.api', 'dirty_birds.params'])
+    return context
+
+async def _handle(reader, writer, executor, cache_dir):
+    loop = asyncio.get_running_loop()
+    try:
+        line = await reader.readline()
+        try:
+            options = build_options(json.loads(line))
+        except ValueError as error:
+            header, payload = {'ok': False, 'error': str(error), 'log': ''}, None
+        else:
+            header, payload = await loop.run_in_executor(executor, run_request, options, cache_dir)
+        writer.write((json.dumps(header) + '\n').encode('utf-8'))
+        if payload:
+            writer.write(payload.encode('utf-8'))
+        await writer.drain()
+    except ConnectionError:
+        pass  # The client went away
+    finally:
+        writer.close()
+
+def _prepare_socket_dir(directory):
+    # Creates the socket's directory private to this user. The default one
+    # under the shared temporary directory must also be ours and private, so
+    # nobody else can have planted it or a socket in it.
+    if not os.path.isdir(directory):
+        os.makedirs(directory, mode=0o700)
+    if directory == _private_socket_dir():
+        info = os.lstat(directory)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+            raise PermissionError(f"{directory} must be a directory owned by this user with mode 0700.")
+
+async def serve(address=DEFAULT_ADDRESS, workers=DEFAULT_WORKERS, cache_dir=DEFAULT_CACHE_DIR, ready=None):
+    """
+    Serves generation requests on ``address`` until cancelled.
+
+    ``ready``, if given, is called with the listening server once it accepts connections.
+    """
+    kind, target = parse_address(address)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_worker_context(), initializer=warm_up) as executor:
+        # Start and warm every worker before accepting requests
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(executor, os.getpid) for _ in range(workers)])
+        handler = lambda reader, writer: _handle(reader, writer, executor, cache_dir)
+        if kind == 'unix':
+            _prepare_socket_dir(os.path.dirname(os.path.abspath(target)))
+            if os.path.exists(target):
+                os.remove(target)  # Left behind by a previous service
+            umask = os.umask(0o177)  # No window in which others could connect
+            try:
+                server = await asyncio.start_unix_server(handler, path=target)
+            finally:
+                os.umask(umask)
+            os.chmod(target, 0o600)
+        else:
+            server = await asyncio.start_server(handler, host=target[0], port=target[1])
+        try:
+            async with server:
+                if ready is not None:
+                    ready(server)
+                await server.serve_forever()
+        finally:
+            if kind == 'unix' and os.path.exists(target):
+                os.remove(target)
+
+def main(argv=None):
+    """Command-line entry point; returns the process exit code."""
+    parser = argparse.ArgumentParser(description="Dirty Birds: warm generator service for penguin_client.py.")
+    parser.add_argument('--listen', type=str, default=DEFAULT_ADDRESS,
+                        help=f"Address to listen on, unix:///PATH or tcp://HOST:PORT. Default: {DEFAULT_ADDRESS}.")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"Worker processes serving requests concurrently. Default: {DEFAULT_WORKERS}.")
+    parser.add_argument('--cache-dir', type=str, default=DEFAULT_CACHE_DIR,
+                        help=f"Directory of cached clean bases. Default: {DEFAULT_CACHE_DIR}.")
+    args = parser.parse_args(argv)
+    try:
+        parse_address(args.listen)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+
+    print(f"Serving on {args.listen} with {args.workers} worker(s); stop with Ctrl-C.")
+    # Stop on SIGTERM the same way as on Ctrl-C, removing the socket
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(serve(args.listen, workers=args.workers, cache_dir=args.cache_dir))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# dirty_birds/sqlite.py
+
+"""
+Bulk loading of the clean and messy datasets into a SQLite database.
+
+``write_sqlite`` loads each dataset into a table of the same name with the
+text-schema columns, so queries see exactly what the CSV outputs hold
+(corrupted values included). Loading is tuned for one-off bulk writes:
+
+- journal, fsync and locking pragmas are relaxed for the load only;
+- rows go in with ``executemany``, one transaction per ``batch_rows`` rows,
+  converting compact frames to text one batch at a time;
+- indexes on ``tag_id``, ``capture_date``, ``species`` and ``colony_id`` are
+  built after the load, then ``ANALYZE`` updates the planner statistics.
+
+With ``individuals`` an ``individuals`` table is added, with one row per
+tagged bird of the clean dataset. It keeps the bird's first capture and its
+number of messy records, so a resight history is an indexed lookup::
+
+    SELECT m.* FROM individuals i JOIN messy m ON m.tag_id = i.tag_id
+    WHERE i.sightings > 1 ORDER BY m.tag_id, m.capture_date;
+"""
+
+import sqlite3
+
+import pandas as pd
+
+from .compact import is_compact, to_text_frame
+from .config import COLUMNS
+from .formats import NUMBER_COLUMNS
+
+DEFAULT_BATCH_ROWS = 50_000
+# Index name suffix -> indexed columns. The tag_id index also orders each
+# bird's records by date, so a resight history needs no sort.
+INDEXES = {
+    'tag_id': ['tag_id', 'capture_date'],
+    'capture_date': ['capture_date'],
+    'species': ['species'],
+    'colony_id': ['colony_id'],
+}
+
+# Relaxed for the load: a failed load is simply run again
+LOAD_PRAGMAS = {
+    'journal_mode': 'OFF',
+    'synchronous': 'OFF',
+    'locking_mode': 'EXCLUSIVE',
+    'temp_store': 'MEMORY',
+    'cache_size': -256 * 1024,  # KiB
+}
+
+def column_type(column):
+    """The declared SQLite type of a text-schema column."""
+    if column == 'body_mass_g':
+        return 'INTEGER'
+    # Numeric affinities still keep any non-numeric text as text
+    return 'REAL' if column in NUMBER_COLUMNS else 'TEXT'
+
+def _create_table(db, table):
+    columns = ', '.join(f"{column} {column_type(column)}" for column in COLUMNS)
+    db.execute(f"DROP TABLE IF EXISTS {table}")
+    db.execute(f"CREATE TABLE {table} ({columns})")
+
+def _rows(frame):
+    """The rows of a text-schema frame as tuples, with None for missing values."""
+    frame = frame[COLUMNS].astype(object)
+    return frame.where(frame.notna(), None).itertuples(index=False, name=None)
+
+def load_table(db, table, frame, batch_rows=DEFAULT_BATCH_ROWS):
+    """Replaces ``table`` with the rows of ``frame`` (text schema or compact); returns the row count."""
+    _create_table(db, table)
+    insert = f"INSERT INTO {table} VALUES ({', '.join('?' * len(COLUMNS))})"
+    compact = is_compact(frame)
+    for start in range(0, len(frame), batch_rows):
+        batch = frame.iloc[start:start + batch_rows]
+        if compact:
+            batch = to_text_frame(batch)
+        with db:
+            db.executemany(insert, _rows(batch))
+    return len(frame)
+
+def create_indexes(db, table):
+    """Builds the ``INDEXES`` of ``table``."""
+    for name, columns in INDEXES.items():
+        db.execute(f"CREATE INDEX IF NOT EXISTS {table}_{name} ON {table} ({', '.join(columns)})")
+
+def create_individuals(db):
+    """Builds the ``individuals`` table from the loaded ``clean`` (and ``messy``, if present) tables."""
+    db.execute("DROP TABLE IF EXISTS individuals")
+    db.execute(
+        "CREATE TABLE individuals (tag_id TEXT PRIMARY KEY, species TEXT, sex TEXT, colony_id TEXT,"
+        " island TEXT, first_capture TEXT, sightings INTEGER)"
+    )
+    has_messy = db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messy'").fetchone()
+    # The messy tag_id index makes the correlated count a lookup per bird
+    sightings = "(SELECT COUNT(*) FROM messy m WHERE m.tag_id = c.tag_id)" if has_messy else "NULL"
+    with db:
+        db.execute(
+            "INSERT INTO individuals SELECT tag_id, species, sex, colony_id, island, capture_date,"
+            f" {sightings} FROM clean c WHERE tag_id IS NOT NULL"
+        )
+    return db.execute("SELECT COUNT(*) FROM individuals").fetchone()[0]
+
+def write_sqlite(path, clean=None, messy=None, individuals=False, batch_rows=DEFAULT_BATCH_ROWS):
+    """
+    Loads the ``clean`` and ``messy`` frames into the SQLite database at ``path``.
+
+    Either frame may be None to skip it; existing tables of the same name are
+    replaced and other tables are left alone. ``individuals`` needs ``clean``.
+    Returns the number of rows written per table.
+    """
+    if individuals and clean is None:
+        raise ValueError("The individuals table is built from the clean dataset.")
+    counts = {}
+    db = sqlite3.connect(path)
+    try:
+        for name, value in LOAD_PRAGMAS.items():
+            db.execute(f"PRAGMA {name} = {value}")
+        for table, frame in [('clean', clean), ('messy', messy)]:
+            if frame is not None:
+                counts[table] = load_table(db, table, frame, batch_rows=batch_rows)
+        for table in counts:
+            create_indexes(db, table)
+        if individuals:
+            counts['individuals'] = create_individuals(db)
+        db.execute("ANALYZE")
+        db.commit()
+    finally:
+        db.close()
+    return counts
+
+def read_table(path, table):
+    """Reads ``table`` back from the database at ``path`` as a text-schema DataFrame."""
+    db = sqlite3.connect(path)
+    try:
+        return pd.read_sql_query(f"SELECT * FROM {table} ORDER BY rowid", db)
+    finally:
+        db.close()
@@ -0,0 +1,138 @@
+# dirty_birds/streaming.py
+
+"""
+Bounded-memory generation straight to disk.
+
+``stream_to_disk`` generates, corrupts and appends the clean and messy
+outputs in fixed-size chunks, so peak memory depends on ``chunk_size`` and not
+on the number of penguins.
+
+The stages that sample across the whole dataset are made chunk-compatible
+while keeping their global rates:
+
+- Resights and mislabeled duplicates give every candidate row an independent
+  Poisson(rate) number of events (see ``sample_sources``). Their records are
+  spilled to temporary files and appended after all base rows, matching the
+  in-memory row order (base rows, then resights, then mislabels).
+- Species missingness removes each row's species independently with
+  probability ``species_missing_rate`` instead of an exact global count.
+"""
+
+import shutil
+import tempfile
+
+import pandas as pd
+
+from .config import ERROR_RATES
+from .corruption import apply_corruption_plan, default_corruption_plan
+from .csvio import open_csv_output
+from .generation import generate_penguins_columnar, generate_penguins_rowwise, new_tag_counters
+from .instrument import null_recorder, path_size
+from .mess import MORPHOMETRIC_COLUMNS, build_mislabel_rows, build_resight_rows
+from .rng import as_generator
+
+def iter_chunk_sizes(num_penguins, chunk_size):
+    """Yields the row count of each chunk needed to cover ``num_penguins``."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be a positive integer.")
+    for start in range(0, num_penguins, chunk_size):
+        yield min(chunk_size, num_penguins - start)
+
+def as_messy_dtypes(df):
+    """Keeps morphometrics as floats so every messy chunk formats the same way."""
+    return df.astype({col: float for col in MORPHOMETRIC_COLUMNS})
+
+def mess_plan_for_level(mess_level):
+    """Returns the corruption plan for ``mess_level`` ('none' gives an empty plan)."""
+    if mess_level == 'none':
+        return {}
+    if mess_level not in ERROR_RATES:
+        raise ValueError("Invalid mess_level. Choose from 'none', 'light', 'moderate', 'heavy'.")
+    return default_corruption_plan(ERROR_RATES[mess_level])
+
+def mess_chunk(chunk, plan, duplicate_rate, species_missing_rate, mislabel_rate, rng, recorder=None):
+    """
+    Runs the messy stages on one chunk of clean rows, corrupting it in place.
+
+    Returns ``(messy, resights, mislabels)``; the last two are None when the
+    chunk produced no such records. Stages are timed on ``recorder`` if given.
+    """
+    recorder = recorder or null_recorder()
+    with recorder.stage('inject_mess', rows_in=len(chunk)) as stage:
+        messy = apply_corruption_plan(chunk, plan, rng=rng, inplace=True)
+        stage['rows_out'] = len(messy)
+    with recorder.stage('resight', rows_in=len(messy)) as stage:
+        resights = build_resight_rows(messy, duplicate_rate=duplicate_rate, rng=rng, per_row=True)
+        batch = [messy] if resights is None else [messy, resights]
+        rows = sum(len(frame) for frame in batch)
+        stage['rows_out'] = rows
+    with recorder.stage('species_missingness', rows_in=rows) as stage:
+        for frame in batch:
+            apply_corruption_plan(frame, {'species': {'missing': species_missing_rate}}, rng=rng, inplace=True)
+        stage['rows_out'] = rows
+    mislabels = None
+    if mislabel_rate > 0:
+        with recorder.stage('mislabels', rows_in=rows) as stage:
+            mislabels = build_mislabel_rows(pd.concat(batch), mislabel_rate=mislabel_rate, rng=rng, per_row=True)
+            stage['rows_out'] = rows + (0 if mislabels is None else len(mislabels))
+    return messy, resights, mislabels
+
+def stream_to_disk(num_penguins, clean_output, messy_output, chunk_size,
+                   mess_level='moderate', duplicate_rate=0.45, species_missing_rate=0.03,
+                   mislabel_rate=0.0, engine='columnar', rng=None, compression='infer', recorder=None):
+    """
+    Generates the clean and messy CSVs chunk by chunk with flat peak memory.
+
+    ``compression`` ('infer', 'none', 'gzip', 'bz2' or 'xz') compresses the
+    outputs block by block (see ``dirty_birds.csvio``). Per-chunk stages are
+    timed on ``recorder`` and summed by name.
+
+    Returns a dict with the number of clean rows, messy rows, resights and
+    mislabeled duplicates written.
+    """
+    plan = mess_plan_for_level(mess_level)
+    rng = as_generator(rng)
+    recorder = recorder or null_recorder()
+    tag_counters = new_tag_counters()
+    counts = {'clean': 0, 'messy': 0, 'resights': 0, 'mislabels': 0}
+
+    with open_csv_output(clean_output, compression) as clean_file, \
+            open_csv_output(messy_output, compression) as messy_file, \
+            tempfile.TemporaryFile('w+', newline='') as resight_spill, \
+            tempfile.TemporaryFile('w+', newline='') as mislabel_spill:
+        for i, n in enumerate(iter_chunk_sizes(num_penguins, chunk_size)):
+            with recorder.stage('generation', rows_in=n) as stage:
+                if engine == 'rowwise':
+                    chunk = generate_penguins_rowwise(n, tag_counters=tag_counters)
+                else:
+                    chunk = generate_penguins_columnar(n, rng, tag_counters=tag_counters)
+                stage['rows_out'] = len(chunk)
+            with recorder.stage('write_clean', rows_in=n) as stage:
+                chunk.to_csv(clean_file, header=i == 0, index=False)
+                stage['rows_out'] = n
+            counts['clean'] += n
+
+            # The clean chunk is already on disk, so it can be corrupted in place.
+            messy, resights, mislabels = mess_chunk(
+                chunk, plan, duplicate_rate, species_missing_rate, mislabel_rate, rng, recorder=recorder)
+
+            with recorder.stage('write_messy', rows_in=len(messy)) as stage:
+                as_messy_dtypes(messy).to_csv(messy_file, header=i == 0, index=False)
+                counts['messy'] += len(messy)
+                for frame, spill, key in [(resights, resight_spill, 'resights'), (mislabels, mislabel_spill, 'mislabels')]:
+                    if frame is not None and len(frame):
+                        as_messy_dtypes(frame).to_csv(spill, header=False, index=False)
+                        counts[key] += len(frame)
+                        counts['messy'] += len(frame)
+                        stage['rows_in'] += len(frame)
+                stage['rows_out'] = stage['rows_in']
+
+        # Resights and mislabels follow all base rows, as in the in-memory pipeline.
+        with recorder.stage('append_spills'):
+            for spill in (resight_spill, mislabel_spill):
+                spill.seek(0)
+                shutil.copyfileobj(spill, messy_file)
+
+    recorder.annotate('write_clean', bytes_written=path_size(clean_output))
+    recorder.annotate('write_messy', bytes_written=path_size(messy_output))
+    return counts
@@ -0,0 +1,114 @@
+# dirty_birds/truth.py
+
+"""
+Ground truth linking the messy dataset back to the clean one.
+
+A ``GroundTruth`` follows the messy frame through the mess stages and keeps
+three arrays with one entry per messy row:
+
+- ``source_row``: the position of the row's clean source record;
+- ``origin``: how the row arose, as an index into ``ORIGINS`` (the original
+  record, a resight or a mislabeled duplicate);
+- ``corruption``: a uint32 bitmask with the ``corruption_bit`` of every
+  (column, corruption type) that changed one of the row's cells. A later
+  step can happen to restore the clean value, so a set bit means the cell
+  was corrupted, not that it still differs.
+
+Resights and mislabels start from a copy of their source messy row, so they
+inherit its bits. Their deliberate changes (shifted dates, drifted
+measurements, promoted ages) are implied by the origin and are not corruption.
+
+``write_truth`` stores the arrays as a directory of ``.npy`` files plus a
+``truth.json`` describing the bits. ``read_truth`` memory-maps them, so a
+scorer can compare a cleaned file to the clean one with plain array
+operations::
+
+    truth = read_truth('messy.truth')
+    corrupted_mass = (truth.corruption & column_mask('body_mass_g')) != 0
+    expected = clean['body_mass_g'].to_numpy()[truth.source_row]
+"""
+
+import json
+import os
+
+import numpy as np
+
+from .corruption import CORRUPTION_BITS, changed_cells, corruption_bit
+
+ORIGINS = ['original', 'resight', 'mislabel']
+TRUTH_SUFFIX = '.truth'
+TRUTH_FILE = 'truth.json'
+TRUTH_VERSION = 1
+TRUTH_ARRAYS = ['source_row', 'origin', 'corruption']
+
+class GroundTruth:
+    """Per-row linkage and corruption bits for a messy frame built from ``num_rows`` clean rows."""
+
+    def __init__(self, num_rows=0):
+        self.reset(num_rows)
+
+    def reset(self, num_rows):
+        """Starts over with ``num_rows`` untouched original rows."""
+        self.source_row = np.arange(num_rows, dtype=np.int64)
+        self.origin = np.zeros(num_rows, dtype=np.uint8)
+        self.corruption = np.zeros(num_rows, dtype=np.uint32)
+
+    def __len__(self):
+        return len(self.source_row)
+
+    def extend(self, positions, origin):
+        """Appends rows copied from the messy rows at ``positions`` with the given ``origin`` name."""
+        positions = np.asarray(positions, dtype=np.int64)
+        self.source_row = np.concatenate([self.source_row, self.source_row[positions]])
+        self.origin = np.concatenate([self.origin, np.full(len(positions), ORIGINS.index(origin), dtype=np.uint8)])
+        self.corruption = np.concatenate([self.corruption, self.corruption[positions]])
+
+    def mark(self, column, kind, positions, before, after):
+        """Sets the ``(column, kind)`` bit on the rows at ``positions`` whose value changed from ``before`` to ``after``."""
+        positions = np.asarray(positions, dtype=np.int64)
+        changed = changed_cells(np.asarray(before, dtype=object), np.asarray(after, dtype=object))
+        self.corruption[positions[changed]] |= corruption_bit(column, kind)
+
+def column_mask(column):
+    """The OR of every corruption bit of ``column``."""
+    mask = np.uint32(0)
+    for bit_column, kind in CORRUPTION_BITS:
+        if bit_column == column:
+            mask |= corruption_bit(bit_column, kind)
+    return mask
+
+def truth_path(messy_output):
+    """The ground-truth directory kept next to ``messy_output``."""
+    return str(messy_output) + TRUTH_SUFFIX
+
+def write_truth(truth, path):
+    """Writes ``truth`` to the directory ``path``; ``source_row`` is int32 when it fits."""
+    os.makedirs(path, exist_ok=True)
+    source_row = truth.source_row
+    if len(source_row) and source_row.max() < 2**31:
+        source_row = source_row.astype(np.int32)
+    arrays = {'source_row': source_row, 'origin': truth.origin, 'corruption': truth.corruption}
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+    meta = {
+        'format': 'dirty_birds.truth',
+        'version': TRUTH_VERSION,
+        'rows': len(truth),
+        'origins': ORIGINS,
+        'bits': [{'bit': i, 'column': column, 'kind': kind} for i, (column, kind) in enumerate(CORRUPTION_BITS)],
+    }
+    with open(os.path.join(path, TRUTH_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+def read_truth(path, mmap_mode='r'):
+    """Loads a ground-truth directory; the arrays are memory-mapped unless ``mmap_mode`` is None."""
+    with open(os.path.join(path, TRUTH_FILE)) as f:
+        meta = json.load(f)
+    if meta.get('format') != 'dirty_birds.truth' or meta.get('version') != TRUTH_VERSION:
+        raise ValueError(f"{path} is not a version {TRUTH_VERSION} ground-truth directory.")
+    if [(b['column'], b['kind']) for b in meta['bits']] != CORRUPTION_BITS:
+        raise ValueError(f"{path} was written with a different corruption bit layout.")
+    truth = GroundTruth()
+    for name in TRUTH_ARRAYS:
+        setattr(truth, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode))
+    return truth
@@ -0,0 +1,151 @@
+# dirty_birds/variants.py
+
+"""
+Multi-variant fan-out: one clean base, many messy variants.
+
+``fan_out`` generates the clean population once and builds every messy
+variant in a grid of mess configurations concurrently. The grid spans mess
+levels, duplicate rates, mislabel rates and species-missing rates.
+
+- The compact clean base is handed to each pool worker once, through the pool
+  initializer, and shared read-only by all of that worker's variants. The
+  initializer also installs the caller's parameters, field months and sampler.
+- Each variant is seeded from the root seed and its own name, so its data does
+  not depend on the rest of the grid or on which worker built it.
+- The clean output, every variant's output and a ``manifest.json`` listing
+  them are written to one output directory.
+"""
+
+import itertools
+import json
+import os
+import random
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .cache import cached_base
+from .compact import to_text_frame
+from .config import SEED
+from .formats import output_path, write_frame
+from .instrument import null_recorder, path_size
+from .mess import (
+    duplicate_penguin_rows_for_resight,
+    inject_mess,
+    inject_mislabeled_duplicates,
+    inject_species_missingness,
+)
+from .params import generation_settings, use_generation_settings
+from .streaming import mess_plan_for_level
+
+MANIFEST_FILE = 'manifest.json'
+
+def variant_name(config):
+    """A file-safe name describing one mess configuration."""
+    return (f"{config['mess_level']}_dup{config['duplicate_rate']:g}"
+            f"_mis{config['mislabel_rate']:g}_spm{config['species_missing_rate']:g}")
+
+def expand_grid(mess_levels=('moderate',), duplicate_rates=(0.45,), mislabel_rates=(0.0,),
+                species_missing_rates=(0.03,)):
+    """Returns one config dict per combination of the given values, in grid order."""
+    grid = []
+    for level, dup, mis, spm in itertools.product(mess_levels, duplicate_rates, mislabel_rates, species_missing_rates):
+        mess_plan_for_level(level)  # Validate
+        config = {'mess_level': level, 'duplicate_rate': dup, 'mislabel_rate': mis, 'species_missing_rate': spm}
+        config['name'] = variant_name(config)
+        grid.append(config)
+    names = [c['name'] for c in grid]
+    if len(set(names)) != len(names):
+        raise ValueError("The variant grid contains duplicate configurations.")
+    return grid
+
+def variant_seed(seed, name):
+    """Derives a variant's 32-bit seed from the root ``seed`` and its ``name``."""
+    return int(np.random.SeedSequence([seed, zlib.crc32(name.encode('utf-8'))]).generate_state(1)[0])
+
+# The clean base shared by every variant a worker builds
+_BASE = None
+
+def _init_worker(base, settings=None):
+    global _BASE
+    _BASE = base
+    if settings is not None:
+        use_generation_settings(settings)
+
+def build_variant(base, config, seed):
+    """Builds one messy variant from the compact clean ``base``."""
+    # Species missingness draws from NumPy's global generator
+    np.random.seed(seed)
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    messy = to_text_frame(base)
+    messy = inject_mess(messy, mess_level=config['mess_level'], rng=rng, inplace=True)
+    messy = duplicate_penguin_rows_for_resight(messy, duplicate_rate=config['duplicate_rate'], rng=rng)
+    messy = inject_species_missingness(messy, missing_rate=config['species_missing_rate'])
+    return inject_mislabeled_duplicates(messy, mislabel_rate=config['mislabel_rate'], rng=rng)
+
+def _run_variant(task):
+    config, seed, path, fmt, compression = task
+    messy = build_variant(_BASE, config, seed)
+    write_frame(messy, path, fmt, compression=compression)
+    return len(messy)
+
+def fan_out(output_dir, grid, num_penguins, seed=SEED, workers=1, fmt='csv', compression='infer',
+            recorder=None, cache=None):
+    """
+    Writes the clean base and one messy output per config in ``grid`` to ``output_dir``.
+
+    ``grid`` is a list of configs as returned by ``expand_grid``. Variants are
+    built in a pool of ``workers`` processes (inline when 1). Returns the
+    manifest, which is also saved as ``manifest.json`` in ``output_dir``.
+    ``recorder`` sees 'generation', 'write_clean' and one 'variants' stage.
+    The clean base comes from ``cache`` (a ``dirty_birds.cache.BaseCache``) when given.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1.")
+    recorder = recorder or null_recorder()
+    os.makedirs(output_dir, exist_ok=True)
+    with recorder.stage('generation', rows_in=num_penguins) as stage:
+        base, stage['cache_hit'] = cached_base(num_penguins, seed, cache)
+        stage['rows_out'] = len(base)
+    extension = '.csv' + {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz'}.get(compression, '')
+
+    clean_path = output_path(os.path.join(output_dir, 'clean' + extension), fmt)
+    with recorder.stage('write_clean', rows_in=len(base)) as stage:
+        write_frame(base, clean_path, fmt, invalid_columns=False, compression=compression)
+        stage['rows_out'] = len(base)
+        stage['bytes_written'] = path_size(clean_path)
+
+    tasks = []
+    for config in grid:
+        path = output_path(os.path.join(output_dir, config['name'] + extension), fmt)
+        tasks.append((config, variant_seed(seed, config['name']), path, fmt, compression))
+
+    with recorder.stage('variants', rows_in=len(base) * len(tasks)) as stage:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(base, generation_settings())) as executor:
+                rows = list(executor.map(_run_variant, tasks))
+        else:
+            _init_worker(base)
+            try:
+                rows = [_run_variant(task) for task in tasks]
+            finally:
+                _init_worker(None)
+        stage['rows_out'] = sum(rows)
+        stage['bytes_written'] = sum(path_size(task[2]) for task in tasks)
+
+    manifest = {
+        'seed': seed,
+        'num_penguins': num_penguins,
+        'format': fmt,
+        'clean': {'path': os.path.basename(clean_path), 'rows': len(base)},
+        'variants': [
+            dict(config, seed=task[1], path=os.path.basename(task[2]), rows=n)
+            for config, task, n in zip(grid, tasks, rows)
+        ],
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
@@ -0,0 +1,126 @@
+# penguin_client.py
+
+"""
+Thin client for the warm generator service (``python -m dirty_birds.service``).
+
+Takes the same options as ``penguin_synthetic_generator_v0.4.0.py`` for
+in-memory and ``--stream`` runs, so a command only needs the script name
+swapped. It imports nothing but the standard library, so a call costs a
+socket round trip instead of an interpreter full of NumPy and pandas.
+
+If no service is listening, the client runs the generator script itself
+with the same arguments.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+
+def default_address():
+    """The service's default socket; kept in step with ``dirty_birds.service.default_address``."""
+    directory = os.environ.get('XDG_RUNTIME_DIR') or os.path.join(tempfile.gettempdir(), f"dirty_birds-{os.getuid()}")
+    return 'unix://' + os.path.join(directory, 'dirty_birds.sock')
+
+DEFAULT_ADDRESS = os.environ.get('DIRTY_BIRDS_SERVICE') or default_address()
+GENERATOR_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'penguin_synthetic_generator_v0.4.0.py')
+
+def connect(address):
+    """Opens a socket to ``unix:///PATH`` or ``tcp://HOST:PORT``."""
+    if address.startswith('unix://'):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        target = address[len('unix://'):]
+    elif address.startswith('tcp://'):
+        host, _, port = address[len('tcp://'):].rpartition(':')
+        sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+        target = (host.strip('[]'), int(port))
+    else:
+        raise ValueError(f"Invalid service address '{address}'. Use unix:///PATH or tcp://HOST:PORT.")
+    try:
+        sock.connect(target)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def request(address, options, out=None):
+    """
+    Sends one generation request and waits for it to finish.
+
+    Progress messages go to stdout, or to stderr when streaming, in which
+    case the records are copied to ``out`` (stdout by default). Returns the
+    response header.
+    """
+    out = out or sys.stdout.buffer
+    with connect(address) as sock:
+        sock.sendall((json.dumps({'cwd': os.getcwd(), 'options': options}) + '\n').encode('utf-8'))
+        reader = sock.makefile('rb')
+        header = json.loads(reader.readline())
+        log = sys.stderr if options.get('stream') else sys.stdout
+        log.write(header.get('log', ''))
+        log.flush()
+        for block in iter(lambda: reader.read(1 << 16), b''):
+            out.write(block)
+        out.flush()
+    return header
+
+def build_parser():
+    """The generator script's options that the service supports; unset ones are left to its defaults."""
+    parser = argparse.ArgumentParser(
+        description="Dirty Birds: client for the warm generator service.",
+        argument_default=argparse.SUPPRESS,
+    )
+    parser.add_argument('--mess-level', type=str, choices=['none', 'light', 'moderate', 'heavy'],
+                        help="The level of messiness to inject into the data. Default: 'moderate'.")
+    parser.add_argument('--num-penguins', type=int, help="The base number of penguins to generate.")
+    parser.add_argument('--clean-output', type=str, help="Filename for the clean output CSV.")
+    parser.add_argument('--messy-output', type=str, help="Filename for the messy output CSV.")
+    parser.add_argument('--duplicate-rate', type=float, help="Proportion of tagged penguins to resight. Default: 0.45")
+    parser.add_argument('--species-missing-rate', type=float,
+                        help="Proportion of records to have their species value removed. Default: 0.03")
+    parser.add_argument('--mislabel-rate', type=float,
+                        help="Proportion of records to create as mislabeled duplicates. Default: 0.0")
+    parser.add_argument('--engine', type=str, choices=['columnar', 'rowwise', 'counter'],
+                        help="Clean generation engine. Default: 'columnar'.")
+    parser.add_argument('--params', type=str, help="JSON or TOML file of species and colony parameters.")
+    parser.add_argument('--field-months', type=str, help="Months in which birds are captured, e.g. '10-3'.")
+    parser.add_argument('--morphometrics', type=str, choices=['independent', 'correlated'],
+                        help="Morphometrics sampler. Default: 'independent'.")
+    parser.add_argument('--chunk-size', type=int, help="Batch size of --stream output.")
+    parser.add_argument('--format', type=str, choices=['csv', 'parquet', 'feather', 'npy'],
+                        help="Output format. Default: 'csv'.")
+    parser.add_argument('--compression', type=str, choices=['infer', 'none', 'gzip', 'bz2', 'xz'],
+                        help="CSV compression. Default: 'infer'.")
+    parser.add_argument('--stream', type=str, choices=['ndjson', 'csv'],
+                        help="Write the records to stdout instead of to files.")
+    parser.add_argument('--stream-kind', type=str, choices=['messy', 'clean'],
+                        help="Records to stream. Default: 'messy'.")
+    parser.add_argument('--no-cache', action='store_true', help="Always generate the clean base.")
+    parser.add_argument('--seed', type=int, help="Root random seed. Default: 42.")
+    parser.add_argument('--service', type=str, default=DEFAULT_ADDRESS,
+                        help=f"Service address, unix:///PATH or tcp://HOST:PORT. Default: {DEFAULT_ADDRESS}.")
+    return parser
+
+def main(argv=None):
+    """Command-line entry point; returns the process exit code."""
+    argv = sys.argv[1:] if argv is None else argv
+    args = vars(build_parser().parse_args(argv))
+    address = args.pop('service')
+    try:
+        header = request(address, args)
+    except (FileNotFoundError, ConnectionRefusedError):
+        # No service running: fall back to the script, minus the client-only option
+        script_args = [a for i, a in enumerate(argv)
+                       if a != '--service' and not a.startswith('--service=') and (i == 0 or argv[i - 1] != '--service')]
+        print(f"No generator service at {address}; running the script directly.", file=sys.stderr)
+        sys.stdout.flush()
+        os.execv(sys.executable, [sys.executable, GENERATOR_SCRIPT] + script_args)
+    if not header['ok']:
+        print(f"Error: {header['error']}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,392 +3,251 @@
 # Version: v0.4.0
 
 import numpy as np
-import pandas as pd
+import os
 import random
-from datetime import datetime, timedelta
+import sys
 import argparse
+import asyncio
+import contextlib
+
+from dirty_birds.api import DEFAULT_BATCH_SIZE, STREAM_FORMATS, generate, iter_batches, save, write_batches
+from dirty_birds.append import append_season, save_state, state_path
+from dirty_birds.cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, BaseCache
+from dirty_birds.config import N_PENGUINS, SEED
+from dirty_birds.csvio import COMPRESSIONS
+from dirty_birds.dates import parse_months, parse_season, set_field_months
+from dirty_birds.feed import DEFAULT_RATE, run_feed
+from dirty_birds.formats import FORMATS, output_path
+from dirty_birds.generation import ENGINES
+from dirty_birds.instrument import StageRecorder, null_recorder, path_size
+from dirty_birds.morphometrics import SAMPLERS, set_morphometrics
+from dirty_birds.params import use_params
+from dirty_birds.parallel import DEFAULT_SHARD_SIZE, generate_sharded
+from dirty_birds.seekable import parse_row_range
+from dirty_birds.sqlite import write_sqlite
+from dirty_birds.streaming import stream_to_disk
+from dirty_birds.truth import GroundTruth, truth_path, write_truth
+from dirty_birds.variants import expand_grid, fan_out
+
+# === Output ===
+def save_dataset(data, args, write_options):
+    """Writes the clean and then the messy frame of ``data`` to the requested outputs."""
+    clean_output = output_path(args.clean_output, args.format)
+    print(f"Saving {len(data.clean)} clean records to {clean_output}...")
+    save(data, clean_output, None, **write_options)
+
+    messy_output = output_path(args.messy_output, args.format)
+    print(f"Saving {len(data.messy)} messy records (including resights) to {messy_output}...")
+    save(data, None, messy_output, **write_options)
 
-# === Configuration ===
-N_PENGUINS = 4500
-TAGGED_PERCENTAGE = 0.65
-COLONIES = {
-    'Biscoe West': 'Biscoe',
-    'Dream South': 'Dream',
-    'Torgersen North': 'Torgersen',
-    'Cormorant East': 'Cormorant',
-    'Shortcut Point': 'Shortcut'
-}
-SPECIES_INFO = {
-    'Adelie': {'bill_mean': 38.8, 'bill_sd': 2.7, 'bill_depth_mean': 18.4, 'bill_depth_sd': 1.5, 'flipper_mean': 190, 'flipper_sd': 6.5, 'mass_mean': 3700, 'mass_sd': 300},
-    'Chinstrap': {'bill_mean': 48.8, 'bill_sd': 3.3, 'bill_depth_mean': 18.5, 'bill_depth_sd': 1.6, 'flipper_mean': 196, 'flipper_sd': 7, 'mass_mean': 3700, 'mass_sd': 320},
-    'Gentoo': {'bill_mean': 47.5, 'bill_sd': 3.0, 'bill_depth_mean': 14.8, 'bill_depth_sd': 1.2, 'flipper_mean': 217, 'flipper_sd': 6, 'mass_mean': 5000, 'mass_sd': 400}
-}
-AGE_GROUPS = ['Chick', 'Juvenile', 'Adult']
-SEXES = ['Male', 'Female']
-
-# === Helper Functions ===
-def generate_tag(species, tag_counters):
-    """Generates a unique tag ID for a penguin and increments the species counter."""
-    species_prefix = {'Adelie': 'ADE', 'Chinstrap': 'CHN', 'Gentoo': 'GEN'}[species]
-    number = tag_counters[species]
-    tag_counters[species] += 1
-    return f"{species_prefix}-{number:04d}"
-
-def random_capture_date():
-    # Set seeds here if needed for this specific function, but global is fine for now.
-    """
-    Generates a biologically plausible capture date between October 2019 and December 2024,
-    respecting austral summer field season boundaries.
-    """
-    season_start = datetime(2019, 10, 1)
-    season_end = datetime(2024, 12, 31)
-    delta_days = (season_end - season_start).days
-    random_offset = random.randint(0, delta_days)
-    return season_start + timedelta(days=random_offset)
-
-def inject_mess(df, mess_level='moderate'):
-    """
-    Injects controlled 'messiness' into the dataset to simulate real-world field data issues.
-    This function is refactored to be more organized and efficient.
-    """
-    if mess_level == 'none':
-        return df
-
-    n = len(df)
-    error_rates = {'light': 0.03, 'moderate': 0.08, 'heavy': 0.15}
-    error_rate = error_rates.get(mess_level)
-    if error_rate is None:
-        raise ValueError("Invalid mess_level. Choose from 'none', 'light', 'moderate', 'heavy'.")
-
-    print(f"Injecting {mess_level} level of mess into the dataset... (error rate: {error_rate})")
-    df_messy = df.copy()
-
-    # 1. Inject Missing Values (NaNs)
-    cols_for_nans = [
-        'bill_length_mm', 'bill_depth_mm', 'flipper_length_mm', 'body_mass_g',
-        'study_name', 'clutch_completion', 'health_status', 'capture_date',
-        'colony_id', 'island'
-    ]
-    for col in cols_for_nans:
-        mask = np.random.rand(n) < error_rate
-        df_messy.loc[mask, col] = np.nan
-
-    # 2. Corrupt Categorical and String Data
-    # Sex
-    mask = np.random.rand(n) < error_rate
-    df_messy.loc[mask, 'sex'] = np.random.choice(['M', 'F', '', None, 'Unknown', '?', 'N/A'], size=mask.sum())
-    # Species
-    species_typos = {'Adelie': 'adeleie', 'Chisntrap': 'chisntrap', 'Gentoo': 'Gentto'}
-    mask = np.random.rand(n) < error_rate
-    df_messy.loc[mask, 'species'] = df_messy.loc[mask, 'species'].apply(lambda x: species_typos.get(x, x))
-    # Colony ID
-    mask = np.random.rand(n) < error_rate
-    fake_colonies = ['Torgersen', 'Dream Island', 'Biscoe', 'Cormorant', 'Unknown', 'dream', 'biscoe 2', 'torgersen SE', 'cormorant NW', '/Shortcut', 'invalid_colony', 'TORGERSEN 4', ' short point', 'dream island']
-    df_messy.loc[mask, 'colony_id'] = np.random.choice(fake_colonies, size=mask.sum())
-    # Island
-    mask = np.random.rand(n) < error_rate
-    fake_islands = ['bisco', 'dreamland', 'torg', 'cormor', 'short cut', 'unknown', '', None]
-    df_messy.loc[mask, 'island'] = np.random.choice(fake_islands, size=mask.sum())
-    # Health Status
-    mask = np.random.rand(n) < error_rate
-    health_typos = ['Healthy', 'Unwell', 'Critically Ill', 'critcal ill', 'under weight', 'Overwight', 'ok', 'N/A', '', None]
-    df_messy.loc[mask, 'health_status'] = np.random.choice(health_typos, size=mask.sum())
-    # Age Group
-    mask = np.random.rand(n) < error_rate
-    age_typos = ['Chick', 'Juvenile', 'Adult', 'chik', 'juvenille', 'ADLT', 'unk', '', None]
-    df_messy.loc[mask, 'age_group'] = np.random.choice(age_typos, size=mask.sum())
-    # Study Name
-    mask = np.random.rand(n) < error_rate
-    fake_studies = ['PAPRI20X9', 'PAPR12021', 'PAPR2023', 'papri2024', '', None, 'N/A', 'STUDY_2022', 'PP2020']
-    df_messy.loc[mask, 'study_name'] = np.random.choice(fake_studies, size=mask.sum())
-    # Tag ID
-    mask = np.random.rand(n) < error_rate
-    df_messy.loc[mask, 'tag_id'] = df_messy.loc[mask, 'tag_id'].apply(lambda x: np.nan if pd.notnull(x) and random.random() < 0.5 else x)
-
-    # 3. Corrupt Date Formats
-    def generate_bad_date():
-        error_type = random.choice(['typo', 'swap', 'missing_digit', 'nonsense'])
-        if error_type == 'swap':
-            return f"{random.randint(1, 28):02d}-{random.randint(1, 12):02d}-{random.choice(range(2019, 2025))}"
-        elif error_type == 'missing_digit':
-            return f"{random.choice([202, 2024])}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
-        elif error_type == 'typo':
-            return f"2024-{random.choice(['00', '13', '99'])}-{random.randint(1, 28):02d}"
-        else:
-            return random.choice(['not-a-date', '9999-99-99', 'error'])
-    mask = np.random.rand(n) < error_rate
-    df_messy.loc[mask, 'capture_date'] = [generate_bad_date() for _ in range(mask.sum())]
-
-    # 4. Inject Numeric Outliers
-    outlier_config = {
-        'bill_length_mm':    {'spread': 0.12, 'clip': (32, 60)},
-        'bill_depth_mm':     {'spread': 0.10, 'clip': (13, 21)},
-        'flipper_length_mm': {'spread': 0.08, 'clip': (170, 230)},
-        'body_mass_g':       {'spread': 0.12, 'clip': (2500, 6500)},
-    }
-    for col, config in outlier_config.items():
-        mask = np.random.rand(n) < (error_rate * 0.75)  # Apply to a fraction of the error rate
-        original_values = df_messy.loc[mask, col].dropna()
-        if not original_values.empty:
-            random_factors = np.random.normal(1, config['spread'], size=len(original_values))
-            outlier_values = (original_values * random_factors).clip(lower=config['clip'][0], upper=config['clip'][1])
-            df_messy.loc[original_values.index, col] = outlier_values
-
-    return df_messy
-
-
-# === Resight duplication block ===
-def duplicate_penguin_rows_for_resight(df, duplicate_rate=0.45):
-    """
-    Simulates longitudinal resighting of tagged penguins.
-
-    This function is designed to be more realistic by:
-    1. Only selecting from penguins that have a valid `tag_id`.
-    2. Making the `duplicate_rate` relative to the tagged population.
-    3. Allowing multiple resights of the same individual (`replace=True`).
-    4. Robustly handling resight dates to prevent dropping data.
-    """
-    # 1. Only consider penguins that have a tag_id for resighting.
-    tagged_penguins = df[df['tag_id'].notna()].copy()
-    if tagged_penguins.empty:
-        print("No tagged penguins found to resight.")
-        return df
-
-    # 2. Calculate the number of resight *events* to generate.
-    # `duplicate_rate` is the ratio of resight events to the number of tagged penguins.
-    n_resights = int(len(tagged_penguins) * duplicate_rate)
-    resight_samples = tagged_penguins.sample(n_resights, replace=True, random_state=42)
-
-    resighted_rows = []
-    for idx, row in resight_samples.iterrows():
-        # 3. Simulate survival/resight chance.
-        if random.random() < 0.05:  # 5% chance penguin did not survive or was not found.
-            continue
-
-        resight = row.copy()
-
-        # 4. Robustly advance capture_date, preventing out-of-bounds dates.
+# === Data Generation ===
+def generate_outputs(args, recorder):
+    """Generates and saves the clean and messy outputs in the mode selected by ``args``."""
+    cache = None if args.no_cache else BaseCache(args.cache_dir, max_bytes=args.cache_size * 2**20)
+    write_options = {'fmt': args.format, 'workers': args.write_workers, 'compression': args.compression,
+                     'recorder': recorder}
+
+    # === Rate-Controlled Event Feed ===
+    if args.feed:
+        print(f"Replaying the events of {args.num_penguins} penguins to {args.feed}...")
+        stats = asyncio.run(run_feed(
+            sys.__stdout__ if args.feed == '-' else args.feed,
+            num_penguins=args.num_penguins,
+            seed=args.seed,
+            rate=args.feed_rate or None,
+            compression=args.time_compression,
+            jitter=args.jitter,
+            batch_size=args.chunk_size or DEFAULT_BATCH_SIZE,
+            mess_level=args.mess_level,
+            duplicate_rate=args.duplicate_rate,
+            species_missing_rate=args.species_missing_rate,
+            mislabel_rate=args.mislabel_rate,
+            engine=args.engine,
+            recorder=recorder,
+        ))
+        print(f"Sent {stats['events']} events in {stats['seconds']:.2f} s (at most {stats['max_lag'] * 1000:.1f} ms behind schedule).")
+        return
+
+    # === Lazy Streaming to Stdout ===
+    if args.stream:
+        batches = iter_batches(
+            args.num_penguins or None,
+            batch_size=args.chunk_size or DEFAULT_BATCH_SIZE,
+            kind=args.stream_kind,
+            seed=args.seed,
+            mess_level=args.mess_level,
+            duplicate_rate=args.duplicate_rate,
+            species_missing_rate=args.species_missing_rate,
+            mislabel_rate=args.mislabel_rate,
+            engine=args.engine,
+            recorder=recorder,
+        )
         try:
-            original_date = pd.to_datetime(resight['capture_date'], errors='coerce', dayfirst=True)
-            if pd.notna(original_date):
-                # Resight happens 1-3 years later.
-                time_shift = timedelta(days=random.randint(365, 365 * 3))
-                shifted_date = original_date + time_shift
-
-                # If date exceeds study end, cap it instead of dropping the record.
-                study_end_date = datetime(2024, 12, 31)
-                if shifted_date > study_end_date:
-                    shifted_date = study_end_date - timedelta(days=random.randint(1, 60))
-                resight['capture_date'] = shifted_date.strftime('%Y-%m-%d')
-        except Exception: # If original date was invalid, leave it for the resight record.
-            pass
-
-        # 5. Drift biometrics slightly for the resight record.
-        for col in ['bill_length_mm', 'bill_depth_mm', 'flipper_length_mm', 'body_mass_g']:
-            if pd.notnull(resight[col]):
-                drift_factor = random.uniform(0.98, 1.05) # More subtle drift
-                resight[col] = round(resight[col] * drift_factor, 2)
-
-        # 6. Adjust age_group and mutate health status for the new record.
-        if resight['age_group'] == 'Chick':
-            resight['age_group'] = 'Juvenile'
-        elif resight['age_group'] == 'Juvenile':
-            resight['age_group'] = 'Adult'
-        if pd.notnull(resight['health_status']):
-            resight['health_status'] = random.choice(['Healthy', 'Unwell', 'Underweight', 'Overweight', 'Critically Ill'])
-
-        resighted_rows.append(resight)
-
-    df_augmented = pd.concat([df, pd.DataFrame(resighted_rows)], ignore_index=True)
-    return df_augmented
-
-def inject_mislabeled_duplicates(df, mislabel_rate=0.01):
-    """
-    Intentionally creates mislabeled duplicates to simulate data entry errors.
-
-    This function selects a portion of records, creates a copy with the same
-    tag_id and capture_date, but with slightly drifted biometric data.
-    This is a controlled way to re-introduce the "same tag, same date, different data" anomaly.
-    """
-    if mislabel_rate == 0:
-        return df
-
-    # Only create mislabels for records that have a valid tag and date.
-    valid_records = df.dropna(subset=['tag_id', 'capture_date']).copy()
-    if valid_records.empty:
-        return df
-
-    n_mislabels = int(len(valid_records) * mislabel_rate)
-    if n_mislabels == 0:
-        return df
+            rows = write_batches(batches, sys.__stdout__, fmt=args.stream)
+        except BrokenPipeError:
+            # The consumer stopped reading; silence the flush at interpreter exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.__stdout__.fileno())
+            print("The consumer closed the stream.")
+            return
+        print(f"Streamed {rows} {args.stream_kind} records as {args.stream}.")
+        return
+
+    # === Incremental Append Mode ===
+    if args.append:
+        print(f"Appending a new field season of {args.num_penguins} penguins to {args.clean_output} and {args.messy_output}...")
+        counts = append_season(
+            args.clean_output, args.messy_output, args.num_penguins,
+            season=args.season,
+            mess_level=args.mess_level,
+            duplicate_rate=args.duplicate_rate,
+            species_missing_rate=args.species_missing_rate,
+            mislabel_rate=args.mislabel_rate,
+            compression=args.compression,
+        )
+        start, end = counts['season']
+        print(f"Appended {counts['clean']} clean and {counts['messy']} messy records for season {start}:{end}.")
+        return
+
+    # === Seekable Counter-Based Mode ===
+    if args.rows or args.engine == 'counter':
+        start, end = args.rows or (0, args.num_penguins)
+        print(f"Generating rows {start}:{end} with the counter-based engine...")
+        data = generate(
+            seed=args.seed,
+            mess_level=args.mess_level,
+            duplicate_rate=args.duplicate_rate,
+            species_missing_rate=args.species_missing_rate,
+            mislabel_rate=args.mislabel_rate,
+            rows=(start, end),
+            recorder=recorder,
+        )
+        save_dataset(data, args, write_options)
+        return
+
+    # === Multi-Variant Fan-Out Mode ===
+    if args.fan_out:
+        grid = expand_grid(
+            mess_levels=args.mess_levels or [args.mess_level],
+            duplicate_rates=args.duplicate_rates or [args.duplicate_rate],
+            mislabel_rates=args.mislabel_rates or [args.mislabel_rate],
+            species_missing_rates=args.species_missing_rates or [args.species_missing_rate],
+        )
+        print(f"Building {len(grid)} messy variant(s) of {args.num_penguins} penguins in {args.fan_out}...")
+        manifest = fan_out(
+            args.fan_out, grid, args.num_penguins,
+            seed=args.seed,
+            workers=args.workers or 1,
+            fmt=args.format,
+            compression=args.compression,
+            recorder=recorder,
+            cache=cache,
+        )
+        print(f"Saved the clean base and {len(manifest['variants'])} variant(s); see {args.fan_out}/manifest.json.")
+        return
+
+    # === Multi-Core Sharded Mode ===
+    if args.workers:
+        shard_size = args.chunk_size or DEFAULT_SHARD_SIZE
+        print(f"Generating {args.num_penguins} penguins across {args.workers} worker(s) in shards of {shard_size}...")
+        counts = generate_sharded(
+            args.num_penguins, args.clean_output, args.messy_output,
+            workers=args.workers,
+            seed=args.seed,
+            shard_size=shard_size,
+            mess_level=args.mess_level,
+            duplicate_rate=args.duplicate_rate,
+            species_missing_rate=args.species_missing_rate,
+            mislabel_rate=args.mislabel_rate,
+            compression=args.compression,
+            recorder=recorder,
+        )
+        print(f"Saved {counts['clean']} clean records to {args.clean_output} and {counts['messy']} messy records to {args.messy_output}.")
+        return
+
+    # === Bounded-Memory Streaming Mode ===
+    if args.chunk_size:
+        print(f"Streaming {args.num_penguins} penguins to disk in chunks of {args.chunk_size}...")
+        counts = stream_to_disk(
+            args.num_penguins, args.clean_output, args.messy_output, args.chunk_size,
+            mess_level=args.mess_level,
+            duplicate_rate=args.duplicate_rate,
+            species_missing_rate=args.species_missing_rate,
+            mislabel_rate=args.mislabel_rate,
+            engine=args.engine,
+            rng=np.random.default_rng(args.seed),
+            compression=args.compression,
+            recorder=recorder,
+        )
+        print(f"Saved {counts['clean']} clean records to {args.clean_output} and {counts['messy']} messy records to {args.messy_output}.")
+        return
+
+    # === Generate Clean and Messy Populations In Memory ===
+    # The columnar engine keeps the clean frame compact; it becomes text only when written.
+    truth = GroundTruth() if args.truth else None
+    data = generate(
+        args.num_penguins,
+        seed=args.seed,
+        mess_level=args.mess_level,
+        duplicate_rate=args.duplicate_rate,
+        species_missing_rate=args.species_missing_rate,
+        mislabel_rate=args.mislabel_rate,
+        engine=args.engine,
+        compact=True,
+        recorder=recorder,
+        cache=cache,
+        truth=truth,
+    )
 
-    print(f"Injecting {n_mislabels} mislabeled duplicate records...")
-    mislabel_samples = valid_records.sample(n_mislabels, replace=True, random_state=42)
+    # === Save Clean and Messy Outputs ===
+    save_dataset(data, args, write_options)
 
-    mislabeled_rows = []
-    for idx, row in mislabel_samples.iterrows():
-        mislabel = row.copy()
-        # Drift biometrics to create the data conflict, keeping tag_id and capture_date the same.
-        for col in ['bill_length_mm', 'bill_depth_mm', 'flipper_length_mm', 'body_mass_g']:
-            if pd.notnull(mislabel[col]):
-                drift_factor = random.uniform(0.90, 1.10) # Wider drift to simulate entry error
-                mislabel[col] = round(mislabel[col] * drift_factor, 2)
-        mislabeled_rows.append(mislabel)
+    if args.sqlite:
+        print(f"Loading {len(data.clean)} clean and {len(data.messy)} messy records into {args.sqlite}...")
+        with (recorder or null_recorder()).stage('write_sqlite', rows_in=len(data.clean) + len(data.messy)) as stage:
+            counts = write_sqlite(args.sqlite, data.clean, data.messy, individuals=args.sqlite_individuals)
+            stage['rows_out'] = sum(counts.values())
+            stage['bytes_written'] = path_size(args.sqlite)
+        print(f"Loaded {', '.join(f'{n} {table}' for table, n in counts.items())} rows into {args.sqlite}.")
 
-    return pd.concat([df, pd.DataFrame(mislabeled_rows)], ignore_index=True)
+    if truth is not None:
+        directory = truth_path(output_path(args.messy_output, args.format))
+        write_truth(truth, directory)
+        print(f"Saved ground truth for {len(truth)} messy records to {directory}.")
 
-# === Helper: Inject missingness into species column ===
-def inject_species_missingness(df, missing_rate=0.03):
-    """
-    Randomly inject missing values into the 'species' column to simulate field error.
-    """
-    n_rows = df.shape[0]
-    n_missing = int(missing_rate * n_rows)
-    missing_indices = np.random.choice(df.index, size=n_missing, replace=False)
-    df.loc[missing_indices, 'species'] = np.nan
-    return df
+    if args.save_state:
+        directory = state_path(args.clean_output)
+        save_state(directory, data.clean, args.seed, messy_rows=len(data.messy))
+        print(f"Saved generator state for --append runs to {directory}.")
 
-# === Data Generation ===
 def main(args):
     """Main function to generate and save penguin data."""
     # Seed for reproducibility
-    np.random.seed(42)
-    random.seed(42)
-
-    # Initialize state within main() to prevent issues with multiple runs in one session
-    penguins = []
-    tag_counters = {'Adelie': 1, 'Chinstrap': 1, 'Gentoo': 1}
-
-    for _ in range(args.num_penguins):
-        species = random.choice(list(SPECIES_INFO.keys()))
-        # Use weighted random sampling across colonies to reflect ecological weights
-        colony_weights = {
-            'Torgersen North': 30,
-            'Dream South': 25,
-            'Biscoe West': 20,
-            'Cormorant East': 15,
-            'Shortcut Point': 10
-        }
-        colonies, weights = zip(*colony_weights.items())
-        colony = random.choices(colonies, weights=weights, k=1)[0]
-        island = COLONIES[colony]
-        age_group = random.choices(AGE_GROUPS, weights=[0.1, 0.2, 0.7])[0]
-        sex = random.choice(SEXES) if random.random() < 0.5 else None
-        capture_date = random_capture_date()
-
-        bill_length = np.clip(np.random.normal(SPECIES_INFO[species]['bill_mean'], SPECIES_INFO[species]['bill_sd']), 32, 60)
-        bill_depth = np.clip(np.random.normal(SPECIES_INFO[species]['bill_depth_mean'], SPECIES_INFO[species]['bill_depth_sd']), 13, 21)
-        flipper_length = np.clip(np.random.normal(SPECIES_INFO[species]['flipper_mean'], SPECIES_INFO[species]['flipper_sd']), 170, 230)
-
-        # Adjust body mass by age
-        age_mass_factor = {'Chick': 0.6, 'Juvenile': 0.8, 'Adult': 1.0}[age_group]
-
-        # Adjust body mass by sex
-        sex_mass_factor = {"Male": 1.05, "Female": 0.95, None: 1.0}[sex]
-
-        # Generate mass with age and sex adjustments
-        base_mass = np.random.normal(SPECIES_INFO[species]['mass_mean'], SPECIES_INFO[species]['mass_sd'])
-        body_mass = base_mass * age_mass_factor * sex_mass_factor
-        body_mass = np.clip(body_mass, 2500, 6500)
-
-        # Field stress adjustments by colony
-        colony_stress_map = {
-            'Torgersen North': 0.0,
-            'Dream South': 0.05,
-            'Biscoe West': 0.1,
-            'Cormorant East': 0.15,
-            'Shortcut Point': 0.2
-        }
-        stress_factor = colony_stress_map.get(colony, 0.0)
-
-        # Species fragility modifiers
-        species_band = {
-            'Adelie': 0.20,
-            'Chinstrap': 0.15,
-            'Gentoo': 0.25
-        }
-
-        # Health classification with adjusted bounds and stress impact
-        if pd.isnull(body_mass):
-            health_status = 'UNKNOWN'
-        else:
-            mean_mass = SPECIES_INFO[species]['mass_mean']
-            band = species_band.get(species, 0.20)
-            low_thresh = mean_mass * (1 - band) * (1 + stress_factor)
-            high_thresh = mean_mass * (1 + band) * (1 - stress_factor)
-
-            if body_mass < low_thresh:
-                health_status = 'Underweight'
-            elif body_mass > high_thresh:
-                health_status = 'Overweight'
-            else:
-                health_status = 'Healthy'
-
-            # Add random error (simulate field mislabeling)
-            if random.random() < 0.07:
-                health_noise = ['Unwell', 'Critically Ill', 'Healthy', 'Underweight', 'Overweight']
-                health_noise.remove(health_status)
-                health_status = random.choice(health_noise)
-
-        if random.random() < TAGGED_PERCENTAGE:
-            tag_id = generate_tag(species, tag_counters)
-        else:
-            tag_id = None
-
-        # Determine clutch completion
-        clutch_probs = {"Adelie": 0.9, "Chinstrap": 0.85, "Gentoo": 0.8}
-        clutch_completion = np.random.choice(
-            ["Yes", "No"],
-            p=[clutch_probs.get(species, 0.8), 1 - clutch_probs.get(species, 0.8)]
-        )
-
-        # Generate egg date only if clutch was completed
-        egg_date = capture_date - timedelta(days=random.randint(0, 14))
-        if egg_date < datetime(2019, 10, 1):
-            egg_date = capture_date
-        date_egg = egg_date.strftime('%Y-%m-%d') if clutch_completion == "Yes" else np.nan
-
-        # Add study_name based on year and study convention
-        study_year = capture_date.year
-        study_name = f"PAPRI{study_year}"
-
-        penguins.append({
-            'tag_id': tag_id,
-            'species': species,
-            'bill_length_mm': round(bill_length, 2),
-            'bill_depth_mm': round(bill_depth, 2),
-            'flipper_length_mm': round(flipper_length, 1),
-            'body_mass_g': round(body_mass),
-            'age_group': age_group,
-            'sex': sex,
-            'colony_id': colony,
-            'island': island,
-            'capture_date': capture_date.strftime('%Y-%m-%d'),
-            'health_status': health_status,
-            'study_name': study_name,
-            'clutch_completion': clutch_completion,
-            'date_egg': date_egg
-        })
-
-    # === Convert to DataFrame ===
-    df_penguins_clean = pd.DataFrame(penguins)
-
-    # === Save Clean CSV ===
-    print(f"Saving {len(df_penguins_clean)} clean records to {args.clean_output}...")
-    df_penguins_clean.to_csv(args.clean_output, index=False)
-
-    # === Add Realistic Messiness and Augmentation ===
-    df_penguins_messy = df_penguins_clean.copy()
-    df_penguins_messy = inject_mess(df_penguins_messy, mess_level=args.mess_level)
-    df_penguins_messy = duplicate_penguin_rows_for_resight(df_penguins_messy, duplicate_rate=args.duplicate_rate)
-    df_penguins_messy = inject_species_missingness(df_penguins_messy, missing_rate=args.species_missing_rate)
-    df_penguins_messy = inject_mislabeled_duplicates(df_penguins_messy, mislabel_rate=args.mislabel_rate)
-
-    # === Save Messy Field CSV ===
-    print(f"Saving {len(df_penguins_messy)} messy records (including resights) to {args.messy_output}...")
-    df_penguins_messy.to_csv(args.messy_output, index=False)
-
-    print(f"✅ Generation complete!")
+    np.random.seed(args.seed)
+    random.seed(args.seed)
+
+    # === Optional Stage Instrumentation ===
+    recorder = None
+    if args.profile or args.profile_dump:
+        recorder = StageRecorder(memory='tracemalloc' if args.trace_memory else 'rss', profile=bool(args.profile_dump))
+
+    # Stream and stdout feed modes write records to stdout, so progress messages go to stderr
+    with contextlib.redirect_stdout(sys.stderr) if args.stream or args.feed == '-' else contextlib.nullcontext():
+        if args.params:
+            params = use_params(args.params)
+            print(f"Loaded {len(params['species'])} species and {len(params['colonies'])} colonies from {args.params}.")
+        if args.field_months:
+            set_field_months(args.field_months)
+        set_morphometrics(args.morphometrics)
+        generate_outputs(args, recorder)
+
+        if recorder is not None:
+            if args.profile_dump:
+                hottest = recorder.dump_hottest_profile(args.profile_dump)
+                print(f"Saved cProfile stats of the hottest stage ({hottest}) to {args.profile_dump}.")
+            if args.profile:
+                recorder.write_report(args.profile, arguments=vars(args))
+                print(f"Saved run report to {args.profile}.")
+        print(f"✅ Generation complete!")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Dirty Birds: Synthetic Penguin Data Generator.")
@@ -435,6 +294,249 @@ if __name__ == "__main__":
         default=0.0,
         help="Proportion of records to create as mislabeled duplicates (same tag/date, different data). Default: 0.0"
     )
+    parser.add_argument(
+        '--engine',
+        type=str,
+        default='columnar',
+        choices=ENGINES,
+        help="Clean generation engine. 'columnar' draws whole columns at once; 'rowwise' reproduces the v0.4.0 clean output exactly (the messy output is not reproduced, since the mess stages now draw from their own generator); 'counter' is seekable (see --rows). Default: 'columnar'."
+    )
+    parser.add_argument(
+        '--params',
+        type=str,
+        default=None,
+        help="JSON or TOML file of species and colony parameters replacing the built-in ones (see dirty_birds/params.py). Default: built-in."
+    )
+    parser.add_argument(
+        '--field-months',
+        type=str,
+        default=None,
+        help="Months in which birds are captured, as a range or list of month numbers (e.g. '10-3' for October to March, or '11,12,1'). Default: every month."
+    )
+    parser.add_argument(
+        '--morphometrics',
+        type=str,
+        default='independent',
+        choices=SAMPLERS,
+        help="Morphometrics sampler. 'correlated' draws bill length, bill depth, flipper length and body mass jointly with realistic within-species correlations; 'independent' draws each on its own and reproduces earlier outputs. Default: 'independent'."
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=None,
+        help="Stream generation to disk in chunks of this many penguins, keeping memory flat. Default: off (in-memory)."
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help=f"Generate in independently seeded shards across this many processes. Shards hold --chunk-size penguins (default {DEFAULT_SHARD_SIZE}). Default: off."
+    )
+    parser.add_argument(
+        '--rows',
+        type=str,
+        default=None,
+        help="Regenerate only rows START:END (and the messy records derived from them) with the seekable counter-based engine."
+    )
+    parser.add_argument(
+        '--format',
+        type=str,
+        default='csv',
+        choices=FORMATS,
+        help="Output format for both files. 'parquet' and 'feather' need pyarrow; 'npy' writes a directory of memory-mappable .npy columns. A .csv suffix on the output names is swapped for the format's. Default: 'csv'."
+    )
+    parser.add_argument(
+        '--compression',
+        type=str,
+        default='infer',
+        choices=COMPRESSIONS,
+        help="CSV compression, applied chunk by chunk as independent members. 'infer' picks it from a .gz, .bz2 or .xz output extension. Default: 'infer'."
+    )
+    parser.add_argument(
+        '--write-workers',
+        type=int,
+        default=1,
+        help="Processes used to format CSV chunks for in-memory and --rows runs. Default: 1."
+    )
+    parser.add_argument(
+        '--fan-out',
+        type=str,
+        default=None,
+        help="Generate the clean base once and write one messy variant per combination of the grid options below into this directory, with a manifest.json. Variants run in --workers processes."
+    )
+    parser.add_argument(
+        '--mess-levels',
+        nargs='+',
+        choices=['none', 'light', 'moderate', 'heavy'],
+        default=None,
+        help="Fan-out grid: mess levels. Default: --mess-level."
+    )
+    parser.add_argument(
+        '--duplicate-rates',
+        type=float,
+        nargs='+',
+        default=None,
+        help="Fan-out grid: resight rates. Default: --duplicate-rate."
+    )
+    parser.add_argument(
+        '--mislabel-rates',
+        type=float,
+        nargs='+',
+        default=None,
+        help="Fan-out grid: mislabel rates. Default: --mislabel-rate."
+    )
+    parser.add_argument(
+        '--species-missing-rates',
+        type=float,
+        nargs='+',
+        default=None,
+        help="Fan-out grid: species-missing rates. Default: --species-missing-rate."
+    )
+    parser.add_argument(
+        '--profile',
+        type=str,
+        default=None,
+        help="Write a JSON run report with duration, rows in/out, bytes written and peak memory per stage to this file."
+    )
+    parser.add_argument(
+        '--profile-dump',
+        type=str,
+        default=None,
+        help="Profile every stage with cProfile and write the stats of the slowest one to this file (readable with pstats)."
+    )
+    parser.add_argument(
+        '--trace-memory',
+        action='store_true',
+        help="Measure each stage's own peak allocation with tracemalloc instead of the process peak RSS (slower)."
+    )
+    parser.add_argument(
+        '--stream',
+        choices=STREAM_FORMATS,
+        default=None,
+        help=f"Write the records to stdout as they are generated, in batches of --chunk-size (default {DEFAULT_BATCH_SIZE}), instead of to files. --num-penguins 0 streams until the consumer stops reading. Default: off."
+    )
+    parser.add_argument(
+        '--stream-kind',
+        choices=['messy', 'clean'],
+        default='messy',
+        help="Which records --stream writes. Default: 'messy'."
+    )
+    parser.add_argument(
+        '--feed',
+        type=str,
+        default=None,
+        help="Replay the capture and resight events in date order as NDJSON to '-' (stdout), tcp://HOST:PORT or unix:///PATH, paced by the options below. Default: off."
+    )
+    parser.add_argument(
+        '--feed-rate',
+        type=float,
+        default=DEFAULT_RATE,
+        help=f"Events per second sent by --feed; 0 sends as fast as the target accepts. Default: {DEFAULT_RATE:g}."
+    )
+    parser.add_argument(
+        '--time-compression',
+        type=float,
+        default=None,
+        help="Space --feed events by their dates, replaying this many simulated seconds per real second (86400 = one day per second). Default: off."
+    )
+    parser.add_argument(
+        '--jitter',
+        type=float,
+        default=0.0,
+        help="Delay each --feed event by a random 0 to this many seconds. Default: 0."
+    )
+    parser.add_argument(
+        '--sqlite',
+        type=str,
+        default=None,
+        help="Also bulk-load the clean and messy datasets into tables of this SQLite database, indexed on tag_id, capture_date, species and colony_id. In-memory runs only."
+    )
+    parser.add_argument(
+        '--sqlite-individuals',
+        action='store_true',
+        help="With --sqlite, also build an 'individuals' table with one row per tagged bird and its number of messy records."
+    )
+    parser.add_argument(
+        '--truth',
+        action='store_true',
+        help="Also write <messy-output>.truth: each messy row's clean source row, origin (original, resight, mislabel) and a bitmask of its corrupted cells, as .npy arrays. In-memory runs only."
+    )
+    parser.add_argument(
+        '--save-state',
+        action='store_true',
+        help="Save the generator state (tag counters, random stream, tagged-bird index) next to the clean output so later --append runs can extend the dataset."
+    )
+    parser.add_argument(
+        '--append',
+        action='store_true',
+        help="Append one new field season of --num-penguins captures, plus resights of already-tagged birds, to the existing CSV outputs, using their saved state."
+    )
+    parser.add_argument(
+        '--season',
+        type=str,
+        default=None,
+        help="Capture window of the appended season as START:END (e.g. 2025-10-01:2026-03-31). Default: the next austral summer (October to March) after the last season."
+    )
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory of cached clean bases, reused by in-memory and --fan-out runs of the columnar engine. Default: {DEFAULT_CACHE_DIR}."
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=DEFAULT_MAX_BYTES // 2**20,
+        help=f"Size limit of the cache in MiB; least recently used bases are evicted beyond it. Default: {DEFAULT_MAX_BYTES // 2**20}."
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help="Always generate the clean base instead of reading or filling the cache."
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=SEED,
+        help=f"Root random seed. Default: {SEED}."
+    )
 
     args = parser.parse_args()
+    if args.format != 'csv' and (args.chunk_size or args.workers) and not args.fan_out:
+        parser.error("--format other than csv is only supported for in-memory and --rows runs.")
+    if args.truth and (args.rows or args.engine == 'counter' or args.fan_out or args.workers or args.chunk_size
+                       or args.stream or args.feed or args.append):
+        parser.error("--truth is only supported for in-memory runs of the columnar and rowwise engines.")
+    if args.sqlite and (args.rows or args.fan_out or args.workers or args.chunk_size
+                        or args.stream or args.feed or args.append):
+        parser.error("--sqlite is only supported for in-memory runs.")
+    if args.sqlite_individuals and not args.sqlite:
+        parser.error("--sqlite-individuals is only used with --sqlite.")
+    if args.feed and (args.stream or args.rows or args.fan_out or args.workers or args.append or args.save_state or args.engine == 'counter'):
+        parser.error("--feed cannot be combined with --stream, --rows, --fan-out, --workers, --append, --save-state or the counter engine.")
+    if args.stream and (args.rows or args.fan_out or args.workers or args.append or args.save_state or args.engine == 'counter'):
+        parser.error("--stream cannot be combined with --rows, --fan-out, --workers, --append, --save-state or the counter engine.")
+    if args.append and (args.rows or args.fan_out or args.workers or args.chunk_size or args.format != 'csv'):
+        parser.error("--append extends CSV outputs and cannot be combined with --rows, --fan-out, --workers, --chunk-size or --format.")
+    if args.season and not args.append:
+        parser.error("--season is only used with --append.")
+    if args.season:
+        try:
+            args.season = parse_season(args.season)
+        except ValueError as error:
+            parser.error(str(error))
+    if args.save_state and (args.append or args.rows or args.fan_out or args.workers or args.chunk_size or args.engine != 'columnar'):
+        parser.error("--save-state is only supported for in-memory runs of the columnar engine.")
+    if args.rows:
+        try:
+            args.rows = parse_row_range(args.rows)
+        except ValueError as error:
+            parser.error(str(error))
+    if args.field_months:
+        try:
+            args.field_months = parse_months(args.field_months)
+        except ValueError as error:
+            parser.error(str(error))
+    if args.cache_size <= 0:
+        parser.error("--cache-size must be a positive number of MiB.")
     main(args)
\ No newline at end of file
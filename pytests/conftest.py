@@ -0,0 +1,21 @@
+import pytest
+
+from dirty_birds import cache
+
+def _use_cache_dir(patch, directory):
+    patch.setenv('DIRTY_BIRDS_CACHE_DIR', str(directory))
+    patch.setattr(cache, 'DEFAULT_CACHE_DIR', str(directory))
+
+@pytest.fixture(scope="session", autouse=True)
+def session_cache_dir(tmp_path_factory):
+    """Keeps module fixtures that run the scripts from caching in the user's home directory."""
+    with pytest.MonkeyPatch.context() as patch:
+        _use_cache_dir(patch, tmp_path_factory.mktemp("session_cache"))
+        yield
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Gives every test, and the scripts it runs, an empty clean-base cache of its own."""
+    directory = tmp_path / "dirty_birds_cache"
+    _use_cache_dir(monkeypatch, directory)
+    return directory
@@ -0,0 +1,91 @@
+import io
+import itertools
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import dirty_birds
+from dirty_birds import Dataset, generate, iter_batches, save, write_batches
+from dirty_birds.config import COLUMNS
+
+GENERATOR_SCRIPT = Path(__file__).parent.parent / "penguin_synthetic_generator_v0.4.0.py"
+
+@pytest.fixture(scope="module")
+def data():
+    """An in-memory run with every messy stage enabled."""
+    return generate(3000, seed=13, mess_level='heavy', mislabel_rate=0.02)
+
+def test_generate_returns_clean_and_messy_frames(data):
+    """Both frames come back in memory with the output schema."""
+    assert isinstance(data, Dataset)
+    assert list(data.clean.columns) == COLUMNS and list(data.messy.columns) == COLUMNS
+    assert len(data.clean) == 3000
+    assert len(data.messy) > len(data.clean)
+
+def test_generate_is_reproducible(data):
+    """The same arguments give the same frames."""
+    again = generate(3000, seed=13, mess_level='heavy', mislabel_rate=0.02)
+    pd.testing.assert_frame_equal(data.clean, again.clean)
+    pd.testing.assert_frame_equal(data.messy, again.messy)
+
+def test_save_matches_cli_output(data, tmp_path):
+    """Saving the in-memory result writes the same files as the script."""
+    clean_path, messy_path = save(data, tmp_path / "api_clean.csv", tmp_path / "api_messy.csv")
+    subprocess.run([
+        sys.executable, str(GENERATOR_SCRIPT), "--num-penguins", "3000", "--seed", "13",
+        "--mess-level", "heavy", "--mislabel-rate", "0.02",
+        "--clean-output", str(tmp_path / "cli_clean.csv"), "--messy-output", str(tmp_path / "cli_messy.csv"),
+    ], check=True, capture_output=True)
+    assert Path(clean_path).read_bytes() == (tmp_path / "cli_clean.csv").read_bytes()
+    assert Path(messy_path).read_bytes() == (tmp_path / "cli_messy.csv").read_bytes()
+
+def test_compact_and_counter_options():
+    """The clean frame can be compact, and rows can come from the seekable engine."""
+    compact = generate(500, seed=1, compact=True)
+    assert compact.clean['tag_number'].dtype.kind == 'i'
+    rows = generate(seed=1, rows=(200, 300))
+    assert list(rows.clean.index) == list(range(200, 300))
+
+def test_generate_rejects_unknown_options():
+    """Invalid mess levels and engines fail before any work is done."""
+    with pytest.raises(ValueError):
+        generate(10, mess_level='filthy')
+    with pytest.raises(ValueError):
+        generate(10, engine='quantum')
+    assert dirty_birds.generate is generate
+
+def test_iter_batches_is_lazy_and_bounded():
+    """An unbounded feed yields batches on demand; clean records ignore the mess settings."""
+    feed = iter_batches(None, batch_size=200, kind='both', seed=4, mislabel_rate=0.05)
+    batches = list(itertools.islice(feed, 3))
+    assert all(len(b.clean) == 200 and len(b.messy) > 200 for b in batches)
+    clean = next(iter_batches(200, batch_size=200, kind='clean', seed=4, mess_level='heavy'))
+    pd.testing.assert_frame_equal(clean, batches[0].clean)
+    assert next(iter_batches(500, batch_size=500, kind='clean', seed=4)).equals(generate(500, seed=4).clean)
+    with pytest.raises(ValueError):
+        iter_batches(10, kind='everything')
+
+def test_write_batches_formats(tmp_path):
+    """NDJSON gives one object per record with nulls; CSV has a single header."""
+    batches = list(iter_batches(600, batch_size=250, seed=2))
+    out = io.StringIO()
+    assert write_batches(batches, out, fmt='ndjson') == sum(len(b) for b in batches)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert list(records[0]) == COLUMNS and len(records) == sum(len(b) for b in batches)
+    out = io.StringIO()
+    write_batches(batches, out, fmt='csv')
+    assert out.getvalue().count('tag_id,species') == 1
+    assert len(pd.read_csv(io.StringIO(out.getvalue()))) == sum(len(b) for b in batches)
+
+def test_stream_cli_writes_records_to_stdout():
+    """--stream keeps stdout for records and sends progress to stderr."""
+    result = subprocess.run([
+        sys.executable, str(GENERATOR_SCRIPT), "--stream", "ndjson", "--num-penguins", "300", "--chunk-size", "100",
+    ], check=True, capture_output=True, text=True)
+    lines = result.stdout.splitlines()
+    assert len(lines) > 300 and all(line.startswith('{"tag_id":') for line in lines)
+    assert "Generation complete" in result.stderr
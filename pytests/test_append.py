@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dirty_birds import generate, save
+from dirty_birds.append import append_season, load_index, load_state, save_state, state_path
+from dirty_birds.dates import next_season, parse_season
+
+def _base(directory, suffix='.csv'):
+    """Saves a 1,500-penguin dataset with its append state into ``directory``."""
+    clean, messy = str(directory / f"clean{suffix}"), str(directory / f"messy{suffix}")
+    data = generate(1500, seed=3, compact=True)
+    save(data, clean, messy)
+    save_state(state_path(clean), data.clean, 3, messy_rows=len(data.messy))
+    return clean, messy, len(data.clean), len(data.messy)
+
+def test_next_season_is_the_following_austral_summer():
+    """The default season starts on the first October 1st after the last season."""
+    assert next_season(np.datetime64('2024-12-31')) == (np.datetime64('2025-10-01'), np.datetime64('2026-03-31'))
+    assert next_season(np.datetime64('2025-03-31')) == (np.datetime64('2025-10-01'), np.datetime64('2026-03-31'))
+    with pytest.raises(ValueError):
+        parse_season('2026-03-01:2025-10-01')
+
+def test_append_extends_outputs_with_new_season(tmp_path):
+    """New captures continue the tag sequence; resights reuse earlier tags within the season."""
+    clean, messy, clean_rows, messy_rows = _base(tmp_path, '.csv.gz')
+    before = pd.read_csv(clean)
+    counts = append_season(clean, messy, 400, mislabel_rate=0.0)
+    after_clean, after_messy = pd.read_csv(clean), pd.read_csv(messy)
+
+    assert len(after_clean) == clean_rows + 400 == len(before) + counts['clean']
+    assert len(after_messy) == messy_rows + counts['messy']
+    new = after_clean.iloc[clean_rows:]
+    assert new['capture_date'].between('2025-10-01', '2026-03-31').all()
+    assert not after_clean['tag_id'].dropna().duplicated().any()
+
+    resights = counts['messy'] - 400
+    assert resights > 0
+    season_tags = set(after_messy.iloc[messy_rows:]['tag_id'].dropna())
+    assert len(season_tags & set(before['tag_id'].dropna())) > 0.8 * resights
+
+def test_state_advances_and_appends_are_reproducible(tmp_path):
+    """Two datasets with the same history append identical seasons, and the index grows."""
+    outputs = []
+    for name in ['a', 'b']:
+        (tmp_path / name).mkdir()
+        clean, messy, _, _ = _base(tmp_path / name)
+        tagged = load_state(state_path(clean))['tagged']
+        append_season(clean, messy, 300)
+        append_season(clean, messy, 300, season=parse_season('2027-11-01:2028-01-31'))
+        state = load_state(state_path(clean))
+        assert len(state['seasons']) == 3
+        assert state['tagged'] > tagged
+        index = load_index(state_path(clean), state)
+        assert index['last_capture'].max() <= np.datetime64('2028-01-31').astype(np.int64)
+        outputs.append((open(clean).read(), open(messy).read()))
+    assert outputs[0] == outputs[1]
+
+def test_season_must_follow_the_last_one(tmp_path):
+    """A season overlapping the existing data is rejected before any file changes."""
+    clean, messy, _, _ = _base(tmp_path)
+    size = len(open(clean).read())
+    with pytest.raises(ValueError):
+        append_season(clean, messy, 100, season=parse_season('2024-06-01:2024-09-30'))
+    assert len(open(clean).read()) == size
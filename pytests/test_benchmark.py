@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from dirty_birds.benchmark import STAGE_NAMES, compare_results, main, run_benchmarks
+
+@pytest.fixture(scope="module")
+def results():
+    """A tiny benchmark run over every stage."""
+    return run_benchmarks(sizes=[300], repeat=1)
+
+def test_every_stage_is_measured(results):
+    """Each stage reports time, throughput and peak memory."""
+    assert [r['stage'] for r in results['results']] == STAGE_NAMES
+    for entry in results['results']:
+        assert entry['size'] == 300
+        assert entry['seconds'] > 0 and entry['rows_per_second'] > 0
+        assert entry['peak_bytes'] >= 0
+    resight = next(r for r in results['results'] if r['stage'] == 'resight')
+    assert resight['rows_out'] > resight['rows_in']
+    json.dumps(results)
+
+def test_stage_selection_keeps_dependencies():
+    """Selecting a late stage still builds its inputs without timing them."""
+    selected = run_benchmarks(sizes=[200], repeat=1, stages=['mislabels'], measure_memory=False)
+    assert [r['stage'] for r in selected['results']] == ['mislabels']
+    assert selected['results'][0]['peak_bytes'] is None
+
+def test_comparison_flags_slow_stages(results):
+    """A stage slower than the baseline by more than the threshold is a regression."""
+    slower = json.loads(json.dumps(results))
+    slower['results'][0]['seconds'] *= 2
+    regressions = compare_results(slower, results, threshold=0.5)
+    assert [(r['stage'], r['metric']) for r in regressions] == [(STAGE_NAMES[0], 'seconds')]
+    assert compare_results(results, results) == []
+
+def test_cli_exits_non_zero_on_regression(results, tmp_path):
+    """The comparison mode fails the process when a stage regresses."""
+    fast = json.loads(json.dumps(results))
+    for entry in fast['results']:
+        entry['seconds'] = 1e-9
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(fast))
+    output = tmp_path / "current.json"
+    code = main(['--sizes', '300', '--repeat', '1', '--no-memory', '--stages', 'generation',
+                 '--output', str(output), '--baseline', str(baseline)])
+    assert code == 1
+    assert json.loads(output.read_text())['results'][0]['stage'] == 'generation'
@@ -0,0 +1,69 @@
+import importlib
+import inspect
+import os
+
+import pytest
+
+from dirty_birds import config, generate
+from dirty_birds.cache import CODE_MODULES, BaseCache, cache_key, cached_base
+from dirty_birds.compact import to_text_frame
+
+@pytest.fixture
+def cache(tmp_path):
+    """An empty cache in a temporary directory."""
+    return BaseCache(str(tmp_path / "cache"))
+
+def test_hit_returns_the_generated_base(cache):
+    """A second request loads an identical compact frame from the cache."""
+    generated, hit = cached_base(2000, 5, cache)
+    loaded, second_hit = cached_base(2000, 5, cache)
+    assert (hit, second_hit) == (False, True)
+    assert (loaded.dtypes == generated.dtypes).all()
+    assert to_text_frame(loaded).equals(to_text_frame(generated))
+
+def test_key_covers_parameters_and_config(monkeypatch):
+    """Changing the seed, the size or a config value gives a new key."""
+    key = cache_key(1000, 1)
+    assert key == cache_key(1000, 1)
+    assert key != cache_key(1000, 2)
+    assert key != cache_key(1001, 1)
+    monkeypatch.setattr(config, 'TAGGED_PERCENTAGE', 0.5)
+    assert key != cache_key(1000, 1)
+
+def test_cached_run_matches_uncached_run(cache):
+    """generate() gives the same clean and messy data on a miss, a hit and without a cache."""
+    plain = generate(1500, seed=9, mislabel_rate=0.02)
+    for _ in range(2):
+        data = generate(1500, seed=9, mislabel_rate=0.02, cache=cache)
+        assert data.clean.equals(plain.clean)
+        assert data.messy.equals(plain.messy)
+    assert len(cache.entries()) == 1
+
+def test_least_recently_used_entries_are_evicted(cache):
+    """Beyond max_bytes the oldest entries go first and a touched entry survives."""
+    paths = [cache.store(cache_key(500, seed), cached_base(500, seed)[0]) for seed in range(3)]
+    for age, path in enumerate(paths):
+        os.utime(path, (age, age))
+    assert cache.load(cache_key(500, 0)) is not None  # Refreshes seed 0
+    cache.max_bytes = os.path.getsize(paths[0]) * 2
+    cache.store(cache_key(500, 3), cached_base(500, 3)[0])
+    remaining = {path for _, _, path in cache.entries()}
+    assert paths[1] not in remaining and paths[2] not in remaining
+    assert paths[0] in remaining and cache.path(cache_key(500, 3)) in remaining
+
+def test_unreadable_entry_is_a_miss(cache):
+    """A truncated entry is regenerated rather than raising."""
+    path = cache.store(cache_key(300, 1), cached_base(300, 1)[0])
+    with open(path, 'wb') as f:
+        f.write(b'not an archive')
+    assert cache.load(cache_key(300, 1)) is None
+    assert cached_base(300, 1, cache)[1] is False
+
+def test_code_digest_covers_the_base_path_imports():
+    """Every package module the hashed modules import is hashed too, so edits to it change the key."""
+    for name in CODE_MODULES:
+        module = importlib.import_module(f"dirty_birds.{name}")
+        for value in vars(module).values():
+            source = value if inspect.ismodule(value) else inspect.getmodule(value)
+            if source is not None and source.__name__.startswith('dirty_birds.'):
+                assert source.__name__.split('.')[1] in CODE_MODULES, (name, source.__name__)
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dirty_birds.compact import COMPACT_COLUMNS, generate_penguins_compact, to_text_frame
+from dirty_birds.csvio import write_csv
+from dirty_birds.generation import generate_penguins_columnar
+
+@pytest.fixture(scope="module")
+def compact():
+    """A compact clean population from a fixed seed."""
+    return generate_penguins_compact(20000, np.random.default_rng(11))
+
+def test_compact_frame_uses_typed_columns(compact):
+    """Enums are categoricals, dates datetime64 and measurements narrow numerics."""
+    assert list(compact.columns) == COMPACT_COLUMNS
+    assert compact['tag_number'].dtype == np.int32
+    assert compact['body_mass_g'].dtype == np.int16
+    assert compact['bill_length_mm'].dtype == np.float32
+    for column in ['species', 'sex', 'colony_id', 'island', 'study_name', 'clutch_completion']:
+        assert isinstance(compact[column].dtype, pd.CategoricalDtype)
+    assert compact['capture_date'].dtype.kind == 'M'
+    assert compact['date_egg'].isna().equals(compact['clutch_completion'] == 'No')
+
+def test_text_conversion_matches_columnar_engine(compact):
+    """Converting at the output boundary reproduces the text-schema engine exactly."""
+    expected = generate_penguins_columnar(20000, np.random.default_rng(11))
+    pd.testing.assert_frame_equal(to_text_frame(compact), expected)
+
+def test_chunked_csv_writer_matches_text_frame(compact, tmp_path):
+    """Writing a compact frame in slices gives the same CSV as converting the whole frame."""
+    path = tmp_path / "compact.csv"
+    write_csv(compact, path, chunk_rows=3001)
+    assert path.read_text() == to_text_frame(compact).to_csv(index=False)
+
+def test_compact_frame_is_much_smaller(compact):
+    """The compact frame needs a fraction of the text schema's memory."""
+    text = to_text_frame(compact)
+    assert compact.memory_usage(deep=True).sum() * 5 < text.memory_usage(deep=True).sum()
@@ -0,0 +1,69 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dirty_birds import generate, generate_penguins_rowwise
+from dirty_birds.dates import (
+    draw_capture_dates, egg_dates, field_days, months_of, parse_months, set_field_months,
+    shift_resight_dates, snap_to_field_days, study_window,
+)
+
+@pytest.fixture
+def austral_summer():
+    """Restricts captures to October-March for one test, then allows every month again."""
+    set_field_months('10-3')
+    yield
+    set_field_months(range(1, 13))
+
+def test_parse_months_wraps_the_year():
+    """Ranges may wrap past December; lists and single months are accepted."""
+    assert parse_months('10-3') == [1, 2, 3, 10, 11, 12]
+    assert parse_months('11,12,1') == [1, 11, 12]
+    assert parse_months('6') == [6]
+    with pytest.raises(ValueError):
+        parse_months('0-4')
+
+def test_unrestricted_draws_are_plain_offsets():
+    """With every month allowed, capture dates equal offsets from the window start."""
+    start, end = study_window()
+    dates = draw_capture_dates(1000, np.random.default_rng(3))
+    offsets = np.random.default_rng(3).integers(0, int((end - start) / np.timedelta64(1, 'D')) + 1, size=1000)
+    assert (dates == start + offsets.astype('timedelta64[D]')).all()
+    assert (snap_to_field_days(dates) == dates).all()
+
+def test_egg_dates_stay_in_the_window():
+    """Egg dates before the window start fall back to the capture date."""
+    start = np.datetime64('2020-01-01')
+    capture = np.array(['2020-01-03', '2020-02-01'], dtype='datetime64[D]')
+    eggs = egg_dates(capture, np.array([10, 10]), start)
+    assert eggs[0] == capture[0]
+    assert eggs[1] == np.datetime64('2020-01-22')
+
+def test_field_months_restrict_capture_and_resight_dates(austral_summer):
+    """Clean captures and resight dates only fall in the field months."""
+    assert set(months_of(field_days())) == {1, 2, 3, 10, 11, 12}
+    data = generate(3000, seed=8, mess_level='none', species_missing_rate=0.0)
+    for frame in (data.clean, data.messy):
+        months = pd.to_datetime(frame['capture_date']).dt.month
+        assert months.isin([1, 2, 3, 10, 11, 12]).all()
+
+def test_rowwise_engine_honours_field_months():
+    """Row-wise captures land on the allowed months too, not at offsets from the study start."""
+    set_field_months('11-12')
+    try:
+        random.seed(4)
+        np.random.seed(4)
+        months = pd.to_datetime(generate_penguins_rowwise(2000)['capture_date']).dt.month
+    finally:
+        set_field_months(range(1, 13))
+    assert set(months) == {11, 12}
+
+def test_off_season_resights_spread_over_the_season(austral_summer):
+    """Shifted dates in the off-season fold back over the previous season instead of its last day."""
+    original = np.full(20000, np.datetime64('2020-11-15'))
+    shifted = shift_resight_dates(original, np.random.default_rng(1))
+    assert set(months_of(shifted)) <= {1, 2, 3, 10, 11, 12}
+    counts = pd.Series(shifted).value_counts()
+    assert counts.max() < 3 * counts.median()
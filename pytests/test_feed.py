@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from dirty_birds.feed import build_events, run_feed, schedule
+
+def test_schedule_combines_rate_compression_and_jitter():
+    """Send times honour the rate cap and the compressed dates, and never go backwards."""
+    dates = np.array(['2020-01-01', '2020-01-01', '2020-01-03', '2020-01-04'], dtype='datetime64[D]')
+    assert list(schedule(dates, rate=10)) == pytest.approx([0, 0.1, 0.2, 0.3])
+    assert list(schedule(dates, rate=None, compression=86400)) == pytest.approx([0, 0, 2, 3])
+    assert list(schedule(dates, rate=1, compression=86400)) == pytest.approx([0, 1, 2, 3])
+    jittered = schedule(dates, rate=10, jitter=0.5, rng=1)
+    assert (np.diff(jittered) >= 0).all() and (jittered >= schedule(dates, rate=10)).all()
+
+def test_events_are_date_ordered_captures_and_resights():
+    """The run's events are sorted by event date and include resights."""
+    events = build_events(1500, seed=3)
+    assert (np.diff(events['event_date'].to_numpy().astype(np.int64)) >= 0).all()
+    assert set(events['event']) == {'capture', 'resight'}
+    assert list(events['sequence']) == list(range(len(events)))
+
+def test_feed_to_callback_and_unix_socket(tmp_path):
+    """The same events reach an async callback and a socket consumer, in order."""
+    received = []
+
+    async def on_event(event):
+        received.append(event)
+
+    stats = asyncio.run(run_feed(on_event, num_penguins=800, seed=3, rate=20_000))
+    assert stats['events'] == len(received) > 800
+    assert [e['sequence'] for e in received] == list(range(len(received)))
+
+    async def over_socket():
+        lines = []
+
+        async def handle(reader, writer):
+            while line := await reader.readline():
+                lines.append(json.loads(line))
+
+        path = str(tmp_path / "feed.sock")
+        server = await asyncio.start_unix_server(handle, path)
+        async with server:
+            await run_feed(f"unix://{path}", num_penguins=800, seed=3, rate=None)
+            await asyncio.sleep(0.05)
+        return lines
+
+    lines = asyncio.run(over_socket())
+    assert [e['tag_id'] for e in lines] == [e['tag_id'] for e in received]
+    assert lines[0]['event_date'] == received[0]['event_date']
+
+def test_feed_rejects_bad_options():
+    """Unbounded runs and non-positive rates are refused."""
+    async def on_event(event):
+        pass
+    with pytest.raises(ValueError):
+        asyncio.run(run_feed(on_event, num_penguins=None))
+    with pytest.raises(ValueError):
+        asyncio.run(run_feed(on_event, num_penguins=10, rate=-1))
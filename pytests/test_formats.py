@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dirty_birds.formats import encode_frame, load_columns, output_path, read_frame, write_frame
+from dirty_birds.generation import generate_penguins_columnar
+from dirty_birds.mess import build_resight_rows, inject_mess
+
+@pytest.fixture(scope="module")
+def frames():
+    """A clean population and a heavily corrupted messy copy with resights."""
+    clean = generate_penguins_columnar(5000, np.random.default_rng(5))
+    messy = inject_mess(clean.copy(), mess_level='heavy', rng=np.random.default_rng(6))
+    messy = pd.concat([messy, build_resight_rows(messy, rng=np.random.default_rng(7))])
+    return clean, messy
+
+def test_column_directory_round_trips_to_identical_csv(frames, tmp_path):
+    """Clean and messy data survive the .npy directory format byte for byte."""
+    clean, messy = frames
+    write_frame(clean, tmp_path / 'clean', 'npy', invalid_columns=False)
+    write_frame(messy, tmp_path / 'messy', 'npy')
+    assert read_frame(tmp_path / 'clean', 'npy').to_csv(index=False) == clean.to_csv(index=False)
+    assert read_frame(tmp_path / 'messy', 'npy').to_csv(index=False) == messy.to_csv(index=False)
+
+def test_column_directory_is_memory_mappable(frames, tmp_path):
+    """Columns load as memory maps with typed dates and integer category codes."""
+    clean, _ = frames
+    write_frame(clean, tmp_path / 'clean', 'npy', invalid_columns=False)
+    schema, arrays = load_columns(tmp_path / 'clean')
+    assert schema['rows'] == len(clean)
+    assert isinstance(arrays['species'], np.memmap) and arrays['species'].dtype.kind == 'i'
+    assert arrays['capture_date'].dtype == np.dtype('datetime64[D]')
+    labels = arrays['species.categories'][arrays['species']]
+    assert (labels == clean['species'].to_numpy(dtype=str)).all()
+
+def test_invalid_values_are_kept_verbatim(frames):
+    """Bad dates and typos are preserved as raw text instead of being coerced."""
+    _, messy = frames
+    encoded = encode_frame(messy)
+    bad = encoded['capture_date_invalid'].notna()
+    assert bad.any()
+    assert encoded['capture_date'][bad].isna().all()
+    assert set(encoded['capture_date_invalid'].dropna()) & {'not-a-date', '9999-99-99', 'error'}
+    assert 'Gentto' in set(encoded['species'].cat.categories)
+
+def test_clean_encoding_rejects_invalid_values(frames):
+    """Without invalid columns, unparseable values raise rather than vanish."""
+    _, messy = frames
+    with pytest.raises(ValueError):
+        encode_frame(messy, invalid_columns=False)
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_arrow_formats_round_trip(frames, tmp_path, fmt):
+    """Parquet and Feather outputs decode to the same messy CSV when pyarrow is available."""
+    pytest.importorskip("pyarrow")
+    _, messy = frames
+    path = tmp_path / f"messy.{fmt}"
+    write_frame(messy, path, fmt)
+    assert read_frame(path, fmt).to_csv(index=False) == messy.to_csv(index=False)
+
+def test_output_path_swaps_csv_suffix():
+    """Default .csv names take the extension of the chosen format."""
+    assert output_path('out.csv', 'parquet') == 'out.parquet'
+    assert output_path('out.csv', 'npy') == 'out'
+    assert output_path('out.data', 'feather') == 'out.data'
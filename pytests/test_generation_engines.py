@@ -0,0 +1,87 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dirty_birds.config import COLUMNS, HEALTH_LABELS, SPECIES_CODES, TAG_PREFIXES
+from dirty_birds.generation import (
+    assign_tag_numbers, classify_health, generate_penguins_columnar, generate_penguins_rowwise, parameter_tables,
+)
+
+@pytest.fixture(scope="module")
+def columnar_df():
+    """Generates one columnar population shared by the tests in this module."""
+    return generate_penguins_columnar(20000, rng=np.random.default_rng(42))
+
+@pytest.fixture(scope="module")
+def rowwise_df():
+    """Generates one row-wise population, seeded the way main() seeds it."""
+    np.random.seed(42)
+    random.seed(42)
+    return generate_penguins_rowwise(2000)
+
+def test_engines_share_schema(columnar_df, rowwise_df):
+    """Both engines must produce the same columns in the same order."""
+    assert list(columnar_df.columns) == COLUMNS
+    assert list(rowwise_df.columns) == COLUMNS
+    assert columnar_df['body_mass_g'].dtype == rowwise_df['body_mass_g'].dtype
+
+def test_columnar_is_reproducible():
+    """The same seed must give an identical population."""
+    a = generate_penguins_columnar(500, rng=np.random.default_rng(7))
+    b = generate_penguins_columnar(500, rng=np.random.default_rng(7))
+    pd.testing.assert_frame_equal(a, b)
+
+def test_columnar_tags_are_contiguous_per_species(columnar_df):
+    """Tag numbers must run 1..n per species prefix, in row order, with no gaps."""
+    tagged = columnar_df.dropna(subset=['tag_id'])
+    for species, prefix in TAG_PREFIXES.items():
+        tags = tagged.loc[tagged['species'] == species, 'tag_id']
+        assert tags.str.startswith(prefix + '-').all()
+        numbers = tags.str.split('-').str[1].astype(int).to_numpy()
+        assert (numbers == np.arange(1, len(numbers) + 1)).all()
+
+def test_tag_numbers_continue_each_species_counter():
+    """Tagged rows take their species' next numbers in row order, as repeated generate_tag calls would."""
+    rng = np.random.default_rng(3)
+    species = rng.integers(0, len(SPECIES_CODES), size=5000).astype(np.int8)
+    tagged = rng.random(5000) < 0.7
+    counters = {name: 10 * (code + 1) for code, name in enumerate(SPECIES_CODES)}
+    expected_counters = dict(counters)
+    expected = np.zeros(5000, dtype=np.int64)
+    for row in np.flatnonzero(tagged):
+        name = SPECIES_CODES[species[row]]
+        expected[row] = expected_counters[name]
+        expected_counters[name] += 1
+    assert np.array_equal(assign_tag_numbers(species, tagged, counters), expected)
+    assert counters == expected_counters
+    assert not assign_tag_numbers(species[:0], tagged[:0], counters).size
+
+def test_columnar_distributions_match_rowwise(columnar_df, rowwise_df):
+    """Category frequencies and morphometric means should agree within sampling noise."""
+    for col in ['species', 'colony_id', 'age_group', 'clutch_completion', 'health_status']:
+        a = columnar_df[col].value_counts(normalize=True)
+        b = rowwise_df[col].value_counts(normalize=True)
+        assert (a - b).abs().max() < 0.05, f"{col} frequencies drifted"
+    assert abs(columnar_df['tag_id'].notna().mean() - 0.65) < 0.02
+    assert abs(columnar_df['body_mass_g'].mean() - rowwise_df['body_mass_g'].mean()) < 60
+
+def test_health_prefers_underweight_when_thresholds_cross():
+    """Where stress lifts the low threshold above the high one, in-between masses are Underweight."""
+    t = parameter_tables()
+    code, colony = int(np.argmin(t['band'])), int(np.argmax(t['stress']))
+    species = np.full(3, code, dtype=np.int8)
+    mean, band, stress = t['mass_mean'][code], t['band'][code], t['stress'][colony]
+    low, high = mean * (1 - band) * (1 + stress), mean * (1 + band) * (1 - stress)
+    assert low > high
+    masses = np.array([high - 1, (low + high) / 2, low + 1])
+    health = classify_health(masses, species, np.full(3, colony))
+    assert [HEALTH_LABELS[code] for code in health] == ['Underweight', 'Underweight', 'Overweight']
+
+def test_columnar_egg_dates_follow_clutch(columnar_df):
+    """Egg dates exist only for completed clutches and never after the capture date."""
+    has_egg = columnar_df['date_egg'].notna()
+    assert (has_egg == (columnar_df['clutch_completion'] == 'Yes')).all()
+    eggs = columnar_df[has_egg]
+    assert (eggs['date_egg'] <= eggs['capture_date']).all()
@@ -0,0 +1,69 @@
+import json
+import pstats
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from dirty_birds import generate, save
+from dirty_birds.instrument import StageRecorder
+
+GENERATOR_SCRIPT = Path(__file__).parent.parent / "penguin_synthetic_generator_v0.4.0.py"
+
+def test_recorder_sums_repeated_stages_and_calls_back():
+    """Repeated stages are summed by name and every event reaches the callback."""
+    events = []
+    recorder = StageRecorder(callback=events.append)
+    for _ in range(3):
+        with recorder.stage('chunk', rows_in=10) as stage:
+            stage['rows_out'] = 12
+    recorder.annotate('chunk', bytes_written=100)
+    [chunk] = recorder.stages
+    assert chunk['calls'] == 3 and chunk['rows_in'] == 30 and chunk['rows_out'] == 36
+    assert chunk['bytes_written'] == 100 and chunk['peak_bytes'] > 0
+    assert [e['stage'] for e in events] == ['chunk'] * 3
+
+def test_tracemalloc_mode_measures_stage_allocations():
+    """With tracemalloc, a stage's peak reflects its own allocations."""
+    recorder = StageRecorder(memory='tracemalloc')
+    with recorder.stage('allocate'):
+        block = np.ones(2_000_000)
+    del block
+    assert recorder.stages[0]['peak_bytes'] >= 16_000_000
+
+def test_pipeline_stages_are_reported(tmp_path):
+    """generate() and save() report every stage with rows and bytes written."""
+    recorder = StageRecorder(profile=True)
+    data = generate(2000, seed=3, mislabel_rate=0.01, recorder=recorder)
+    save(data, tmp_path / "clean.csv", tmp_path / "messy.csv", recorder=recorder)
+    report = recorder.report(mode='test')
+    names = [s['stage'] for s in report['stages']]
+    assert names == ['generation', 'inject_mess', 'resight', 'species_missingness', 'mislabels', 'write_clean', 'write_messy']
+    write_messy = report['stages'][-1]
+    assert write_messy['rows_out'] == len(data.messy)
+    assert write_messy['bytes_written'] == (tmp_path / "messy.csv").stat().st_size
+    assert report['run']['mode'] == 'test'
+    hottest = recorder.dump_hottest_profile(tmp_path / "hot.prof")
+    assert hottest == report['hottest_stage']
+    assert pstats.Stats(str(tmp_path / "hot.prof")).total_calls > 0
+
+def test_cli_profile_report(tmp_path):
+    """--profile writes a JSON run report for a streaming run."""
+    report_path = tmp_path / "report.json"
+    subprocess.run([
+        sys.executable, str(GENERATOR_SCRIPT), "--num-penguins", "1000", "--chunk-size", "400",
+        "--clean-output", str(tmp_path / "clean.csv"), "--messy-output", str(tmp_path / "messy.csv"),
+        "--profile", str(report_path),
+    ], check=True, capture_output=True)
+    report = json.loads(report_path.read_text())
+    stages = {s['stage']: s for s in report['stages']}
+    assert stages['generation']['calls'] == 3 and stages['generation']['rows_in'] == 1000
+    assert stages['write_clean']['bytes_written'] == (tmp_path / "clean.csv").stat().st_size
+    assert report['run']['arguments']['chunk_size'] == 400
+
+def test_rejects_unknown_memory_mode():
+    """Only the documented memory modes are accepted."""
+    with pytest.raises(ValueError):
+        StageRecorder(memory='psutil')
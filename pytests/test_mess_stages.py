@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dirty_birds.corruption import BAD_DATES, apply_corruption_plan, default_corruption_plan, sample_rows
+from dirty_birds.generation import generate_penguins_columnar
+from dirty_birds.mess import build_resight_rows, duplicate_penguin_rows_for_resight, inject_mess, parse_capture_dates
+
+@pytest.fixture(scope="module")
+def clean_df():
+    """A clean population shared by the stage tests."""
+    return generate_penguins_columnar(5000, rng=np.random.default_rng(3))
+
+def test_parse_capture_dates_handles_mixed_values():
+    """ISO and swapped dates parse; corrupted and missing values come back as NaT."""
+    parsed = parse_capture_dates(['2021-03-24', '15-06-2020', 'not-a-date', '2024-13-05', np.nan, None])
+    assert parsed[0] == np.datetime64('2021-03-24')
+    assert parsed[1] == np.datetime64('2020-06-15')
+    assert np.isnat(parsed[2]) and np.isnat(parsed[4]) and np.isnat(parsed[5])
+
+@pytest.mark.filterwarnings("ignore:Parsing dates")
+def test_parse_capture_dates_keeps_the_day_first_reading():
+    """Ambiguous and non-padded dates read as the per-value day-first parser always has."""
+    days = np.arange('2019-01-01', '2025-01-01', dtype='datetime64[D]').astype(str).tolist()
+    values = days + ['2024-05-3', '2024-5-03', '2024-1-1', '3-5-2024']
+    expected = [pd.to_datetime(v, dayfirst=True) for v in values]
+    assert np.array_equal(parse_capture_dates(values), pd.to_datetime(expected).to_numpy().astype('datetime64[D]'))
+    assert parse_capture_dates(['2023-11-05'])[0] == np.datetime64('2023-05-11')
+    assert parse_capture_dates(['2024-05-3'])[0] == np.datetime64('2024-03-05')
+    iso = parse_capture_dates(['2023-11-05', '2024-05-3'], iso_first=True)
+    assert iso.tolist() == [np.datetime64('2023-11-05'), np.datetime64('2024-03-05')]
+
+def test_resights_only_come_from_tagged_rows(clean_df):
+    """Every resight row must point back at a tagged source row with the same tag."""
+    resights = build_resight_rows(clean_df, duplicate_rate=0.5, rng=np.random.default_rng(0))
+    assert resights['tag_id'].notna().all()
+    assert (resights['tag_id'] == clean_df.loc[resights.index, 'tag_id']).all()
+    expected = int(clean_df['tag_id'].notna().sum() * 0.5 * 0.95)
+    assert abs(len(resights) - expected) / expected < 0.1
+
+def test_resight_dates_advance_and_stay_in_study(clean_df):
+    """Resight dates move forward from the day-first reading of the source date, never past the study end."""
+    resights = build_resight_rows(clean_df, duplicate_rate=0.5, rng=np.random.default_rng(0))
+    new = pd.to_datetime(resights['capture_date'])
+    assert (new <= pd.Timestamp('2024-12-31')).all()
+    old = parse_capture_dates(clean_df.loc[resights.index, 'capture_date'])
+    uncapped = new.to_numpy() < np.datetime64('2024-11-01')
+    assert ((new.to_numpy().astype('datetime64[D]') - old)[uncapped] >= np.timedelta64(365, 'D')).all()
+
+def test_resight_keeps_unparseable_dates_and_promotes_age(clean_df):
+    """Invalid dates are left untouched; chicks and juveniles move up one age group."""
+    df = clean_df.copy()
+    df['capture_date'] = 'not-a-date'
+    df['age_group'] = 'Chick'
+    resights = build_resight_rows(df, duplicate_rate=0.2, rng=np.random.default_rng(1))
+    assert (resights['capture_date'] == 'not-a-date').all()
+    assert (resights['age_group'] == 'Juvenile').all()
+
+def test_duplicate_without_tags_returns_input(clean_df):
+    """With no tagged birds the frame is returned unchanged."""
+    df = clean_df.assign(tag_id=None)
+    assert duplicate_penguin_rows_for_resight(df, rng=np.random.default_rng(0)) is df
+
+def test_sample_rows_matches_rate():
+    """Geometric skip sampling selects sorted, unique rows at the requested rate."""
+    rows = sample_rows(1_000_000, 0.03, np.random.default_rng(0))
+    assert abs(len(rows) / 1_000_000 - 0.03) < 0.001
+    assert (np.diff(rows) > 0).all() and rows.min() >= 0 and rows.max() < 1_000_000
+    assert len(sample_rows(100, 0.0, np.random.default_rng(0))) == 0
+
+def test_corruption_plan_rates_and_vocabularies(clean_df):
+    """Each planned corruption hits about its rate and only uses its vocabulary."""
+    plan = {'sex': {'replace': 0.2}, 'bill_length_mm': {'missing': 0.1}, 'capture_date': {'bad_date': 0.1}}
+    messy = apply_corruption_plan(clean_df, plan, rng=np.random.default_rng(5))
+    assert abs(messy['bill_length_mm'].isna().mean() - 0.1) < 0.02
+    changed = messy['capture_date'] != clean_df['capture_date']
+    all_bad = np.concatenate(list(BAD_DATES.values()))
+    assert messy.loc[changed, 'capture_date'].isin(all_bad).all()
+    assert abs(changed.mean() - 0.1) < 0.02
+    # Columns outside the plan and the input frame are untouched
+    pd.testing.assert_series_equal(messy['island'], clean_df['island'])
+    assert clean_df['bill_length_mm'].notna().all()
+
+def test_corruption_plan_rejects_unknown_entries(clean_df):
+    """Plans naming unknown columns or corruption types fail loudly."""
+    with pytest.raises(KeyError):
+        apply_corruption_plan(clean_df, {'wingspan': {'missing': 0.1}})
+    with pytest.raises(ValueError):
+        apply_corruption_plan(clean_df, {'sex': {'scramble': 0.1}})
+
+def test_inject_mess_outliers_stay_within_bounds(clean_df):
+    """Heavy mess keeps numeric outliers inside their clip bounds."""
+    messy = inject_mess(clean_df, 'heavy', rng=np.random.default_rng(2))
+    assert messy['body_mass_g'].dropna().between(2500, 6500).all()
+    assert messy['bill_depth_mm'].dropna().between(13, 21).all()
+    assert set(default_corruption_plan(0.15)['body_mass_g']) == {'missing', 'outlier'}
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dirty_birds import config, generate
+from dirty_birds.cache import cache_key
+from dirty_birds.config import AGE_GROUPS, MORPHOMETRIC_CORRELATION, SEX_CODES, SPECIES_CODES
+from dirty_birds.generation import generate_penguins_rowwise, parameter_tables
+from dirty_birds.morphometrics import (
+    MORPHOMETRIC_COLUMNS, correlate, correlation_factor, draw_morphometrics, set_morphometrics,
+)
+from dirty_birds.params import current_params, reset_params, use_params
+from dirty_birds.seekable import clean_rows
+
+@pytest.fixture
+def correlated():
+    """Selects the correlated sampler for one test, then the default again."""
+    set_morphometrics('correlated')
+    yield
+    set_morphometrics('independent')
+
+def test_independent_sampler_makes_the_original_draws():
+    """The default sampler draws each column with rng.normal, in column order."""
+    t = parameter_tables()
+    species = np.random.default_rng(0).integers(0, len(SPECIES_CODES), size=1000)
+    age = np.full(1000, AGE_GROUPS.index('Adult'))
+    sex = np.zeros(1000, dtype=np.int8)
+    drawn = draw_morphometrics(np.random.default_rng(5), species, age, sex, t)
+    rng = np.random.default_rng(5)
+    info = [config.SPECIES_INFO[s] for s in SPECIES_CODES]
+    for column, (mean, sd) in zip(MORPHOMETRIC_COLUMNS, [('bill_mean', 'bill_sd'), ('bill_depth_mean', 'bill_depth_sd'),
+                                                         ('flipper_mean', 'flipper_sd'), ('mass_mean', 'mass_sd')]):
+        expected = rng.normal(np.array([i[mean] for i in info])[species], np.array([i[sd] for i in info])[species])
+        assert np.array_equal(drawn[column], np.clip(expected, *config.CLIP_BOUNDS[column]))
+
+def test_correlate_matches_a_per_row_product():
+    """The per-species batched products equal mean + L @ z row by row."""
+    t = parameter_tables()
+    rng = np.random.default_rng(2)
+    species = rng.integers(0, len(SPECIES_CODES), size=500)
+    z = rng.standard_normal((4, 500))
+    expected = t['morph_mean'][:, species] + np.einsum('nij,jn->in', t['morph_chol'][species], z)
+    assert np.allclose(correlate(z, species, t), expected)
+
+def test_correlated_draws_follow_the_species_covariance():
+    """Large samples recover each species' means, standard deviations and correlations."""
+    t = parameter_tables()
+    n = 200_000
+    age = np.full(n, AGE_GROUPS.index('Adult'))
+    sex = np.full(n, SEX_CODES.index(None), dtype=np.int8)
+    for code, name in enumerate(SPECIES_CODES):
+        drawn = draw_morphometrics(np.random.default_rng(code), np.full(n, code), age, sex, t, sampler='correlated')
+        frame = pd.DataFrame(drawn)
+        info = config.SPECIES_INFO[name]
+        assert frame['bill_length_mm'].mean() == pytest.approx(info['bill_mean'], abs=0.05)
+        assert frame['body_mass_g'].std() == pytest.approx(info['mass_sd'], rel=0.03)
+        assert np.allclose(frame.corr().to_numpy(), MORPHOMETRIC_CORRELATION[name], atol=0.03)
+
+def test_every_engine_uses_the_selected_sampler(correlated):
+    """Columnar, row-wise and counter-based runs all produce correlated measurements."""
+    np.random.seed(1)
+    frames = [generate(6000, seed=1, mess_level='none').clean, generate_penguins_rowwise(6000), clean_rows(0, 6000)]
+    for frame in frames:
+        adults = frame[(frame['species'] == 'Gentoo') & (frame['age_group'] == 'Adult')]
+        assert adults['bill_length_mm'].corr(adults['flipper_length_mm']) > 0.5
+
+def test_correlated_counter_rows_stay_seekable(correlated):
+    """A sub-range of the counter-based engine matches the same rows of a full run."""
+    full = clean_rows(0, 300)
+    part = clean_rows(120, 180)
+    pd.testing.assert_frame_equal(part, full.iloc[120:180])
+
+def test_sampler_changes_the_cache_key(correlated):
+    """Clean bases drawn with different samplers are cached apart."""
+    key = cache_key(1000, 42)
+    set_morphometrics('independent')
+    assert cache_key(1000, 42) != key
+
+def test_params_carry_correlations():
+    """Parameter files may set or omit a species' correlation matrix; bad matrices are rejected."""
+    params = current_params()
+    assert params['species']['Gentoo']['correlation'] == MORPHOMETRIC_CORRELATION['Gentoo']
+    del params['species']['Gentoo']['correlation']
+    params['species']['Adelie']['correlation'] = np.eye(4).tolist()
+    try:
+        use_params(params)
+        assert list(config.MORPHOMETRIC_CORRELATION) == ['Adelie', 'Chinstrap']
+        t = parameter_tables()
+        gentoo = SPECIES_CODES.index('Gentoo')
+        assert np.allclose(t['morph_chol'][gentoo], np.diag(t['morph_sd'][:, gentoo]))
+    finally:
+        reset_params()
+    assert 'Gentoo' in config.MORPHOMETRIC_CORRELATION
+    for bad in [np.eye(3), np.full((4, 4), 1.0) + np.eye(4), [[1, 0.9, 0, 0], [0.9, 1, 0.9, 0], [0, 0.9, 1, 0.9], [0, 0, 0.9, 1.0]]]:
+        with pytest.raises(ValueError):
+            correlation_factor(bad)
+    with pytest.raises(ValueError):
+        set_morphometrics('copula')
@@ -0,0 +1,153 @@
+import functools
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from dirty_birds import config, csvio, generate, generate_penguins_rowwise, parallel, variants
+from dirty_birds.cache import cache_key
+from dirty_birds.generation import parameter_tables
+from dirty_birds.dates import set_field_months
+from dirty_birds.morphometrics import set_morphometrics
+from dirty_birds.params import current_params, read_params, reset_params, use_params, write_params
+
+def _many_colonies(count):
+    """The built-in parameters with ``count`` colonies spread over ten islands."""
+    params = current_params()
+    params['colonies'] = {
+        f"Colony {i:03d}": {'island': f"Island {i % 10}", 'weight': 1 + i % 7, 'stress': (i % 5) * 0.05}
+        for i in range(count)
+    }
+    return params
+
+@pytest.fixture
+def restore_params():
+    """Puts the built-in species and colonies back after the test."""
+    yield
+    reset_params()
+
+def test_builtin_params_round_trip_through_json(tmp_path, restore_params):
+    """Writing and reloading the built-in parameters leaves the generated data unchanged."""
+    before = generate(500, seed=4)
+    path = tmp_path / 'params.json'
+    write_params(path)
+    use_params(str(path))
+    after = generate(500, seed=4)
+    assert before.clean.equals(after.clean)
+    assert before.messy.equals(after.messy)
+
+def test_toml_file_adds_a_species(tmp_path, restore_params):
+    """A TOML file can add a species with its own tag prefix; optional fields take defaults."""
+    path = tmp_path / 'params.toml'
+    path.write_text(
+        '[species.Emperor]\ntag_prefix = "EMP"\nbill_mean = 50.0\nbill_sd = 3.0\nbill_depth_mean = 17.0\n'
+        'bill_depth_sd = 1.0\nflipper_mean = 225\nflipper_sd = 5\nmass_mean = 6000\nmass_sd = 300\n'
+        '[species.Adelie]\ntag_prefix = "ADE"\nbill_mean = 38.8\nbill_sd = 2.7\nbill_depth_mean = 18.4\n'
+        'bill_depth_sd = 1.5\nflipper_mean = 190\nflipper_sd = 6.5\nmass_mean = 3700\nmass_sd = 300\n'
+        '[colonies."Cape Crozier"]\nisland = "Ross"\nweight = 1\n'
+    )
+    params = use_params(str(path))
+    assert params['species']['Emperor']['clutch_prob'] == 0.8
+    assert params['colonies']['Cape Crozier']['stress'] == 0.0
+    data = generate(800, seed=5, compact=False)
+    assert set(data.clean['species']) == {'Emperor', 'Adelie'}
+    assert set(data.clean['island']) == {'Ross'}
+    emperor_tags = data.clean.loc[data.clean['species'] == 'Emperor', 'tag_id'].dropna()
+    assert emperor_tags.str.startswith('EMP-').all()
+    rowwise = generate_penguins_rowwise(200)
+    assert set(rowwise['colony_id']) == {'Cape Crozier'}
+
+def test_hundreds_of_colonies_compile_to_wide_code_tables(restore_params):
+    """More colonies than int8 codes can hold still gather correctly in both frame types."""
+    use_params(_many_colonies(300))
+    t = parameter_tables()
+    assert len(t['colony_p']) == 300 and np.isclose(t['colony_p'].sum(), 1)
+    data = generate(5000, seed=6, compact=True)
+    colonies = data.clean['colony_id'].astype(str)
+    islands = data.clean['island'].astype(str)
+    assert colonies.nunique() > 200
+    expected = 'Island ' + (colonies.str[-3:].astype(int) % 10).astype(str)
+    assert (islands == expected).all()
+
+def test_loaded_params_change_the_cache_key(restore_params):
+    """A cached clean base is never reused under different parameters."""
+    key = cache_key(1000, 42)
+    use_params(_many_colonies(8))
+    assert cache_key(1000, 42) != key
+    reset_params()
+    assert cache_key(1000, 42) == key
+
+def test_params_set_clip_bounds(restore_params):
+    """A clip_bounds table narrows the named columns in every engine; the others keep their defaults."""
+    params = current_params()
+    params['clip_bounds'] = {'bill_length_mm': [40, 45]}
+    use_params(params)
+    assert config.CLIP_BOUNDS['bill_depth_mm'] == (13, 21)
+    np.random.seed(3)
+    for clean in [generate(3000, seed=3, mess_level='none').clean, generate_penguins_rowwise(500)]:
+        assert clean['bill_length_mm'].between(40, 45).all()
+        assert clean['bill_length_mm'].eq(40).any() and clean['bill_length_mm'].eq(45).any()
+    key = cache_key(1000, 42)
+    reset_params()
+    assert config.CLIP_BOUNDS['bill_length_mm'] == (32, 60)
+    assert cache_key(1000, 42) != key
+
+def test_wide_mass_bounds_widen_the_compact_dtype(restore_params):
+    """Body masses beyond int16 are stored as int32 instead of wrapping around."""
+    params = current_params()
+    params['clip_bounds'] = {'body_mass_g': [2500, 50000]}
+    use_params(params)
+    data = generate(2000, seed=5, compact=True)
+    assert data.clean['body_mass_g'].dtype == np.int32
+    assert data.clean['body_mass_g'].between(2500, 50000).all()
+
+def test_spawned_workers_use_the_callers_settings(tmp_path, monkeypatch, restore_params):
+    """Pools started with 'spawn' generate and write what an inline run does under loaded settings."""
+    spawn = functools.partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context('spawn'))
+    for module in (parallel, csvio, variants):
+        monkeypatch.setattr(module, 'ProcessPoolExecutor', spawn)
+    params = current_params()
+    params['species'] = {('Emperor' if name == 'Adelie' else name): entry for name, entry in params['species'].items()}
+    params['species']['Emperor']['tag_prefix'] = 'EMP'
+    use_params(params)
+    set_field_months('11-2')
+    set_morphometrics('correlated')
+    try:
+        outputs = {}
+        for workers in (1, 2):
+            run = tmp_path / f"workers{workers}"
+            run.mkdir()
+            parallel.generate_sharded(1500, run / "clean.csv", run / "messy.csv", workers=workers, shard_size=400)
+            csvio.write_csv(generate(1000, seed=3, compact=True).clean, run / "written.csv", workers=workers,
+                            chunk_rows=300)
+            variants.fan_out(run / "variants", variants.expand_grid(), 600, seed=3, workers=workers)
+            outputs[workers] = {path.relative_to(run): path.read_bytes() for path in run.rglob('*.csv')}
+    finally:
+        set_field_months(range(1, 13))
+        set_morphometrics('independent')
+    assert outputs[1] == outputs[2]
+    assert b'EMP-' in outputs[2][Path("written.csv")]
+
+def test_invalid_params_are_rejected(tmp_path):
+    """Missing fields, colliding tag prefixes and unknown file types raise ValueError."""
+    params = current_params()
+    del params['species']['Gentoo']['mass_sd']
+    with pytest.raises(ValueError, match='mass_sd'):
+        use_params(params)
+    params = current_params()
+    params['species']['Gentoo']['tag_prefix'] = 'ADE'
+    with pytest.raises(ValueError, match='tag_prefix'):
+        use_params(params)
+    for bounds in [{'beak_mm': [1, 2]}, {'body_mass_g': [6500, 2500]}, {'body_mass_g': 3000}, {'body_mass_g': [0, 2 ** 40]}]:
+        params = current_params()
+        params['clip_bounds'] = bounds
+        with pytest.raises(ValueError, match='clip_bounds'):
+            use_params(params)
+    path = tmp_path / 'params.yaml'
+    path.write_text(json.dumps(current_params()))
+    with pytest.raises(ValueError, match='.yaml'):
+        read_params(path)
+    assert parameter_tables()['tag_prefix'].tolist() == ['ADE', 'CHN', 'GEN']
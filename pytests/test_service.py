@@ -0,0 +1,109 @@
+import copy
+import os
+import stat
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from dirty_birds import config
+from dirty_birds.params import current_params, write_params
+from dirty_birds.service import build_options, parse_address, run_request
+
+REPO = Path(__file__).parent.parent
+GENERATOR_SCRIPT = REPO / "penguin_synthetic_generator_v0.4.0.py"
+CLIENT_SCRIPT = REPO / "penguin_client.py"
+
+@pytest.fixture(scope="module")
+def service(tmp_path_factory):
+    """A running service with one worker, listening on a Unix socket."""
+    directory = tmp_path_factory.mktemp("service")
+    socket_path = directory / "service.sock"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "dirty_birds.service", "--listen", f"unix://{socket_path}", "--workers", "1",
+         "--cache-dir", str(directory / "cache")],
+        cwd=REPO, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while not socket_path.exists():
+        assert process.poll() is None and time.monotonic() < deadline, "the service did not start"
+        time.sleep(0.1)
+    yield f"unix://{socket_path}"
+    process.terminate()
+    process.wait(timeout=30)
+
+def run_client(service, cwd, *args):
+    return subprocess.run([sys.executable, str(CLIENT_SCRIPT), "--service", service, *args],
+                          cwd=cwd, capture_output=True, check=False)
+
+def test_socket_is_private(service):
+    """Only the service's user can connect to its socket."""
+    assert stat.S_IMODE(os.stat(service[len('unix://'):]).st_mode) == 0o600
+
+def test_client_writes_the_same_files_as_the_script(service, tmp_path):
+    """A request through the service saves byte-identical outputs, relative to the client's directory."""
+    options = ["--num-penguins", "400", "--seed", "7", "--mess-level", "heavy", "--mislabel-rate", "0.02"]
+    result = run_client(service, tmp_path, *options, "--clean-output", "svc_clean.csv", "--messy-output", "svc_messy.csv")
+    assert result.returncode == 0
+    assert b"Saving 400 clean records to svc_clean.csv" in result.stdout
+    subprocess.run([sys.executable, str(GENERATOR_SCRIPT), *options, "--no-cache",
+                    "--clean-output", "cli_clean.csv", "--messy-output", "cli_messy.csv"],
+                   cwd=tmp_path, check=True, capture_output=True)
+    assert (tmp_path / "svc_clean.csv").read_bytes() == (tmp_path / "cli_clean.csv").read_bytes()
+    assert (tmp_path / "svc_messy.csv").read_bytes() == (tmp_path / "cli_messy.csv").read_bytes()
+
+def test_client_streams_the_same_records_as_the_script(service, tmp_path):
+    """Streamed records go to stdout and progress to stderr, as with the script."""
+    options = ["--num-penguins", "300", "--stream", "ndjson", "--chunk-size", "70", "--field-months", "10-3"]
+    result = run_client(service, tmp_path, *options)
+    expected = subprocess.run([sys.executable, str(GENERATOR_SCRIPT), *options],
+                              cwd=tmp_path, check=True, capture_output=True)
+    assert result.returncode == 0
+    assert result.stdout == expected.stdout
+    assert result.stderr == expected.stderr
+
+def test_client_reports_failed_requests(service, tmp_path):
+    """Invalid requests fail with the service's error and a non-zero exit code."""
+    result = run_client(service, tmp_path, "--num-penguins", "50", "--params", "missing.json")
+    assert result.returncode == 1 and b"FileNotFoundError" in result.stderr
+    result = run_client(service, tmp_path, "--num-penguins", "50", "--stream", "csv", "--engine", "counter")
+    assert result.returncode == 1 and b"counter engine" in result.stderr
+
+def test_client_falls_back_to_the_script(tmp_path):
+    """Without a service the client runs the generator script itself."""
+    result = run_client(f"unix://{tmp_path / 'none.sock'}", tmp_path, "--num-penguins", "50",
+                        "--clean-output", "c.csv", "--messy-output", "m.csv", "--no-cache")
+    assert result.returncode == 0 and b"running the script directly" in result.stderr
+    assert (tmp_path / "c.csv").exists() and (tmp_path / "m.csv").exists()
+
+def test_build_options_validates_requests():
+    """Requests get the script's defaults and reject options the service does not run."""
+    options = build_options({'cwd': '/data', 'options': {'num_penguins': 10}})
+    assert options['mess_level'] == 'moderate' and options['cwd'] == '/data'
+    for bad in [{'rows': '0:10'}, {'engine': 'fast'}, {'num_penguins': 0}, {'chunk_size': 100}]:
+        with pytest.raises(ValueError):
+            build_options({'options': bad})
+    for bad in [[1, 2], 'options', {'options': ['num_penguins']}, {'cwd': 3}]:
+        with pytest.raises(ValueError):
+            build_options(bad)
+    assert parse_address('tcp://127.0.0.1:7000') == ('tcp', ('127.0.0.1', 7000))
+    with pytest.raises(ValueError):
+        parse_address('localhost:7000')
+
+def test_run_request_restores_parameters(tmp_path):
+    """Per-request parameters and field months are undone after the request, even when it fails."""
+    params = current_params()
+    params['species']['Adelie']['mass_mean'] = 4200
+    write_params(tmp_path / "params.json", params)
+    builtin = copy.deepcopy(config.SPECIES_INFO)
+    options = build_options({'cwd': str(tmp_path), 'options': {
+        'num_penguins': 20, 'field_months': '10-3', 'params': 'params.json', 'no_cache': True,
+        'clean_output': 'missing/clean.csv',
+    }})
+    header, payload = run_request(options)
+    assert header['ok'] is False and 'missing/clean.csv' in header['error'] and payload is None
+    assert 'Loaded 3 species' in header['log']
+    assert config.FIELD_MONTHS == list(range(1, 13))
+    assert config.SPECIES_INFO == builtin
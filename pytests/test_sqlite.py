@@ -0,0 +1,57 @@
+import sqlite3
+
+import pytest
+
+from dirty_birds import generate
+from dirty_birds.sqlite import INDEXES, read_table, write_sqlite
+
+@pytest.fixture(scope='module')
+def database(tmp_path_factory):
+    """A 3,000-penguin dataset loaded into SQLite with the individuals table."""
+    data = generate(3000, seed=12, compact=True)
+    path = str(tmp_path_factory.mktemp('sqlite') / 'penguins.db')
+    counts = write_sqlite(path, data.clean, data.messy, individuals=True, batch_rows=700)
+    return data, path, counts
+
+def test_tables_round_trip_the_text_schema(database):
+    """Both tables read back as the text-schema rows, corrupted values included."""
+    data, path, counts = database
+    assert counts['clean'] == len(data.clean) and counts['messy'] == len(data.messy)
+    messy = read_table(path, 'messy')
+    expected = data.messy.reset_index(drop=True)
+    for column in expected.columns:
+        same = (expected[column].astype(str) == messy[column].astype(str)) | (expected[column].isna() & messy[column].isna())
+        assert same.all(), column
+    clean = read_table(path, 'clean')
+    assert clean['tag_id'].notna().sum() == (data.clean['tag_number'] > 0).sum()
+
+def test_indexes_serve_resight_histories(database):
+    """Every index exists and a tag's history is an index search without a sort."""
+    _, path, _ = database
+    db = sqlite3.connect(path)
+    names = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {f"{table}_{name}" for table in ('clean', 'messy') for name in INDEXES} <= names
+    plan = db.execute("EXPLAIN QUERY PLAN SELECT * FROM messy WHERE tag_id = 'ADE-0001' ORDER BY capture_date").fetchall()
+    db.close()
+    details = ' '.join(row[-1] for row in plan)
+    assert 'USING INDEX messy_tag_id' in details and 'TEMP B-TREE' not in details
+
+def test_individuals_count_messy_records(database):
+    """The individuals table has one row per tagged bird and its number of messy records."""
+    data, path, counts = database
+    individuals = read_table(path, 'individuals').set_index('tag_id')
+    assert counts['individuals'] == len(individuals) == (data.clean['tag_number'] > 0).sum()
+    sightings = data.messy['tag_id'].value_counts()
+    joined = individuals['sightings'].reindex(sightings.index).dropna()
+    assert (joined == sightings.reindex(joined.index)).all()
+    assert individuals['sightings'].max() > 1
+
+def test_reload_replaces_tables(database, tmp_path):
+    """Loading again replaces the tables instead of appending to them."""
+    data, _, _ = database
+    path = str(tmp_path / 'again.db')
+    write_sqlite(path, messy=data.messy)
+    write_sqlite(path, messy=data.messy.iloc[:100])
+    assert len(read_table(path, 'messy')) == 100
+    with pytest.raises(ValueError):
+        write_sqlite(path, messy=data.messy, individuals=True)
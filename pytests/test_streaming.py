@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dirty_birds.streaming import iter_chunk_sizes, stream_to_disk
+
+@pytest.fixture(scope="module")
+def streamed(tmp_path_factory):
+    """Streams a small dataset to disk in several chunks and reads it back."""
+    tmp_dir = tmp_path_factory.mktemp("stream")
+    clean_file = tmp_dir / "clean.csv"
+    messy_file = tmp_dir / "messy.csv"
+    counts = stream_to_disk(
+        5000, clean_file, messy_file, chunk_size=1200,
+        duplicate_rate=0.5, species_missing_rate=0.1, mislabel_rate=0.05,
+        rng=np.random.default_rng(11),
+    )
+    return {
+        "counts": counts,
+        "clean": pd.read_csv(clean_file),
+        "messy": pd.read_csv(messy_file),
+    }
+
+def test_chunk_sizes_cover_every_row():
+    """Chunks add up to the requested total and reject non-positive sizes."""
+    assert list(iter_chunk_sizes(10, 4)) == [4, 4, 2]
+    with pytest.raises(ValueError):
+        list(iter_chunk_sizes(10, 0))
+
+def test_streamed_row_counts(streamed):
+    """Written files match the reported counts and keep a single header."""
+    counts = streamed["counts"]
+    assert len(streamed["clean"]) == counts["clean"] == 5000
+    assert len(streamed["messy"]) == counts["messy"] == 5000 + counts["resights"] + counts["mislabels"]
+    assert (streamed["messy"]["tag_id"] != "tag_id").all()
+
+def test_streamed_tags_unique_across_chunks(streamed):
+    """Tag counters carry over between chunks, so clean tag IDs never repeat."""
+    tags = streamed["clean"]["tag_id"].dropna()
+    assert tags.is_unique
+
+def test_streamed_stages_keep_global_rates(streamed):
+    """Resight, mislabel and species-missingness rates hold across the whole file."""
+    counts = streamed["counts"]
+    tagged = streamed["clean"]["tag_id"].notna().sum()
+    assert abs(counts["resights"] / (tagged * 0.5 * 0.95) - 1) < 0.1
+    assert abs(streamed["messy"]["species"].isna().mean() - 0.1) < 0.02
+    assert counts["mislabels"] > 0
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dirty_birds import generate
+from dirty_birds.corruption import CORRUPTION_BITS, corruption_bit
+from dirty_birds.truth import ORIGINS, GroundTruth, column_mask, read_truth, truth_path, write_truth
+
+@pytest.fixture(scope='module')
+def run():
+    """A 2,000-penguin run with mislabels, returned with its ground truth."""
+    truth = GroundTruth()
+    data = generate(2000, seed=11, mess_level='heavy', mislabel_rate=0.05, truth=truth)
+    return data, truth
+
+def _differs(clean, messy, column):
+    a = clean[column].astype(object).to_numpy()
+    b = messy[column].astype(object).to_numpy()
+    return ~((pd.isna(a) & pd.isna(b)) | (a == b))
+
+def test_truth_does_not_change_the_messy_output(run):
+    """Tracking ground truth leaves the generated data identical."""
+    data, truth = run
+    plain = generate(2000, seed=11, mess_level='heavy', mislabel_rate=0.05)
+    pd.testing.assert_frame_equal(plain.messy, data.messy)
+    assert len(truth) == len(data.messy)
+
+def test_bits_match_changed_cells_of_original_rows(run):
+    """For original rows, every messy cell that differs from the clean one has its column's bits set."""
+    data, truth = run
+    original = truth.origin == ORIGINS.index('original')
+    clean = data.clean.iloc[truth.source_row[original]].reset_index(drop=True)
+    messy = data.messy[original].reset_index(drop=True)
+    corruption = truth.corruption[original]
+    for column in sorted({column for column, _ in CORRUPTION_BITS} - {'species'}):
+        flagged = (corruption & column_mask(column)) != 0
+        differs = _differs(clean, messy, column)
+        # A later step can put back the clean value, so a few flagged cells may match again
+        assert (flagged | ~differs).all(), column
+        assert (flagged & ~differs).sum() <= 0.01 * len(messy), column
+
+def test_resights_and_mislabels_link_to_their_source(run):
+    """Every origin occurs, and resights carry the tag of their clean source row."""
+    data, truth = run
+    counts = np.bincount(truth.origin, minlength=len(ORIGINS))
+    assert counts[0] == len(data.clean) and counts[1] > 0 and counts[2] > 0
+    resight = truth.origin == ORIGINS.index('resight')
+    messy_tags = data.messy['tag_id'][resight].to_numpy()
+    clean_tags = data.clean['tag_id'].to_numpy()[truth.source_row[resight]]
+    intact = (truth.corruption[resight] & column_mask('tag_id')) == 0
+    assert (messy_tags[intact] == clean_tags[intact]).all()
+
+def test_write_and_read_round_trip(run, tmp_path):
+    """The sidecar reloads as memory-mapped arrays equal to the originals."""
+    _, truth = run
+    path = truth_path(tmp_path / 'messy.csv')
+    write_truth(truth, path)
+    loaded = read_truth(path)
+    assert isinstance(loaded.corruption, np.memmap)
+    assert loaded.source_row.dtype == np.int32
+    for name in ('source_row', 'origin', 'corruption'):
+        assert (np.asarray(getattr(loaded, name)) == getattr(truth, name)).all()
+
+def test_unknown_corruption_is_rejected():
+    """Asking for a bit that was never assigned fails loudly."""
+    assert corruption_bit('species', 'missing') != corruption_bit('species', 'typo')
+    with pytest.raises(KeyError):
+        corruption_bit('species', 'outlier')
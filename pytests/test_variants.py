@@ -0,0 +1,44 @@
+import json
+
+import pandas as pd
+import pytest
+
+from dirty_birds import generate
+from dirty_birds.variants import expand_grid, fan_out, variant_seed
+
+@pytest.fixture(scope="module")
+def grid():
+    """Two mess levels by two mislabel rates."""
+    return expand_grid(mess_levels=['light', 'heavy'], mislabel_rates=[0.0, 0.02])
+
+def test_grid_expands_every_combination(grid):
+    """Each combination becomes one named config."""
+    assert len(grid) == 4
+    assert {c['name'] for c in grid} == {
+        'light_dup0.45_mis0_spm0.03', 'light_dup0.45_mis0.02_spm0.03',
+        'heavy_dup0.45_mis0_spm0.03', 'heavy_dup0.45_mis0.02_spm0.03',
+    }
+    with pytest.raises(ValueError):
+        expand_grid(mess_levels=['filthy'])
+
+def test_fan_out_writes_clean_once_plus_variants(grid, tmp_path):
+    """The clean base matches a normal run; each variant has its own file and seed."""
+    manifest = fan_out(tmp_path / "pooled", grid, 1500, seed=8, workers=2)
+    saved = json.loads((tmp_path / "pooled" / "manifest.json").read_text())
+    assert saved == json.loads(json.dumps(manifest))
+    clean = pd.read_csv(tmp_path / "pooled" / manifest['clean']['path'])
+    expected = generate(1500, seed=8).clean
+    assert clean.to_csv(index=False) == expected.to_csv(index=False)
+    assert len({v['seed'] for v in manifest['variants']}) == 4
+    for variant in manifest['variants']:
+        messy = pd.read_csv(tmp_path / "pooled" / variant['path'])
+        assert len(messy) == variant['rows'] > 1500
+
+def test_variants_do_not_depend_on_grid_or_workers(grid, tmp_path):
+    """A variant's output depends only on the root seed and its own configuration."""
+    full = fan_out(tmp_path / "full", grid, 800, seed=8, workers=2)
+    single = fan_out(tmp_path / "single", grid[-1:], 800, seed=8, workers=1)
+    name = single['variants'][0]['path']
+    assert (tmp_path / "full" / name).read_bytes() == (tmp_path / "single" / name).read_bytes()
+    assert single['variants'][0]['seed'] == variant_seed(8, grid[-1]['name'])
+    assert full['variants'][-1]['seed'] == single['variants'][0]['seed']